@@ -0,0 +1,93 @@
+"""
+agents/classifier.py — Local tender / non-tender classifier
+Scores the opening text of a document on procurement markers (tender numbers,
+EMD, bid dates, GeM/CPPP references) against the non-tender keyword hints, so
+only documents in the uncertain band need the LLM validator.
+"""
+
+import os
+import re
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CLASSIFIER_CHARS = int(os.getenv("CLASSIFIER_CHARS", "6000"))
+CLASSIFIER_ACCEPT_SCORE = float(os.getenv("CLASSIFIER_ACCEPT_SCORE", "6"))
+CLASSIFIER_REJECT_SCORE = float(os.getenv("CLASSIFIER_REJECT_SCORE", "1"))
+
+DOC_TYPE_HINTS = {
+    "resume": ["experience", "education", "skills", "cgpa", "intern", "bachelor", "engineer", "summary", "volunteer", "achievement"],
+    "invoice": ["invoice", "gst", "total amount", "payment due", "bill to", "tax invoice"],
+    "research paper": ["abstract", "introduction", "methodology", "conclusion", "references", "journal", "doi"],
+    "news article": ["published", "reporter", "journalist", "editor", "breaking news"],
+    "legal document": ["whereas", "hereinafter", "jurisdiction", "plaintiff", "defendant", "court"],
+    "financial report": ["balance sheet", "profit and loss", "quarterly", "revenue", "ebitda", "shareholders"],
+}
+
+# Hint words that ordinary tenders use too ("years of experience", "hereinafter referred to as",
+# audited balance sheets, abstract of cost) or that match inside common words ("intern"al, "doi"ng);
+# they still name the document type but never count as a penalty
+TENDER_VOCABULARY = {
+    "experience", "education", "skills", "intern", "bachelor", "engineer", "summary",
+    "invoice", "gst", "total amount", "payment due", "bill to",
+    "abstract", "introduction", "methodology", "conclusion", "references", "doi",
+    "published", "editor",
+    "whereas", "hereinafter", "jurisdiction", "court",
+    "balance sheet", "profit and loss", "quarterly", "revenue",
+}
+PENALTY_HINTS = {doc_type: [kw for kw in kws if kw not in TENDER_VOCABULARY] for doc_type, kws in DOC_TYPE_HINTS.items()}
+
+# (name, weight, pattern) — each signal counts once, however often it appears
+TENDER_SIGNALS = [
+    ("tender_number", 3, r"\b(?:tender|nit|rfp|bid|e-?tender|enquiry)\s*(?:no|number|id|ref)\b\.?\s*[:\-]?\s*[a-z0-9][a-z0-9/\-_.()]{3,}"),
+    ("gem_bid_id", 3, r"\bgem/\d{4}/b/\d+"),
+    ("notice_inviting", 2, r"notice inviting (?:e-?)?tender|\bnit\b|request for proposal|invitation for bids?|\brfp\b|expression of interest"),
+    ("emd", 2, r"earnest money|\bemd\b|bid security"),
+    ("bid_dates", 2, r"bid submission|last date (?:of|for) (?:submission|receipt)|bid due date|closing date|bid opening|tender opening"),
+    ("portal", 2, r"\bcppp\b|eprocure\.gov\.in|gem\.gov\.in|central public procurement|government e-?marketplace|e-?procurement"),
+    ("bid_parts", 1, r"technical bid|financial bid|price bid|commercial bid|\bboq\b|bill of quantities"),
+    ("pre_bid", 1, r"pre-?bid"),
+    ("performance_security", 1, r"performance (?:security|guarantee|bank guarantee)"),
+    ("eligibility", 1, r"eligibility criteria|qualification criteria|pre-?qualification"),
+    ("scope", 1, r"scope of work|terms of reference"),
+    ("tender_fee", 1, r"tender (?:fee|document fee|processing fee)|cost of (?:tender|bid) document"),
+]
+_COMPILED = [(name, weight, re.compile(pattern)) for name, weight, pattern in TENDER_SIGNALS]
+
+
+def detect_doc_type(text: str) -> str:
+    text_lower = text.lower()
+    for doc_type, keywords in DOC_TYPE_HINTS.items():
+        matches = sum(1 for kw in keywords if kw in text_lower)
+        if matches >= 2:
+            return doc_type
+    return "non-tender document"
+
+
+def tender_score(text: str) -> dict:
+    """
+    Score the first CLASSIFIER_CHARS of `text`: tender signal weights, minus one
+    per non-tender hint beyond the first for the best-matching other document type
+    (PENALTY_HINTS — words that ordinary tenders use as well are left out).
+    """
+    head = text[:CLASSIFIER_CHARS].lower()
+    signals = [name for name, _, pattern in _COMPILED if pattern.search(head)]
+    positive = sum(weight for name, weight, _ in _COMPILED if name in signals)
+    hint_matches = max((sum(1 for kw in kws if kw in head) for kws in PENALTY_HINTS.values()), default=0)
+    penalty = max(0, hint_matches - 1)
+    return {"score": positive - penalty, "signals": signals, "penalty": penalty}
+
+
+def classify(text: str) -> dict:
+    """
+    {"decision": "tender" | "not_tender" | "uncertain", "score", "signals", "penalty"}.
+    Only "uncertain" needs a second opinion from the LLM validator.
+    """
+    result = tender_score(text)
+    if result["score"] >= CLASSIFIER_ACCEPT_SCORE:
+        result["decision"] = "tender"
+    elif result["score"] <= CLASSIFIER_REJECT_SCORE:
+        result["decision"] = "not_tender"
+    else:
+        result["decision"] = "uncertain"
+    return result
@@ -0,0 +1,180 @@
+"""
+agents/context.py — Context projection for downstream agent prompts
+Selects only the upstream fields each agent needs, serializes them as compact
+JSON and enforces a per-agent token budget by shortening, then dropping, the
+lowest-priority fields first.
+"""
+
+import os
+import json
+import hashlib
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CHARS_PER_TOKEN = 4
+CONTEXT_BUDGETS = {
+    "market": int(os.getenv("CONTEXT_TOKENS_MARKET", "1500")),
+    "strategy": int(os.getenv("CONTEXT_TOKENS_STRATEGY", "2500")),
+}
+MAX_STRING_CHARS = 300
+MAX_LIST_ITEMS = 6
+
+
+def _gaps(criteria: list) -> list:
+    """Criteria the company does not clearly meet, without the verbose capability text."""
+    if not isinstance(criteria, list):
+        return criteria
+    return [
+        {"criterion": c.get("criterion"), "meets": c.get("meets_requirement"), "gap": c.get("gap")}
+        for c in criteria if isinstance(c, dict) and c.get("meets_requirement") is not True
+    ]
+
+
+def _top_risks(assessment: dict) -> dict:
+    if not isinstance(assessment, dict):
+        return assessment
+    risks = sorted(
+        (r for r in assessment.get("risks") or [] if isinstance(r, dict)),
+        key=lambda r: {"HIGH": 0, "MEDIUM": 1, "LOW": 2}.get(str(r.get("severity", "")).upper(), 3),
+    )
+    return {
+        "overall_risk_score": assessment.get("overall_risk_score"),
+        "risks": [{k: r.get(k) for k in ("risk_type", "severity", "mitigation")} for r in risks],
+    }
+
+
+# agent -> section -> [(field, priority, shaper)]; priority 1 is never dropped
+PROJECTIONS = {
+    "market": {
+        "tender": [
+            ("tender_title", 1, None),
+            ("issuing_authority", 1, None),
+            ("estimated_value_inr", 1, None),
+            ("scope_of_work", 2, None),
+            ("evaluation_criteria", 2, None),
+            ("submission_deadline", 3, None),
+            ("technical_requirements", 3, None),
+            ("financial_requirements", 3, None),
+            ("special_conditions", 4, None),
+        ],
+        "eligibility": [
+            ("overall_eligible", 1, None),
+            ("eligibility_score", 1, None),
+            ("recommendation", 1, None),
+            ("disqualifiers", 2, None),
+            ("criteria_analysis", 3, _gaps),
+            ("conditions", 4, None),
+        ],
+        "history": [
+            ("comparables", 1, None),
+            ("category", 1, None),
+            ("value_percentiles_inr", 1, None),
+            ("award_to_estimate_ratio", 1, None),
+            ("comparable_scope", 2, None),
+            ("estimate_percentile", 2, None),
+            ("awards_reported", 2, None),
+            ("win_rate", 2, None),
+            ("authority", 2, None),
+            ("top_authorities", 3, None),
+            ("similar_tenders", 3, None),
+        ],
+    },
+    "strategy": {
+        "tender": [
+            ("tender_title", 1, None),
+            ("tender_number", 1, None),
+            ("issuing_authority", 1, None),
+            ("estimated_value_inr", 1, None),
+            ("submission_deadline", 1, None),
+            ("evaluation_criteria", 2, None),
+            ("financial_requirements", 2, None),
+            ("key_dates", 3, None),
+            ("scope_of_work", 3, None),
+            ("special_conditions", 3, None),
+            ("technical_requirements", 4, None),
+        ],
+        "eligibility": [
+            ("overall_eligible", 1, None),
+            ("eligibility_score", 1, None),
+            ("recommendation", 1, None),
+            ("disqualifiers", 1, None),
+            ("criteria_analysis", 2, _gaps),
+            ("conditions", 2, None),
+            ("strengths", 3, None),
+        ],
+        "market": [
+            ("win_probability", 1, None),
+            ("pricing_intelligence", 1, None),
+            ("opportunity_score", 2, None),
+            ("risk_assessment", 2, _top_risks),
+            ("market_analysis", 3, None),
+            ("key_insights", 3, None),
+        ],
+    },
+}
+
+
+def compact(value) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _shorten(value, max_chars: int, max_items: int):
+    if isinstance(value, str):
+        return value if len(value) <= max_chars else value[:max_chars].rstrip() + "…"
+    if isinstance(value, list):
+        return [_shorten(v, max_chars, max_items) for v in value[:max_items]]
+    if isinstance(value, dict):
+        return {k: _shorten(v, max_chars, max_items) for k, v in value.items()}
+    return value
+
+
+def _size(sections: dict) -> int:
+    return sum(len(compact(fields)) for fields in sections.values())
+
+
+def project_context(agent_name: str, budget_tokens: int = None, **sources) -> dict:
+    """
+    Compact JSON per section for `agent_name`'s prompt, e.g.
+    project_context("strategy", tender=..., eligibility=..., market=...) -> {"tender": "{...}", ...}.
+    Over budget, long strings and lists are clipped, then the lowest-priority
+    fields (latest first) are dropped until the context fits.
+    """
+    budget_chars = (budget_tokens or CONTEXT_BUDGETS.get(agent_name, 2000)) * CHARS_PER_TOKEN
+    spec = PROJECTIONS[agent_name]
+
+    sections = {}
+    for section, fields in spec.items():
+        source = sources.get(section) or {}
+        sections[section] = {}
+        for key, _, shaper in fields:
+            value = source.get(key)
+            if shaper and value is not None:
+                value = shaper(value)
+            if value not in (None, "", [], {}):
+                sections[section][key] = value
+
+    if _size(sections) > budget_chars:
+        sections = {s: _shorten(f, MAX_STRING_CHARS, MAX_LIST_ITEMS) for s, f in sections.items()}
+
+    droppable = sorted(
+        ((priority, order, section, key) for section, fields in spec.items()
+         for order, (key, priority, _) in enumerate(fields) if priority > 1),
+        reverse=True,
+    )
+    for _, _, section, key in droppable:
+        if _size(sections) <= budget_chars:
+            break
+        sections[section].pop(key, None)
+
+    if _size(sections) > budget_chars:
+        # Only must-keep fields remain — clip them hard rather than blow the budget
+        sections = {s: _shorten(f, MAX_STRING_CHARS // 3, MAX_LIST_ITEMS // 2) for s, f in sections.items()}
+
+    return {section: compact(fields) for section, fields in sections.items()}
+
+
+def context_fingerprint(agent_name: str, **sources) -> str:
+    """Hash of exactly what project_context puts in the prompt, used as the stage's cache key."""
+    projected = project_context(agent_name, **sources)
+    return hashlib.sha256(compact(projected).encode("utf-8")).hexdigest()
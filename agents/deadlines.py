@@ -0,0 +1,74 @@
+"""
+agents/deadlines.py — Submission deadline parsing
+Finds the bid submission deadline in tender text (a cheap sniff of the first
+pages before extraction) and parses the extractor's free-form
+`submission_deadline`, for deadline-ordered scheduling.
+"""
+
+import re
+from datetime import datetime
+from typing import Optional
+
+MONTHS = {m: i + 1 for i, m in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+)}
+
+# dd-mm-yyyy / dd/mm/yyyy / dd.mm.yyyy (Indian order), yyyy-mm-dd, 15 Dec 2026, Dec 15, 2026
+_NUMERIC = r"(\d{1,2})[-/.](\d{1,2})[-/.](\d{4})"
+_ISO = r"(\d{4})-(\d{1,2})-(\d{1,2})"
+_DAY_MONTH = r"(\d{1,2})(?:st|nd|rd|th)?[\s\-]+([a-z]{3,9})\.?,?[\s\-]+(\d{4})"
+_MONTH_DAY = r"([a-z]{3,9})\.?\s+(\d{1,2})(?:st|nd|rd|th)?,?\s+(\d{4})"
+_TIME = r"(?:\s*(?:at\s+)?(\d{1,2}):(\d{2})\s*(am|pm|hrs|hours)?)?"
+DATE_PATTERN = re.compile(rf"(?:{_ISO}|{_NUMERIC}|{_DAY_MONTH}|{_MONTH_DAY}){_TIME}", re.IGNORECASE)
+
+# Labels that introduce the submission deadline (not opening, pre-bid or publish dates)
+DEADLINE_LABELS = re.compile(
+    r"bid\s+(?:submission\s+)?end\s+date|(?:bid|tender)\s+submission\s+(?:end\s+|closing\s+)?(?:date|deadline)"
+    r"|last\s+date\s+(?:and\s+time\s+)?(?:of|for)\s+(?:online\s+)?(?:submission|receipt)|submission\s+deadline"
+    r"|bid\s+due\s+date|closing\s+date|due\s+date\s+(?:of|for)\s+submission",
+    re.IGNORECASE,
+)
+LABEL_WINDOW = 120
+
+
+def _to_datetime(match) -> Optional[datetime]:
+    g = match.groups()
+    try:
+        if g[0]:
+            year, month, day = int(g[0]), int(g[1]), int(g[2])
+        elif g[3]:
+            day, month, year = int(g[3]), int(g[4]), int(g[5])
+        elif g[6]:
+            day, month, year = int(g[6]), MONTHS.get(g[7][:3].lower()), int(g[8])
+        else:
+            month, day, year = MONTHS.get(g[9][:3].lower()), int(g[10]), int(g[11])
+        hour, minute = (int(g[12]), int(g[13])) if g[12] else (23, 59)
+        if g[14] and g[14].lower() == "pm" and hour < 12:
+            hour += 12
+        return datetime(year, month, day, hour, minute)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_deadline(value) -> Optional[datetime]:
+    """First parsable date in `value` (e.g. the extractor's "15-12-2026 15:00 IST"), or None."""
+    if not isinstance(value, str):
+        return None
+    for match in DATE_PATTERN.finditer(value):
+        parsed = _to_datetime(match)
+        if parsed:
+            return parsed
+    return None
+
+
+def sniff_deadline(text: str) -> Optional[datetime]:
+    """
+    Submission deadline from raw tender text: the first date within LABEL_WINDOW
+    characters after a deadline label. Unlabelled dates are ignored — a wrong
+    guess would reorder the queue, a miss only leaves the job at default priority.
+    """
+    for label in DEADLINE_LABELS.finditer(text):
+        parsed = parse_deadline(text[label.end():label.end() + LABEL_WINDOW])
+        if parsed:
+            return parsed
+    return None
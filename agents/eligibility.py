@@ -1,49 +1,55 @@
 """
 agents/eligibility.py — Agent 2: Eligibility Checker
-Uses Strands Agent with Gemini.
+Uses Strands Agent with Gemini via the shared client in agents/llm.py.
 """
 
-import os
 import json
 import re
-from strands import Agent
-from strands.models.litellm import LiteLLMModel
 from dotenv import load_dotenv
+from .llm import complete
+from .rules import evaluate, rules_only_report
 
 load_dotenv()
 
 
-def get_model():
-    return LiteLLMModel(
-        model_id="gemini/gemini-2.5-flash",
-        params={
-            "api_key": os.getenv("GOOGLE_API_KEY"),
-            "temperature": 0.1,
-        }
-    )
-
-
 SYSTEM_PROMPT = """You are a procurement eligibility expert for Indian government tenders.
 Evaluate company eligibility against tender requirements precisely and objectively.
 Always respond with valid JSON only."""
 
 
-def run_eligibility_check(extracted_requirements: dict, company_profile: dict) -> dict:
+# The only extraction fields the rules and the eligibility prompt read; they also fingerprint this stage
+ELIGIBILITY_FIELDS = [
+    "tender_title", "estimated_value_inr", "eligibility_criteria",
+    "technical_requirements", "scope_of_work", "special_conditions",
+]
+
+
+def eligibility_inputs(extracted_requirements: dict) -> dict:
+    return {k: extracted_requirements[k] for k in ELIGIBILITY_FIELDS if k in extracted_requirements}
+
+
+def run_eligibility_check(extracted_requirements: dict, company_profile: dict, on_field=None) -> dict:
     """Agent 2: Check company eligibility against tender requirements."""
 
-    agent = Agent(
-        model=get_model(),
-        system_prompt=SYSTEM_PROMPT,
-    )
+    # --- DETERMINISTIC RULES: decide numeric/set criteria locally ---
+    verdict = evaluate(extracted_requirements, company_profile)
+    if verdict["disqualifiers"] or not verdict["ambiguous"]:
+        # Hard disqualifier, or nothing left for the model to judge — skip the LLM call
+        return rules_only_report(verdict)
 
     prompt = f"""Evaluate if this company is eligible for this tender.
 
 TENDER REQUIREMENTS:
-{json.dumps(extracted_requirements, indent=2)}
+{json.dumps(eligibility_inputs(extracted_requirements), indent=2)}
 
 COMPANY PROFILE:
 {json.dumps(company_profile, indent=2)}
 
+ALREADY VERIFIED (deterministic checks, do not re-evaluate or repeat these):
+{json.dumps(verdict["decided"], indent=2)}
+
+Evaluate ONLY these remaining criteria: {", ".join(verdict["ambiguous"])}
+
 Return a JSON object:
 {{
   "overall_eligible": true/false,
@@ -66,13 +72,15 @@ Return a JSON object:
 
 Return ONLY valid JSON."""
 
-    result = agent(prompt)
-    response_text = str(result)
+    response_text = complete("eligibility", SYSTEM_PROMPT, prompt, on_field=on_field)
 
     json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
     if json_match:
         try:
-            return json.loads(json_match.group())
+            report = json.loads(json_match.group())
+            report["criteria_analysis"] = verdict["decided"] + report.get("criteria_analysis", [])
+            report["strengths"] = [c["criterion"] for c in verdict["decided"]] + report.get("strengths", [])
+            return report
         except json.JSONDecodeError:
             pass
 
@@ -1,28 +1,32 @@
 """
 agents/extractor.py — Agent 1: Tender Requirements Extractor
-Uses Strands Agent with Gemini for extraction.
+Uses Strands Agent with Gemini for extraction, via the shared client in agents/llm.py.
+Long tenders are extracted map-reduce style: one call per section group, run
+concurrently, merged back into the single-call schema.
 """
 
 import os
 import json
 import re
-from strands import Agent
-from strands.models.litellm import LiteLLMModel
-from rag.ingest import load_vectorstore
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from rag.ingest import load_vectorstore, load_pages
+from rag.chunking import split_sections
+from rag.retriever import build_context, tokenize, FIELD_QUERIES
+from .llm import complete
+from .classifier import classify, detect_doc_type
+from core.metrics import CLASSIFIER_DECISIONS
 from dotenv import load_dotenv
 
 load_dotenv()
 
-
-def get_model():
-    return LiteLLMModel(
-        model_id="gemini/gemini-2.5-flash",
-        params={
-            "api_key": os.getenv("GOOGLE_API_KEY"),
-            "temperature": 0.1,
-        }
-    )
-
+# single: one call over the retrieval context; sections: map-reduce over section groups;
+# auto: sections once the document is longer than EXTRACTION_MAP_MIN_CHARS
+EXTRACTION_MODE = os.getenv("EXTRACTION_MODE", "auto").lower()
+EXTRACTION_MAP_MIN_CHARS = int(os.getenv("EXTRACTION_MAP_MIN_CHARS", "24000"))
+EXTRACTION_SECTION_CHARS = int(os.getenv("EXTRACTION_SECTION_CHARS", "8000"))
+EXTRACTION_MAX_CALLS_PER_GROUP = int(os.getenv("EXTRACTION_MAX_CALLS_PER_GROUP", "3"))
+EXTRACTION_MAP_WORKERS = int(os.getenv("EXTRACTION_MAP_WORKERS", "16"))
 
 SYSTEM_PROMPT = """You are a government tender analysis expert specializing in Indian procurement.
 Your job is to extract structured information from tender documents accurately.
@@ -39,8 +43,15 @@ Reply with ONLY one word: YES or NO"""
 
 
 class NotATenderError(Exception):
-    """Raised when the uploaded document is not a tender."""
-    pass
+    """
+    Raised when the uploaded document is not a tender. `cacheable` is False when the
+    verdict rests on partial evidence or on the local classifier alone, so it isn't
+    served again from the result cache.
+    """
+
+    def __init__(self, message: str = "", cacheable: bool = True):
+        super().__init__(message)
+        self.cacheable = cacheable
 
 
 SARCASTIC_MESSAGES = [
@@ -51,60 +62,328 @@ SARCASTIC_MESSAGES = [
     "The agents are confused. They were expecting a government tender but got a {doc_type}. Close, but not quite what we need.",
 ]
 
-DOC_TYPE_HINTS = {
-    "resume": ["experience", "education", "skills", "cgpa", "intern", "bachelor", "engineer", "summary", "volunteer", "achievement"],
-    "invoice": ["invoice", "gst", "total amount", "payment due", "bill to", "tax invoice"],
-    "research paper": ["abstract", "introduction", "methodology", "conclusion", "references", "journal", "doi"],
-    "news article": ["published", "reporter", "journalist", "editor", "breaking news"],
-    "legal document": ["whereas", "hereinafter", "jurisdiction", "plaintiff", "defendant", "court"],
-    "financial report": ["balance sheet", "profit and loss", "quarterly", "revenue", "ebitda", "shareholders"],
+
+# Output schema, one entry per top-level key (rendered into the prompt)
+EXTRACTION_SCHEMA = {
+    "tender_title": '"..."',
+    "issuing_authority": '"..."',
+    "tender_number": '"..."',
+    "submission_deadline": '"..."',
+    "estimated_value_inr": '"..."',
+    "eligibility_criteria": """{
+    "min_turnover": "...",
+    "years_of_experience": "...",
+    "technical_qualifications": [],
+    "certifications_required": [],
+    "prior_experience": "..."
+  }""",
+    "scope_of_work": "[]",
+    "technical_requirements": "[]",
+    "financial_requirements": "[]",
+    "evaluation_criteria": "[]",
+    "key_dates": "{}",
+    "special_conditions": "[]",
+}
+
+# Which retrieval query (rag.retriever.FIELD_QUERIES) covers each schema key
+FIELD_SOURCES = {
+    "tender_title": "tender_details",
+    "issuing_authority": "tender_details",
+    "tender_number": "tender_details",
+    "submission_deadline": "key_dates",
+    "estimated_value_inr": "estimated_value",
+    "eligibility_criteria": "eligibility_criteria",
+    "scope_of_work": "scope_of_work",
+    "technical_requirements": "scope_of_work",
+    "financial_requirements": "financial_requirements",
+    "evaluation_criteria": "evaluation_criteria",
+    "key_dates": "key_dates",
+    "special_conditions": "special_conditions",
 }
 
+# Map-reduce extraction: each group's keys are extracted from the sections whose
+# heading matches its pattern. Groups with no matching section
+# fall back to retrieval over their field queries.
+SECTION_GROUPS = {
+    "dates": {
+        "keys": ["tender_title", "issuing_authority", "tender_number", "submission_deadline", "estimated_value_inr", "key_dates"],
+        "pattern": re.compile(r"notice\s+inviting|\bnit\b|invitation|tender\s+(details|schedule)|bid\s+data|"
+                              r"(important|key|critical)\s+dates|schedule\s+of\s+(dates|events)|time\s*-?\s*schedule", re.IGNORECASE),
+    },
+    "eligibility": {
+        "keys": ["eligibility_criteria"],
+        "pattern": re.compile(r"eligib|qualification|experience|turnover", re.IGNORECASE),
+    },
+    "scope": {
+        "keys": ["scope_of_work"],
+        "pattern": re.compile(r"scope|terms\s+of\s+reference|\btor\b|statement\s+of\s+work|deliverables|"
+                              r"bill\s+of\s+quantit|\bboq\b|work\s+description", re.IGNORECASE),
+    },
+    "technical": {
+        "keys": ["technical_requirements", "evaluation_criteria"],
+        "pattern": re.compile(r"technical|specification|evaluation|qcbs|marking|scoring|methodology", re.IGNORECASE),
+    },
+    "financial": {
+        "keys": ["financial_requirements", "special_conditions"],
+        "pattern": re.compile(r"financial|commercial|payment|\bemd\b|earnest|security|guarantee|penalt|"
+                              r"liquidated|special\s+conditions|conditions\s+of\s+contract|warranty", re.IGNORECASE),
+    },
+}
+
+FIELD_TOUCH_RATIO = 0.25
+
 
-def detect_doc_type(text: str) -> str:
-    text_lower = text.lower()
-    for doc_type, keywords in DOC_TYPE_HINTS.items():
-        matches = sum(1 for kw in keywords if kw in text_lower)
-        if matches >= 2:
-            return doc_type
-    return "non-tender document"
+def fields_touched(changed_text: str) -> list:
+    """Schema keys whose retrieval query overlaps the changed text enough to need re-extraction."""
+    changed = set(tokenize(changed_text))
+    touched = {
+        source for source, query in FIELD_QUERIES.items()
+        if len(changed & set(tokenize(query))) / max(1, len(set(tokenize(query)))) >= FIELD_TOUCH_RATIO
+    }
+    return [key for key, source in FIELD_SOURCES.items() if source in touched]
 
 
-def run_extractor(collection_name: str = "tender_docs") -> dict:
-    """Agent 1: Extract structured requirements from tender text."""
+def _schema(schema: dict) -> str:
+    return "{\n" + ",\n".join(f'  "{key}": {shape}' for key, shape in schema.items()) + "\n}"
+
+
+GUARDRAIL_FIELDS = ["tender_number", "estimated_value_inr", "submission_deadline", "issuing_authority"]
+NA_VALUES = ["N/A", "NA", "NONE", "NOT FOUND", "NOT SPECIFIED", "NULL", ""]
+
+
+def _na_count(fields: dict) -> int:
+    """How many guardrail fields are missing or N/A."""
+    return sum(1 for key in GUARDRAIL_FIELDS if key in fields and (
+        not fields[key] or (isinstance(fields[key], str) and fields[key].strip().upper() in NA_VALUES)
+    ))
+
+
+def _not_a_tender(context: str, cacheable: bool = True) -> NotATenderError:
+    doc_type = detect_doc_type(context)
+    import random
+    return NotATenderError(random.choice(SARCASTIC_MESSAGES).format(doc_type=doc_type), cacheable=cacheable)
+
+
+def _parse_json(response_text: str):
+    json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
+    if json_match:
+        try:
+            return json.loads(json_match.group())
+        except json.JSONDecodeError:
+            pass
+    return None
+
+
+def use_sections(text: str) -> bool:
+    """Whether run_extractor takes the map-reduce path for a document of this text."""
+    if EXTRACTION_MODE == "sections":
+        return True
+    return EXTRACTION_MODE == "auto" and len(text) > EXTRACTION_MAP_MIN_CHARS
+
+
+def _pack(sections: list, budget: int) -> list:
+    """Section texts packed in document order into parts of at most ~`budget` chars."""
+    parts, current = [], ""
+    for section in sections:
+        text = section["text"]
+        label = f"[Pages {section['start_page']}-{section['end_page']} | {section['heading']}]\n"
+        while text:
+            room = budget - len(current) - len(label)
+            if room <= 200 and current:
+                parts.append(current)
+                current = ""
+                continue
+            room = max(room, 200)
+            piece, text = text[:room], text[room:]
+            if text:
+                # Break at a line so a clause isn't cut in half
+                cut = piece.rfind("\n")
+                if cut > room // 2:
+                    piece, text = piece[:cut], piece[cut + 1:] + text
+            current += label + piece + "\n\n"
+            label = f"[{section['heading']}, continued]\n"
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _most_relevant(parts: list, keys: list, limit: int) -> list:
+    """The `limit` parts with the most hits on the keys' retrieval terms, kept in document order."""
+    if len(parts) <= limit:
+        return parts
+    terms = {t for k in keys for t in tokenize(FIELD_QUERIES[FIELD_SOURCES[k]])}
+
+    hits = [sum(1 for t in tokenize(part) if t in terms) for part in parts]
+    keep = sorted(sorted(range(len(parts)), key=lambda i: -hits[i])[:limit])
+    return [parts[i] for i in keep]
+
+
+def section_plan(collection_name: str) -> list:
+    """
+    Map step: [(group, part_text)] for every extraction call, in group order then
+    document order. Sections may feed several groups; the title page always feeds "dates".
+    """
+    sections = split_sections(load_pages(collection_name))
+    plan = []
+    for group, spec in SECTION_GROUPS.items():
+        matched = [s for s in sections if spec["pattern"].search(s["heading"])]
+        if group == "dates" and sections and sections[0] not in matched:
+            matched.insert(0, sections[0])
+        if matched:
+            parts = _pack(matched, EXTRACTION_SECTION_CHARS)
+            if len(parts) > EXTRACTION_MAX_CALLS_PER_GROUP:
+                print(f"[Extractor] {collection_name}: {group} sections span {len(parts)} parts, "
+                      f"extracting the {EXTRACTION_MAX_CALLS_PER_GROUP} most relevant")
+                parts = _most_relevant(parts, spec["keys"], EXTRACTION_MAX_CALLS_PER_GROUP)
+        else:
+            queries = {FIELD_SOURCES[k]: FIELD_QUERIES[FIELD_SOURCES[k]] for k in spec["keys"]}
+            parts = [build_context(collection_name, fields=queries, budget_chars=EXTRACTION_SECTION_CHARS, lead_chunks=0)]
+        plan += [(group, part) for part in parts if part.strip()]
+    return plan
+
+
+def _is_na(value) -> bool:
+    return not value or (isinstance(value, str) and value.strip().upper() in NA_VALUES)
+
+
+def _merge_value(current, value):
+    """Lists concatenate (deduplicated, order kept), dicts merge per key, scalars keep the first real value."""
+    if _is_na(current):
+        return value
+    if _is_na(value):
+        return current
+    if isinstance(current, list) and isinstance(value, list):
+        seen = {json.dumps(item, sort_keys=True) for item in current}
+        merged = list(current)
+        for item in value:
+            marker = json.dumps(item, sort_keys=True)
+            if marker not in seen:
+                seen.add(marker)
+                merged.append(item)
+        return merged
+    if isinstance(current, dict) and isinstance(value, dict):
+        merged = dict(current)
+        for key, item in value.items():
+            merged[key] = _merge_value(merged.get(key), item)
+        return merged
+    return current
+
+
+def merge_sections(results: list) -> dict:
+    """
+    Reduce step: fold the per-part replies, in plan order, into one extraction. Each
+    group only contributes its own keys, so the result doesn't depend on which call finished first.
+    """
+    extracted = {}
+    for group, fields in results:
+        for key in SECTION_GROUPS[group]["keys"]:
+            if key in fields:
+                extracted[key] = _merge_value(extracted.get(key), fields[key])
+    return {key: extracted[key] for key in EXTRACTION_SCHEMA if key in extracted}
+
+
+def _extract_part(group: str, text: str) -> dict:
+    keys = SECTION_GROUPS[group]["keys"]
+    prompt = f"""Extract the listed keys from these sections of a tender document and return as JSON.
+Use "N/A" (or an empty list/object) for anything these sections don't state.
+
+TENDER SECTIONS:
+{text}
+
+Return a JSON object with exactly these keys:
+{_schema({k: EXTRACTION_SCHEMA[k] for k in keys})}
+
+Return ONLY valid JSON, no extra text."""
+    fields = _parse_json(complete("extractor", SYSTEM_PROMPT, prompt))
+    if not isinstance(fields, dict):
+        raise ValueError("reply was not a JSON object")
+    return fields
+
+
+def run_section_extractor(collection_name: str, on_field=None) -> dict:
+    """
+    Map-reduce extraction over the whole document: one call per planned part, run
+    concurrently (the shared rate limiter in agents/llm.py still paces them), merged
+    with merge_sections. on_field sees each key once the merge is done. Groups with a
+    failed part are listed under "failed_sections", which keeps the merge out of the
+    result cache and off the done checkpoints.
+    """
+    plan = section_plan(collection_name)
+    context = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=max(1, min(EXTRACTION_MAP_WORKERS, len(plan)))) as pool:
+        # Each worker runs in a copy of the caller's context, so the calls land on this job's timings
+        futures = [pool.submit(context.copy().run, _extract_part, group, text) for group, text in plan]
+        results, failed = [], []
+        for (group, _), future in zip(plan, futures):
+            try:
+                results.append((group, future.result()))
+            except Exception as e:
+                failed.append(group)
+                print(f"[Extractor] {collection_name}: {group} section extraction failed: {e}")
+    if not results and plan:
+        raise RuntimeError("every section extraction call failed")
+    extracted = merge_sections(results)
+    print(f"[Extractor] {collection_name}: {len(plan)} section calls over {', '.join(dict.fromkeys(g for g, _ in plan))}")
+    if failed:
+        extracted["failed_sections"] = list(dict.fromkeys(failed))
+    if on_field:
+        for key, value in extracted.items():
+            on_field(key, value)
+    return extracted
+
+
+def run_extractor(collection_name: str = "tender_docs", on_field=None) -> dict:
+    """
+    Agent 1: Extract structured requirements from tender text.
+    on_field(key, value) is called as each top-level field streams in; the call is
+    cancelled as soon as the guardrail fields show this is not a tender.
+    """
     context = load_vectorstore(collection_name)
 
     if not context:
         return {"error": "No tender text found. Please upload a valid PDF."}
 
-    context_truncated = context[:8000]
-
     # --- GUARDRAIL: Validate this is actually a tender ---
-    try:
-        validator = Agent(
-            model=get_model(),
-            system_prompt="You are a document classifier. Reply with only YES or NO.",
-        )
-        validation_result = str(validator(VALIDATION_PROMPT.format(context=context_truncated[:3000]))).strip().upper()
-
-        if "NO" in validation_result and "YES" not in validation_result:
-            doc_type = detect_doc_type(context)
-            import random
-            message = random.choice(SARCASTIC_MESSAGES).format(doc_type=doc_type)
-            raise NotATenderError(message)
-    except NotATenderError:
-        raise
-    except Exception as e:
-        if "NotATenderError" in str(type(e)):
+    # Local classifier first; the LLM validator only sees the uncertain band
+    verdict = classify(context)
+    CLASSIFIER_DECISIONS.inc(decision=verdict["decision"])
+    print(f"[Guardrail] {collection_name}: {verdict['decision']} (score {verdict['score']}, signals {verdict['signals']})")
+    if verdict["decision"] == "not_tender":
+        # Heuristic only: cheap to repeat, and a retuned classifier should get to see the document again
+        raise _not_a_tender(context, cacheable=False)
+    if verdict["decision"] == "uncertain":
+        try:
+            validation_result = complete(
+                "validator",
+                "You are a document classifier. Reply with only YES or NO.",
+                VALIDATION_PROMPT.format(context=context[:3000]),
+            ).strip().upper()
+
+            if "NO" in validation_result and "YES" not in validation_result:
+                raise _not_a_tender(context)
+        except NotATenderError:
             raise
-        # If validation itself fails, proceed anyway
-        pass
+        except Exception as e:
+            if "NotATenderError" in str(type(e)):
+                raise
+            # If validation itself fails, proceed anyway
+            pass
 
     # --- MAIN EXTRACTION ---
-    agent = Agent(
-        model=get_model(),
-        system_prompt=SYSTEM_PROMPT,
-    )
+    if use_sections(context):
+        extracted = run_section_extractor(collection_name, on_field=on_field)
+        failed = extracted.get("failed_sections") or []
+        # A failed "dates" call leaves the guardrail fields empty; that says nothing about the document
+        if "dates" not in failed and _na_count({key: extracted.get(key) for key in GUARDRAIL_FIELDS}) >= 3:
+            raise _not_a_tender(context, cacheable=not failed)
+        return extracted
+
+    # Title page + the chunks most relevant to each schema field, instead of a blind prefix
+    context_truncated = build_context(collection_name, budget_chars=8000)
+
+    # Secondary guardrail, checked while streaming: stop once 3 of the 4 key fields closed as N/A
+    def stop_when(fields):
+        return _not_a_tender(context) if _na_count(fields) >= 3 else None
 
     prompt = f"""Extract all key requirements from this tender document and return as JSON.
 
@@ -112,31 +391,11 @@ TENDER DOCUMENT:
 {context_truncated}
 
 Return a JSON object with these exact keys:
-{{
-  "tender_title": "...",
-  "issuing_authority": "...",
-  "tender_number": "...",
-  "submission_deadline": "...",
-  "estimated_value_inr": "...",
-  "eligibility_criteria": {{
-    "min_turnover": "...",
-    "years_of_experience": "...",
-    "technical_qualifications": [],
-    "certifications_required": [],
-    "prior_experience": "..."
-  }},
-  "scope_of_work": [],
-  "technical_requirements": [],
-  "financial_requirements": [],
-  "evaluation_criteria": [],
-  "key_dates": {{}},
-  "special_conditions": []
-}}
+{_schema(EXTRACTION_SCHEMA)}
 
 Return ONLY valid JSON, no extra text."""
 
-    result = agent(prompt)
-    response_text = str(result)
+    response_text = complete("extractor", SYSTEM_PROMPT, prompt, on_field=on_field, stop_when=stop_when)
 
     json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
     if json_match:
@@ -144,18 +403,8 @@ Return ONLY valid JSON, no extra text."""
             extracted = json.loads(json_match.group())
 
             # Secondary guardrail: check if extracted data looks like a real tender
-            na_count = sum(1 for v in [
-                extracted.get("tender_number"),
-                extracted.get("estimated_value_inr"),
-                extracted.get("submission_deadline"),
-                extracted.get("issuing_authority")
-            ] if not v or v.strip().upper() in ["N/A", "NA", "NONE", "NOT FOUND", "NOT SPECIFIED", "NULL", ""])
-
-            if na_count >= 3:
-                doc_type = detect_doc_type(context)
-                import random
-                message = random.choice(SARCASTIC_MESSAGES).format(doc_type=doc_type)
-                raise NotATenderError(message)
+            if _na_count({key: extracted.get(key) for key in GUARDRAIL_FIELDS}) >= 3:
+                raise _not_a_tender(context)
 
             return extracted
         except json.JSONDecodeError:
@@ -164,3 +413,40 @@ Return ONLY valid JSON, no extra text."""
             raise
 
     return {"raw_extraction": response_text, "tender_title": "Extracted", "error": "JSON parse failed"}
+
+
+def run_partial_extractor(collection_name: str, fields: list, changed_text: str = "", on_field=None) -> dict:
+    """
+    Re-extract only `fields` (schema keys) of an already-validated tender, e.g. after a
+    corrigendum. The changed sections lead the context, followed by retrieval for those fields.
+    Returns only the requested keys; {} if the reply doesn't parse.
+    """
+    fields = [f for f in fields if f in EXTRACTION_SCHEMA]
+    if not fields:
+        return {}
+    queries = {FIELD_SOURCES[f]: FIELD_QUERIES[FIELD_SOURCES[f]] for f in fields}
+    changed_text = changed_text[:4000]
+    context = build_context(collection_name, fields=queries, budget_chars=max(2000, 8000 - len(changed_text)), lead_chunks=1)
+
+    prompt = f"""This tender was reissued with amendments. Extract ONLY the listed keys from the amended document and return as JSON.
+
+AMENDED SECTIONS:
+{changed_text}
+
+RELEVANT EXCERPTS:
+{context}
+
+Return a JSON object with exactly these keys:
+{_schema({f: EXTRACTION_SCHEMA[f] for f in fields})}
+
+Return ONLY valid JSON, no extra text."""
+
+    response_text = complete("extractor", SYSTEM_PROMPT, prompt, on_field=on_field)
+    json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
+    if json_match:
+        try:
+            extracted = json.loads(json_match.group())
+            return {k: v for k, v in extracted.items() if k in fields}
+        except json.JSONDecodeError:
+            pass
+    return {}
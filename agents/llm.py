@@ -0,0 +1,311 @@
+"""
+agents/llm.py — Shared LLM client layer for all agents
+One cached LiteLLMModel per (model, temperature), every agent invocation run on
+a single long-lived event loop so LiteLLM's async HTTP clients keep their
+connections alive, an RPM/TPM token bucket shared by every API and queue worker
+process (SQLite), and jittered retries on transient 429/5xx errors. Per-agent
+model/temperature come from env config.
+strands and litellm take seconds to import, so they load on the first call or
+in prewarm(), which the API runs in the background once it is serving.
+"""
+
+import os
+import sys
+import time
+import random
+import sqlite3
+import asyncio
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from dotenv import load_dotenv
+from core.metrics import record_llm_call
+from .streaming import field_publisher
+
+load_dotenv()
+
+LLM_MODEL_ID = os.getenv("LLM_MODEL_ID", "gemini/gemini-2.5-flash")
+LLM_RPM = float(os.getenv("LLM_RPM", "60"))
+LLM_TPM = float(os.getenv("LLM_TPM", "1000000"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "1"))
+LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", "30"))
+LLM_EST_OUTPUT_TOKENS = int(os.getenv("LLM_EST_OUTPUT_TOKENS", "1500"))
+# sqlite: one quota for every process on this data directory; memory: per process (single worker only)
+LLM_LIMITER = os.getenv("LLM_LIMITER", "sqlite")
+LLM_LIMITER_DB_PATH = os.getenv("LLM_LIMITER_DB_PATH", "./data/ratelimit.sqlite3")
+
+# Defaults per agent; override with LLM_<AGENT>_MODEL / LLM_<AGENT>_TEMPERATURE
+AGENT_DEFAULTS = {
+    "validator": {"temperature": 0.1},
+    "extractor": {"temperature": 0.1},
+    "eligibility": {"temperature": 0.1},
+    "market": {"temperature": 0.2},
+    "strategy": {"temperature": 0.2},
+}
+
+TRANSIENT_STATUS = {408, 429, 500, 502, 503, 504}
+TRANSIENT_NAMES = {"RateLimitError", "ServiceUnavailableError", "InternalServerError", "APIConnectionError", "Timeout", "BadGatewayError"}
+
+
+def agent_config(agent_name: str) -> dict:
+    prefix = f"LLM_{agent_name.upper()}_"
+    defaults = AGENT_DEFAULTS.get(agent_name, {"temperature": 0.1})
+    return {
+        "model_id": os.getenv(prefix + "MODEL", LLM_MODEL_ID),
+        "temperature": float(os.getenv(prefix + "TEMPERATURE", defaults["temperature"])),
+    }
+
+
+@lru_cache(maxsize=None)
+def _cached_model(model_id: str, temperature: float):
+    from strands.models.litellm import LiteLLMModel
+    return LiteLLMModel(
+        model_id=model_id,
+        params={
+            "api_key": os.getenv("LLM_API_KEY") or os.getenv("GOOGLE_API_KEY"),
+            "temperature": temperature,
+        }
+    )
+
+
+def get_model(agent_name: str = "extractor"):
+    """Shared model client for an agent (reused across calls)."""
+    config = agent_config(agent_name)
+    return _cached_model(config["model_id"], config["temperature"])
+
+
+class TokenBucket:
+    """Blocking token bucket refilled continuously at `rate_per_minute`."""
+
+    def __init__(self, rate_per_minute: float, clock=time.monotonic):
+        self.capacity = max(1.0, rate_per_minute)
+        self.rate = rate_per_minute / 60.0
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        with self.lock:
+            self._refill()
+            amount = min(amount, self.capacity)
+            return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        with self.lock:
+            self._refill()
+            self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, delta: float) -> None:
+        """Give back (delta > 0) or charge extra (delta < 0) once real usage is known."""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + delta)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute quota shared by every job in the process."""
+
+    def __init__(self, rpm: float = LLM_RPM, tpm: float = LLM_TPM):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self._lock = threading.Lock()
+
+    def _locked(self):
+        return self._lock
+
+    def acquire(self, est_tokens: int) -> float:
+        """Block until both buckets allow the call; returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self._locked():
+                delay = max(self.requests.wait_time(1), self.tokens.wait_time(est_tokens))
+                if delay <= 0:
+                    self.requests.take(1)
+                    self.tokens.take(est_tokens)
+                    return waited
+            time.sleep(min(delay, 5.0))
+            waited += min(delay, 5.0)
+
+    def settle(self, est_tokens: int, actual_tokens: int) -> None:
+        if actual_tokens:
+            with self._locked():
+                self.tokens.adjust(est_tokens - actual_tokens)
+
+
+class SQLiteRateLimiter(RateLimiter):
+    """
+    The same quota shared by every process using `path` (uvicorn workers, queue
+    workers): bucket levels live in SQLite and are read and written under its write lock.
+    """
+
+    def __init__(self, path: str = LLM_LIMITER_DB_PATH, rpm: float = LLM_RPM, tpm: float = LLM_TPM):
+        super().__init__(rpm, tpm)
+        # Wall clock, since the levels are compared across processes
+        self.requests = TokenBucket(rpm, clock=time.time)
+        self.tokens = TokenBucket(tpm, clock=time.time)
+        self.path = path
+        self._local = threading.local()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _locked(self):
+        buckets = {"requests": self.requests, "tokens": self.tokens}
+        with self._lock:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                stored = {row[0]: row[1:] for row in conn.execute("SELECT name, tokens, updated FROM buckets")}
+                for name, bucket in buckets.items():
+                    bucket.tokens, bucket.updated = stored.get(name, (bucket.capacity, time.time()))
+                yield
+                conn.executemany(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                    [(name, bucket.tokens, bucket.updated) for name, bucket in buckets.items()],
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+
+def make_limiter() -> RateLimiter:
+    if LLM_LIMITER == "memory":
+        return RateLimiter()
+    return SQLiteRateLimiter()
+
+
+limiter = make_limiter()
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """One background event loop for all model calls, so HTTP clients and their connections are reused."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-loop", daemon=True).start()
+        return _loop
+
+
+def is_transient(error: Exception) -> bool:
+    from strands.types.exceptions import ModelThrottledException
+    if isinstance(error, ModelThrottledException):
+        return True
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status in TRANSIENT_STATUS:
+        return True
+    return type(error).__name__ in TRANSIENT_NAMES
+
+
+def _backoff(attempt: int) -> float:
+    # Full jitter: uniform in [0, min(cap, base * 2^attempt)]
+    return random.uniform(0, min(LLM_RETRY_MAX_SECONDS, LLM_RETRY_BASE_SECONDS * (2 ** attempt)))
+
+
+def _usage(result) -> dict:
+    """Token usage reported by the model: {"inputTokens", "outputTokens", "totalTokens"}."""
+    try:
+        usage = result.metrics.accumulated_usage
+    except AttributeError:
+        return {}
+    return {k: int(usage.get(k, 0) or 0) for k in ("inputTokens", "outputTokens", "totalTokens")}
+
+
+def complete(agent_name: str, system_prompt: str, prompt: str, on_field=None, stop_when=None) -> str:
+    """
+    Run one agent turn and return the reply text. Blocks on the shared rate limit,
+    retries transient errors with jittered backoff, and streams top-level JSON fields
+    to on_field / stop_when (see agents.streaming.field_publisher).
+    """
+    from strands import Agent
+    prompt_chars = len(system_prompt) + len(prompt)
+    est_tokens = prompt_chars // 4 + LLM_EST_OUTPUT_TOKENS
+    attempt = 0
+    waited = 0.0
+    t0 = time.perf_counter()
+    while True:
+        waited += limiter.acquire(est_tokens)
+        agent = Agent(
+            model=get_model(agent_name),
+            system_prompt=system_prompt,
+            callback_handler=field_publisher(on_field, stop_when),
+        )
+        try:
+            future = asyncio.run_coroutine_threadsafe(agent.invoke_async(prompt), _get_loop())
+            result = future.result()
+        except Exception as e:
+            if attempt >= LLM_MAX_RETRIES or not is_transient(e):
+                record_llm_call(agent_name, time.perf_counter() - t0, waited, prompt_chars, 0, 0, attempt, ok=False)
+                raise
+            delay = _backoff(attempt)
+            attempt += 1
+            print(f"[LLM] {agent_name} transient error ({type(e).__name__}), retry {attempt}/{LLM_MAX_RETRIES} in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+        usage = _usage(result)
+        limiter.settle(est_tokens, usage.get("totalTokens", 0))
+        record_llm_call(
+            agent_name, time.perf_counter() - t0, waited, prompt_chars,
+            usage.get("inputTokens", 0), usage.get("outputTokens", 0), attempt,
+        )
+        return str(result)
+
+
+_prewarm = {}
+_prewarm_lock = threading.Lock()
+
+
+def prewarm() -> dict:
+    """
+    Import the LLM stack, build every agent's model client and start the shared event
+    loop, so the first job doesn't pay for them. Runs once; later calls return its outcome.
+    """
+    with _prewarm_lock:
+        if _prewarm:
+            return dict(_prewarm)
+        _prewarm["state"] = "warming"
+    t0 = time.perf_counter()
+    try:
+        for agent_name in AGENT_DEFAULTS:
+            get_model(agent_name)
+        _get_loop()
+    except Exception as e:
+        _prewarm.update(state="failed", error=str(e))
+        print(f"[LLM] Prewarm failed: {e}")
+    else:
+        _prewarm["state"] = "warm"
+    _prewarm["seconds"] = round(time.perf_counter() - t0, 3)
+    return dict(_prewarm)
+
+
+def warm_state() -> dict:
+    """
+    "warm" once the LLM stack is loaded (by prewarm() or a first call), "warming" while
+    prewarm() runs, else "cold" — the next LLM call will pay for the imports.
+    """
+    state = dict(_prewarm)
+    if state.get("state") != "warming":
+        state["state"] = "warm" if "strands.models.litellm" in sys.modules else state.get("state", "cold")
+    return state
@@ -1,26 +1,24 @@
 """
 agents/market.py — Agent 3: Market Intelligence
-Uses Strands Agent with Gemini.
+Uses Strands Agent with Gemini via the shared client in agents/llm.py, grounded
+in stats from the historical tender index (rag/history.py). With enough
+history the report can be built locally without an LLM call (MARKET_MODE).
 """
 
 import os
 import json
 import re
-from strands import Agent
-from strands.models.litellm import LiteLLMModel
 from dotenv import load_dotenv
+from .llm import complete
+from .context import project_context
+from .rules import parse_amount_cr, RUPEES_PER_CRORE
 
 load_dotenv()
 
-
-def get_model():
-    return LiteLLMModel(
-        model_id="gemini/gemini-2.5-flash",
-        params={
-            "api_key": os.getenv("GOOGLE_API_KEY"),
-            "temperature": 0.2,
-        }
-    )
+# llm: always ask the model; local: always build from history; auto: local once history is deep enough
+MARKET_MODE = os.getenv("MARKET_MODE", "auto")
+MARKET_LOCAL_MIN_COMPARABLES = int(os.getenv("MARKET_LOCAL_MIN_COMPARABLES", "20"))
+MARKET_LOCAL_MIN_AWARDS = int(os.getenv("MARKET_LOCAL_MIN_AWARDS", "10"))
 
 
 SYSTEM_PROMPT = """You are a market intelligence expert for Indian government procurement.
@@ -28,22 +26,112 @@ Analyze competitive landscape, pricing, and risks for government tenders.
 Always respond with valid JSON only."""
 
 
-def run_market_intelligence(extracted_requirements: dict, eligibility_report: dict) -> dict:
-    """Agent 3: Market intelligence and risk analysis."""
-
-    agent = Agent(
-        model=get_model(),
-        system_prompt=SYSTEM_PROMPT,
-    )
+def _inr(value: float) -> str:
+    if value >= RUPEES_PER_CRORE:
+        return f"₹{value / RUPEES_PER_CRORE:.2f} Cr"
+    return f"₹{value / 1e5:.2f} lakh"
+
+
+def use_local(history: dict) -> bool:
+    """Whether MARKET_MODE and the depth of `history` call for the local (no-LLM) report."""
+    if not history or MARKET_MODE == "llm":
+        return False
+    if MARKET_MODE == "local":
+        return bool(history.get("comparables"))
+    return (history.get("comparable_scope") == "category"
+            and history.get("comparables", 0) >= MARKET_LOCAL_MIN_COMPARABLES
+            and history.get("awards_reported", 0) >= MARKET_LOCAL_MIN_AWARDS)
+
+
+def local_market_report(extracted_requirements: dict, eligibility_report: dict, history: dict) -> dict:
+    """Market report from historical stats alone, in the same shape as the LLM's."""
+    crore = parse_amount_cr(extracted_requirements.get("estimated_value_inr"))
+    percentiles = history.get("value_percentiles_inr") or {}
+    estimate = crore * RUPEES_PER_CRORE if crore else percentiles.get("p50")
+    ratio = (history.get("award_to_estimate_ratio") or {}).get("p50")
+    authority = history.get("authority") or {}
+    eligible = bool(eligibility_report.get("overall_eligible"))
+    eligibility_score = float(eligibility_report.get("eligibility_score") or 0)
+
+    comparables = history.get("comparables", 0)
+    intensity = "HIGH" if comparables >= 100 else "MEDIUM" if comparables >= 20 else "LOW"
+    win_rate = authority.get("win_rate") if authority.get("win_rate") is not None else history.get("win_rate")
+    if not eligible:
+        win_probability = 5
+    elif win_rate is not None:
+        win_probability = round(100 * win_rate * (0.5 + eligibility_score / 200))
+    else:
+        win_probability = round(eligibility_score * 0.4)
+
+    risks = [{"risk_type": "Eligibility", "severity": "HIGH", "description": d, "mitigation": "Resolve before bidding or skip."}
+             for d in eligibility_report.get("disqualifiers") or []]
+    if history.get("estimate_percentile", 0) >= 90:
+        risks.append({"risk_type": "Scale", "severity": "MEDIUM",
+                      "description": f"Estimate is above {history['estimate_percentile']}% of comparable tenders.",
+                      "mitigation": "Check capacity and consortium options."})
+    if ratio is None:
+        risks.append({"risk_type": "Pricing", "severity": "LOW",
+                      "description": "No reported awards for this category yet; price is not grounded in past awards.",
+                      "mitigation": "Validate the price against recent GeM/CPPP award notices."})
+    weights = {"HIGH": 30, "MEDIUM": 15, "LOW": 5}
+    risk_score = min(100, 20 + sum(weights[r["severity"]] for r in risks))
+
+    insights = [f"{comparables} comparable past tenders ({history.get('comparable_scope')}: {history.get('category')})"]
+    if percentiles:
+        insights.append(f"Comparable estimates: median {_inr(percentiles['p50'])}, "
+                        f"middle half {_inr(percentiles['p25'])}–{_inr(percentiles['p75'])}")
+    if ratio is not None:
+        insights.append(f"Awards typically land at {ratio:.0%} of the estimate "
+                        f"({history['award_to_estimate_ratio']['p25']:.0%}–{history['award_to_estimate_ratio']['p75']:.0%})")
+    if authority.get("past_tenders"):
+        insights.append(f"{authority['past_tenders']} earlier tenders from this authority"
+                        + (f", win rate {authority['win_rate']:.0%}" if authority.get("win_rate") is not None else ""))
+
+    return {
+        "market_analysis": {
+            "competitive_intensity": intensity,
+            "typical_competitors": [],
+            "market_size_estimate": f"{comparables} comparable tenders" + (f", median {_inr(percentiles['p50'])}" if percentiles else ""),
+            "historical_bid_patterns": (f"Award/estimate ratio p25 {history['award_to_estimate_ratio']['p25']}, "
+                                        f"p50 {ratio}, p75 {history['award_to_estimate_ratio']['p75']} "
+                                        f"over {history.get('awards_reported')} reported awards") if ratio is not None else "No reported awards",
+        },
+        "pricing_intelligence": {
+            "estimated_market_rate_inr": _inr(estimate) if estimate else "N/A",
+            "recommended_bid_price_inr": _inr(estimate * ratio) if estimate and ratio else "N/A",
+            "pricing_strategy": ("Bid near the median award/estimate ratio of comparable tenders."
+                                 if ratio is not None else "Price at or just below the estimate until award history builds up."),
+            "margin_estimate_percent": round((1 - ratio) * 100, 1) if ratio is not None else 0,
+        },
+        "win_probability": win_probability,
+        "risk_assessment": {"overall_risk_score": risk_score, "risks": risks},
+        "opportunity_score": round(0.5 * eligibility_score + 0.5 * win_probability),
+        "key_insights": insights,
+        "decided_by": "history",
+    }
+
+
+def run_market_intelligence(extracted_requirements: dict, eligibility_report: dict, on_field=None, history: dict = None) -> dict:
+    """Agent 3: Market intelligence and risk analysis, grounded in `history` (TenderHistory.market_stats)."""
+
+    if use_local(history):
+        return local_market_report(extracted_requirements, eligibility_report, history)
+
+    # Only the fields pricing/competition analysis needs, compact and within budget
+    context = project_context("market", tender=extracted_requirements, eligibility=eligibility_report, history=history)
+    grounding = f"""
+HISTORICAL DATA (from our index of past tenders — base pricing and bid patterns on these figures, do not invent others):
+{context["history"]}
+""" if history and history.get("comparables") else ""
 
     prompt = f"""Analyze market intelligence for this government tender.
 
 TENDER DETAILS:
-{json.dumps(extracted_requirements, indent=2)}
+{context["tender"]}
 
 ELIGIBILITY STATUS:
-{json.dumps(eligibility_report, indent=2)}
-
+{context["eligibility"]}
+{grounding}
 Return a JSON object:
 {{
   "market_analysis": {{
@@ -76,8 +164,7 @@ Return a JSON object:
 
 Return ONLY valid JSON."""
 
-    result = agent(prompt)
-    response_text = str(result)
+    response_text = complete("market", SYSTEM_PROMPT, prompt, on_field=on_field)
 
     json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
     if json_match:
@@ -0,0 +1,273 @@
+"""
+agents/rules.py — Deterministic eligibility rules
+Decides the clear-cut numeric/set criteria (turnover, experience, certifications)
+locally so Agent 2 only has to reason about the ambiguous ones.
+"""
+
+import re
+from difflib import SequenceMatcher
+
+CRORE = 1.0
+LAKH = 0.01
+RUPEES_PER_CRORE = 1e7
+
+WORD_NUMBERS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "fifteen": 15, "twenty": 20,
+}
+
+_AMOUNT = re.compile(
+    r"(₹|rs\.?|inr|rupees)?\s*([0-9][0-9,]*(?:\.[0-9]+)?)\s*(crores?|cr\.?|lakhs?|lacs?|lakh|l\b|million|mn)?",
+    re.IGNORECASE,
+)
+_YEARS = re.compile(
+    r"([0-9]+(?:\.[0-9]+)?|" + "|".join(WORD_NUMBERS) + r")\s*(?:\(\s*\w+\s*\)\s*)?(?:-|to|–)?\s*"
+    r"(?:([0-9]+|" + "|".join(WORD_NUMBERS) + r")\s*)?(?:\+\s*)?years?",
+    re.IGNORECASE,
+)
+# "30% of the estimated cost", "2 times the estimated value": relative to something else, not an amount
+_RELATIVE = re.compile(r"%|\bper\s*cent|\btimes\b|\b\d+(?:\.\d+)?\s*x\b", re.IGNORECASE)
+_MIN_YEARS = re.compile(r"experience|\bminimum\b|\bmin\b|at\s+least|not\s+less\s+than", re.IGNORECASE)
+_WINDOW_YEARS = re.compile(r"\b(last|past|preceding|previous|during|within)\W*$", re.IGNORECASE)
+_BARE_YEARS = re.compile(r"^\W*\w+(?:\s*\(\s*\w+\s*\))?\s*\+?\s*years?\W*$", re.IGNORECASE)
+_STANDARD = re.compile(r"\b(iso|iec|is|bis)\s*[/:-]?\s*(\d{3,5})", re.IGNORECASE)
+_CMMI = re.compile(r"cmmi[^0-9]{0,12}(\d)", re.IGNORECASE)
+_MSE_EXEMPTION = re.compile(r"\b(ms(m)?e|startup|start-up)s?\b.{0,80}\bexempt", re.IGNORECASE | re.DOTALL)
+
+NOT_SPECIFIED = {"", "n/a", "na", "none", "nil", "not specified", "not found", "not mentioned", "null", "..."}
+
+
+def _is_blank(value) -> bool:
+    return value is None or (isinstance(value, str) and value.strip().lower() in NOT_SPECIFIED)
+
+
+def parse_amount_cr(text, strict: bool = False, rupees: bool = False) -> float:
+    """
+    Normalize an INR amount to crore: "₹5 Cr", "50 lakh", "Rs. 2,50,00,000", "INR 3.5 crores".
+    Returns None when no amount can be read. Leniently, bare rupee figures below 1000 are
+    treated as crore. With strict=True (eligibility rules), an amount counts only with an
+    explicit unit, or a currency mark on a full rupee figure; relative clauses ("30% of
+    the estimated cost", "2 times the estimated value") and unitless numbers give None.
+    rupees=True is for fields known to hold rupees (*_inr): bare figures count as marked.
+    """
+    if isinstance(text, bool):
+        return None
+    if isinstance(text, (int, float)):
+        if rupees:
+            return text / RUPEES_PER_CRORE if text >= 1000 else None
+        return None if strict else float(text)
+    if _is_blank(text):
+        return None
+    if strict and _RELATIVE.search(str(text)):
+        return None
+    amounts = []
+    for currency, number, unit in _AMOUNT.findall(str(text)):
+        currency = currency or rupees
+        try:
+            value = float(number.replace(",", ""))
+        except ValueError:
+            continue
+        unit = unit.lower().rstrip(".")
+        if unit.startswith("cr"):
+            value *= CRORE
+        elif unit.startswith(("lakh", "lac")) or unit == "l":
+            value *= LAKH
+        elif unit in ("million", "mn"):
+            value = value * 1e6 / RUPEES_PER_CRORE
+        elif strict and not currency:
+            continue
+        elif value >= 1000:
+            value /= RUPEES_PER_CRORE
+        elif strict:
+            # "₹ 500": rupees or crore? Not ours to guess
+            continue
+        elif not currency:
+            # Bare small number ("last 3 years") — only used if nothing better is found
+            amounts.append((False, value * CRORE))
+            continue
+        if value > 0:
+            amounts.append((True, value))
+    # "Rs 5 crore (average of last 3 years)" — the first marked amount is the requirement
+    marked = [v for explicit, v in amounts if explicit]
+    if marked:
+        return marked[0]
+    return amounts[0][1] if amounts else None
+
+
+def _word_or_number(token: str) -> float:
+    token = token.lower()
+    return float(WORD_NUMBERS[token]) if token in WORD_NUMBERS else float(token)
+
+
+def parse_years(text) -> float:
+    """
+    Minimum years required: "5 years", "at least five (5) years experience", "minimum 3-5 years" -> 3.
+    None unless the clause is a bare duration or names experience / a minimum, and never
+    from a look-back window ("similar works completed during last 7 years").
+    """
+    if isinstance(text, (int, float)):
+        return float(text)
+    if _is_blank(text):
+        return None
+    text = str(text)
+    if not (_BARE_YEARS.match(text) or _MIN_YEARS.search(text)):
+        return None
+    for match in _YEARS.finditer(text):
+        if not _WINDOW_YEARS.search(text[:match.start()]):
+            return _word_or_number(match.group(1))
+    return None
+
+
+def _cert_codes(name: str) -> set:
+    codes = {f"{m[0].lower()}{m[1]}" for m in _STANDARD.findall(name)}
+    codes = {c.replace("bis", "is") for c in codes}
+    return codes
+
+
+def _cmmi_level(name: str):
+    match = _CMMI.search(name)
+    return int(match.group(1)) if match else None
+
+
+def _norm(name: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9 ]", " ", name.lower()).split())
+
+
+def match_certification(required: str, held: list):
+    """
+    True/False when the requirement is a recognizable standard (ISO 9001, CMMI Level 3),
+    fuzzy True for close name matches, None when it can't be decided locally.
+    """
+    codes = _cert_codes(required)
+    level = _cmmi_level(required)
+    if level is not None:
+        held_levels = [l for l in (_cmmi_level(h) for h in held) if l is not None]
+        return any(l >= level for l in held_levels)
+    if codes:
+        return any(codes & _cert_codes(h) for h in held)
+    req = _norm(required)
+    for h in held:
+        h = _norm(h)
+        if req and (req in h or h in req or SequenceMatcher(None, req, h).ratio() >= 0.85):
+            return True
+    return None
+
+
+def _criterion(name, required, capability, meets, gap=""):
+    return {
+        "criterion": name,
+        "required": required,
+        "company_capability": capability,
+        "meets_requirement": meets,
+        "gap": gap,
+        "decided_by": "rules",
+    }
+
+
+def evaluate(extracted: dict, profile: dict) -> dict:
+    """
+    Apply the deterministic rules. Returns
+    {"decided": [criterion...], "ambiguous": [name...], "disqualifiers": [str...]}.
+    A decided criterion with meets_requirement False is a hard disqualifier.
+    """
+    criteria = extracted.get("eligibility_criteria") or {}
+    if not isinstance(criteria, dict):
+        criteria = {}
+    decided, ambiguous, disqualifiers = [], [], []
+
+    # MSEs are often exempted from turnover/experience clauses — leave that call to the model
+    special = " ".join(str(c) for c in extracted.get("special_conditions") or [])
+    exempt = bool(profile.get("msme_registered")) and bool(_MSE_EXEMPTION.search(special))
+
+    min_turnover = criteria.get("min_turnover")
+    if not _is_blank(min_turnover):
+        required_cr = parse_amount_cr(min_turnover, strict=True)
+        have_cr = profile.get("annual_turnover_cr")
+        if required_cr is None or have_cr is None:
+            ambiguous.append("min_turnover")
+        elif have_cr >= required_cr:
+            decided.append(_criterion("Minimum turnover", str(min_turnover), f"₹{have_cr} Cr", True))
+        elif exempt:
+            ambiguous.append("min_turnover")
+        else:
+            gap = f"Short by ₹{round(required_cr - have_cr, 2)} Cr"
+            decided.append(_criterion("Minimum turnover", str(min_turnover), f"₹{have_cr} Cr", False, gap))
+            disqualifiers.append(f"Turnover ₹{have_cr} Cr is below the required {min_turnover}")
+
+    experience = criteria.get("years_of_experience")
+    if not _is_blank(experience):
+        required_years = parse_years(experience)
+        have_years = profile.get("years_in_operation")
+        if required_years is None or have_years is None:
+            ambiguous.append("years_of_experience")
+        elif have_years >= required_years:
+            decided.append(_criterion("Years of experience", str(experience), f"{have_years} years", True))
+        elif exempt:
+            ambiguous.append("years_of_experience")
+        else:
+            gap = f"Short by {required_years - have_years:g} years"
+            decided.append(_criterion("Years of experience", str(experience), f"{have_years} years", False, gap))
+            disqualifiers.append(f"{have_years} years in operation is below the required {experience}")
+
+    held = [str(c) for c in profile.get("certifications") or [] if not _is_blank(str(c))]
+    for required in criteria.get("certifications_required") or []:
+        if _is_blank(required):
+            continue
+        met = match_certification(str(required), held)
+        if met is None:
+            ambiguous.append(f"certification: {required}")
+        elif met:
+            decided.append(_criterion(f"Certification: {required}", str(required), ", ".join(held), True))
+        else:
+            decided.append(_criterion(f"Certification: {required}", str(required), ", ".join(held) or "None", False, f"{required} not held"))
+            disqualifiers.append(f"Required certification {required} not held")
+
+    for key in ("technical_qualifications", "prior_experience"):
+        if not _is_blank(criteria.get(key)) and criteria.get(key) != []:
+            ambiguous.append(key)
+
+    return {"decided": decided, "ambiguous": ambiguous, "disqualifiers": disqualifiers}
+
+
+def rules_only_report(verdict: dict) -> dict:
+    """
+    Full eligibility report built from rules alone (no LLM call). With nothing decided
+    there is no verdict: overall_eligible and eligibility_score are None and the
+    recommendation is REVIEW.
+    """
+    decided = verdict["decided"]
+    if not decided and not verdict["disqualifiers"]:
+        if verdict.get("ambiguous"):
+            reasoning = "None of the stated eligibility criteria could be checked by the deterministic rules."
+        else:
+            reasoning = "No eligibility criteria were extracted from the tender; check the document directly."
+        return {
+            "overall_eligible": None,
+            "eligibility_score": None,
+            "recommendation": "REVIEW",
+            "reasoning": reasoning,
+            "criteria_analysis": [],
+            "strengths": [],
+            "disqualifiers": [],
+            "conditions": [],
+            "decided_by": "rules",
+        }
+    met = [c for c in decided if c["meets_requirement"]]
+    score = round(100 * len(met) / len(decided)) if decided else 0
+    eligible = not verdict["disqualifiers"]
+    if not eligible:
+        reasoning = "Hard disqualifier(s) found by deterministic checks: " + "; ".join(verdict["disqualifiers"])
+        score = min(score, 30)
+    else:
+        reasoning = "All stated eligibility criteria are met on turnover, experience and certifications."
+    return {
+        "overall_eligible": eligible,
+        "eligibility_score": score,
+        "recommendation": "PROCEED" if eligible else "DO NOT BID",
+        "reasoning": reasoning,
+        "criteria_analysis": decided,
+        "strengths": [c["criterion"] for c in met],
+        "disqualifiers": verdict["disqualifiers"],
+        "conditions": [],
+        "decided_by": "rules",
+    }
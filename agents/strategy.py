@@ -1,51 +1,39 @@
 """
 agents/strategy.py — Agent 4: Bid Strategy Synthesizer
-Uses Strands Agent with Gemini.
+Uses Strands Agent with Gemini via the shared client in agents/llm.py.
 """
 
-import os
 import json
 import re
-from strands import Agent
-from strands.models.litellm import LiteLLMModel
 from dotenv import load_dotenv
+from .llm import complete
+from .context import project_context
 
 load_dotenv()
 
 
-def get_model():
-    return LiteLLMModel(
-        model_id="gemini/gemini-2.5-flash",
-        params={
-            "api_key": os.getenv("GOOGLE_API_KEY"),
-            "temperature": 0.2,
-        }
-    )
-
-
 SYSTEM_PROMPT = """You are a senior bid strategist specializing in Indian government procurement.
 Synthesize all available intelligence into a comprehensive bid strategy.
 Always respond with valid JSON only."""
 
 
-def run_strategy(extracted_requirements: dict, eligibility_report: dict, market_intelligence: dict) -> dict:
+def run_strategy(extracted_requirements: dict, eligibility_report: dict, market_intelligence: dict, on_field=None) -> dict:
     """Agent 4: Synthesize master bid strategy from all agent outputs."""
 
-    agent = Agent(
-        model=get_model(),
-        system_prompt=SYSTEM_PROMPT,
+    context = project_context(
+        "strategy", tender=extracted_requirements, eligibility=eligibility_report, market=market_intelligence,
     )
 
     prompt = f"""Create a comprehensive bid strategy based on all analysis.
 
 TENDER REQUIREMENTS:
-{json.dumps(extracted_requirements, indent=2)}
+{context["tender"]}
 
 ELIGIBILITY REPORT:
-{json.dumps(eligibility_report, indent=2)}
+{context["eligibility"]}
 
 MARKET INTELLIGENCE:
-{json.dumps(market_intelligence, indent=2)}
+{context["market"]}
 
 Return a JSON object:
 {{
@@ -84,8 +72,7 @@ Return a JSON object:
 
 Return ONLY valid JSON."""
 
-    result = agent(prompt)
-    response_text = str(result)
+    response_text = complete("strategy", SYSTEM_PROMPT, prompt, on_field=on_field)
 
     json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
     if json_match:
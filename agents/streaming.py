@@ -0,0 +1,115 @@
+"""
+agents/streaming.py — Token streaming with incremental JSON parsing
+Watches an agent's text deltas as they arrive and publishes each top-level
+JSON field the moment it closes, so callers can act before the reply ends.
+"""
+
+import json
+from typing import Callable, Optional
+
+
+class IncrementalJSONParser:
+    """
+    Feed text chunks; returns the top-level (key, value) pairs completed by each chunk.
+    Anything before the first "{" (e.g. a ```json fence) is ignored.
+    """
+
+    def __init__(self):
+        self.fields: dict = {}
+        self._buf = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        self._done = False
+
+    def feed(self, chunk: str) -> list:
+        completed = []
+        for ch in chunk:
+            if self._done:
+                break
+            if not self._started:
+                if ch == "{":
+                    self._started = True
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                self._buf.append(ch)
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+
+            # A top-level "," or the closing "}" ends the current "key": value member
+            if (self._depth == 1 and ch == ",") or self._depth == 0:
+                field = self._close_member()
+                if field is not None:
+                    completed.append(field)
+                if self._depth == 0:
+                    self._done = True
+                continue
+            self._buf.append(ch)
+        return completed
+
+    def _close_member(self):
+        member = "".join(self._buf).strip()
+        self._buf = []
+        if not member:
+            return None
+        try:
+            parsed = json.loads("{" + member + "}")
+        except json.JSONDecodeError:
+            return None
+        key, value = next(iter(parsed.items()))
+        self.fields[key] = value
+        return key, value
+
+
+def streaming_callback(on_field: Callable[[str, object, dict], None]):
+    """
+    Strands callback_handler that parses text deltas incrementally and calls
+    on_field(key, value, fields_so_far) per completed top-level field.
+    An exception raised by on_field propagates out of the agent call, cancelling it.
+    """
+    parser = IncrementalJSONParser()
+
+    def handler(**kwargs):
+        data = kwargs.get("data")
+        if not data:
+            return
+        for key, value in parser.feed(data):
+            on_field(key, value, dict(parser.fields))
+
+    handler.parser = parser
+    return handler
+
+
+def field_publisher(on_field: Optional[Callable[[str, object], None]], stop_when: Optional[Callable[[dict], Optional[Exception]]] = None):
+    """
+    Adapts an agent's optional on_field(key, value) hook into a streaming callback.
+    `stop_when(fields)` may return an exception to raise, cancelling the stream.
+    Returns None (silent agent) when there is nothing to publish or check.
+    """
+    if on_field is None and stop_when is None:
+        return None
+
+    def publish(key, value, fields):
+        if on_field is not None:
+            on_field(key, value)
+        if stop_when is not None:
+            error = stop_when(fields)
+            if error is not None:
+                raise error
+
+    return streaming_callback(publish)
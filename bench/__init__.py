@@ -0,0 +1 @@
+from .pdfgen import make_tender_pdf, tender_pages, write_pdf
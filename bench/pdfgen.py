@@ -0,0 +1,116 @@
+"""
+bench/pdfgen.py — Synthetic tender PDF generator
+Writes text-based tender PDFs of any length (1–500+ pages) with no third-party
+dependencies. The notice, eligibility and EMD clauses are placed where real
+tenders put them, so retrieval and the rules engine see realistic input.
+"""
+
+import random
+
+WORDS = (
+    "contractor shall supply install commission maintain system software hardware network data centre "
+    "department authority bidder work order schedule deliverable acceptance testing warranty support "
+    "documentation training milestone payment invoice penalty clause specification compliance audit "
+    "security service level agreement uptime response resolution escalation report quarterly annual"
+).split()
+
+AUTHORITIES = [
+    "National Informatics Centre", "Public Works Department, Maharashtra", "Indian Railways - Northern Zone",
+    "Municipal Corporation of Greater Mumbai", "Ministry of Electronics and Information Technology",
+]
+
+LINES_PER_PAGE = 48
+
+
+def _escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _filler(rng: random.Random, n: int) -> list:
+    lines = []
+    for _ in range(n):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(8, 14))]
+        lines.append(" ".join(words).capitalize() + ".")
+    return lines
+
+
+def tender_pages(num_pages: int, seed: int = 0) -> list:
+    """Lines of text per page for a synthetic tender of `num_pages` pages."""
+    rng = random.Random(seed)
+    tender_no = f"GEM/2026/B/{1000000 + seed}"
+    authority = AUTHORITIES[seed % len(AUTHORITIES)]
+    value_cr = rng.choice([2.5, 8, 12, 25, 40])
+
+    notice = [
+        "NOTICE INVITING TENDER",
+        f"Tender No: {tender_no}",
+        f"Issuing Authority: {authority}",
+        "Name of Work: Supply, installation and maintenance of IT infrastructure",
+        f"Estimated Value: Rs. {value_cr} Crore",
+        "Bid Submission End Date: 15-12-2026 15:00",
+        "Technical Bid Opening Date: 16-12-2026 11:00",
+        "Pre-Bid Meeting: 01-12-2026 11:00",
+        "",
+    ]
+    eligibility = [
+        "SECTION 3: ELIGIBILITY CRITERIA",
+        f"3.1 Minimum average annual turnover of Rs. {round(value_cr * 0.4, 1)} Crore in the last three financial years.",
+        "3.2 The bidder shall have a minimum of 5 years of experience in similar works.",
+        "3.3 The bidder must hold ISO 9001:2015 and ISO 27001 certification.",
+        "3.4 At least 3 similar works completed for government departments in the last 7 years.",
+        "3.5 MSE bidders are exempted from turnover and experience criteria as per GFR.",
+        "",
+    ]
+    financial = [
+        "SECTION 5: EARNEST MONEY DEPOSIT",
+        f"EMD of Rs. {round(value_cr * 2, 1)} Lakh shall be submitted as a Bank Guarantee.",
+        "Performance Security of 5% of contract value is payable on award.",
+        "",
+    ]
+
+    # Notice up front, eligibility ~60% of the way in, EMD near the end — as in real bid documents
+    special = {0: notice, int(num_pages * 0.6): eligibility, max(0, num_pages - 2): financial}
+    pages = []
+    for p in range(num_pages):
+        lines = list(special.get(p, []))
+        lines += [f"Page {p + 1} - {tender_no}"] + _filler(rng, LINES_PER_PAGE - len(lines) - 1)
+        pages.append(lines)
+    return pages
+
+
+def write_pdf(path: str, pages: list) -> str:
+    """Minimal PDF 1.4 writer: one Helvetica text stream per page."""
+    n = len(pages)
+    font_obj = 3 + n * 2
+    objs = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{3 + i * 2} 0 R' for i in range(n))}] /Count {n} >>".encode(),
+    ]
+    for i, lines in enumerate(pages):
+        objs.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font_obj} 0 R >> >> /Contents {4 + i * 2} 0 R >>".encode()
+        )
+        body = "BT /F1 9 Tf 40 760 Td 15 TL " + " ".join(f"({_escape(line)}) '" for line in lines) + " ET"
+        data = body.encode("latin-1", errors="replace")
+        objs.append(b"<< /Length %d >>\nstream\n" % len(data) + data + b"\nendstream")
+    objs.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objs):
+        offsets.append(len(out))
+        out += f"{i + 1} 0 obj\n".encode() + obj + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objs) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objs) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+
+    with open(path, "wb") as f:
+        f.write(out)
+    return path
+
+
+def make_tender_pdf(path: str, num_pages: int, seed: int = 0) -> str:
+    return write_pdf(path, tender_pages(num_pages, seed))
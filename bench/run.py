@@ -0,0 +1,242 @@
+"""
+bench/run.py — Offline end-to-end benchmark
+Boots the real FastAPI app under uvicorn with the stub model, uploads N
+synthetic tenders concurrently and reports jobs/sec, per-stage p50/p95/p99
+(from each job's "timings" breakdown) and peak RSS.
+
+    python -m bench.run --jobs 20 --concurrency 8 --pages 10,100,500 --latency-ms 800 --jitter-ms 200
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import resource
+import tempfile
+import threading
+import multiprocessing
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="ProcureX offline benchmark (stub LLM, synthetic PDFs)")
+    parser.add_argument("--jobs", type=int, default=20, help="total uploads")
+    parser.add_argument("--concurrency", type=int, default=8, help="uploads in flight at once")
+    parser.add_argument("--pages", default="10,100", help="comma-separated page counts, cycled across jobs (1-500)")
+    parser.add_argument("--latency-ms", type=float, default=800, help="stub model latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=200, help="uniform ± jitter on stub latency")
+    parser.add_argument("--rpm", type=float, default=100000, help="LLM_RPM for the run (default: effectively unlimited)")
+    parser.add_argument("--job-store", default="sqlite", choices=["sqlite", "memory"])
+    parser.add_argument("--reuse-pdfs", action="store_true", help="upload the same PDF per page count (exercises the result cache)")
+    parser.add_argument("--json", dest="json_out", help="also write the report as JSON to this path")
+    return parser.parse_args(argv)
+
+
+def _configure_env(args, workdir: Path):
+    """Everything the app reads at import time must be set before `import main`."""
+    os.environ.update({
+        "JOB_STORE": args.job_store,
+        "JOB_DB_PATH": str(workdir / "jobs.sqlite3"),
+        "CACHE_PATH": str(workdir / "cache.sqlite3"),
+        "LLM_LIMITER_DB_PATH": str(workdir / "ratelimit.sqlite3"),
+        "DOC_SPILL_DIR": str(workdir / "docs"),
+        "LLM_RPM": str(args.rpm),
+        "LLM_TPM": str(args.rpm * 100000),
+        "PIPELINE_QUEUE_SIZE": os.getenv("PIPELINE_QUEUE_SIZE", str(max(20, args.jobs))),
+    })
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+class RSSSampler(threading.Thread):
+    """Peak resident set of this process plus its ingest workers, sampled from /proc (Linux)."""
+
+    def __init__(self, interval: float = 0.05):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak_total_kb = 0
+        self._done = threading.Event()
+
+    @staticmethod
+    def _rss_kb(pid) -> int:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1])
+        except OSError:
+            pass
+        return 0
+
+    def run(self):
+        while not self._done.is_set():
+            total = self._rss_kb("self") + sum(self._rss_kb(p.pid) for p in multiprocessing.active_children())
+            self.peak_total_kb = max(self.peak_total_kb, total)
+            self._done.wait(self.interval)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(app, port: int):
+    import uvicorn
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="bench-uvicorn", daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+async def _run_job(client, pdf_path: str, sem: asyncio.Semaphore) -> dict:
+    import httpx
+    async with sem:
+        t0 = time.perf_counter()
+        rejected = 0
+        while True:
+            with open(pdf_path, "rb") as f:
+                resp = await client.post("/analyze", files={"file": (Path(pdf_path).name, f, "application/pdf")})
+            if resp.status_code != 429:
+                break
+            rejected += 1
+            await asyncio.sleep(float(resp.headers.get("Retry-After", "1")) / 10)
+        if resp.status_code != 200:
+            return {"ok": False, "error": f"HTTP {resp.status_code}: {resp.text[:200]}", "rejected": rejected}
+        job_id = resp.json()["job_id"]
+
+        while True:
+            await asyncio.sleep(0.1)
+            try:
+                status = await client.get(f"/status/{job_id}")
+            except httpx.HTTPError:
+                continue
+            body = status.json()
+            if status.status_code == 500 or body.get("status") == "failed":
+                return {"ok": False, "error": body.get("error"), "rejected": rejected}
+            if "timings" in body:
+                return {
+                    "ok": True,
+                    "end_to_end": time.perf_counter() - t0,
+                    "timings": body["timings"],
+                    "rejected": rejected,
+                }
+
+
+async def _drive(base_url: str, pdfs: list, concurrency: int) -> tuple:
+    import httpx
+    sem = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        t0 = time.perf_counter()
+        results = await asyncio.gather(*(_run_job(client, pdf, sem) for pdf in pdfs))
+        return results, time.perf_counter() - t0
+
+
+def report(results: list, wall: float, peak_rss_kb: int, args) -> dict:
+    ok = [r for r in results if r["ok"]]
+    series = {"end_to_end": [r["end_to_end"] for r in ok], "pipeline": [r["timings"]["total_seconds"] for r in ok]}
+    series["queue_wait"] = [max(0.0, e - p) for e, p in zip(series["end_to_end"], series["pipeline"])]
+    for r in ok:
+        for stage, seconds in r["timings"]["stages"].items():
+            series.setdefault(stage, []).append(seconds)
+    return {
+        "config": {"jobs": args.jobs, "concurrency": args.concurrency, "pages": args.pages,
+                   "latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms, "job_store": args.job_store},
+        "completed": len(ok),
+        "failed": len(results) - len(ok),
+        "rejected_429": sum(r["rejected"] for r in results),
+        "wall_seconds": round(wall, 3),
+        "jobs_per_sec": round(len(ok) / wall, 3) if wall else 0.0,
+        "peak_rss_mb": round(peak_rss_kb / 1024, 1),
+        "peak_rss_self_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "prompt_tokens": sum(r["timings"]["prompt_tokens"] for r in ok),
+        "completion_tokens": sum(r["timings"]["completion_tokens"] for r in ok),
+        "stages": {
+            name: {"n": len(v), "p50": round(percentile(v, 50), 3), "p95": round(percentile(v, 95), 3), "p99": round(percentile(v, 99), 3)}
+            for name, v in series.items()
+        },
+        "errors": sorted({r["error"] for r in results if not r["ok"]})[:5],
+    }
+
+
+def print_report(summary: dict):
+    print(f"\n[Bench] {summary['completed']} ok / {summary['failed']} failed in {summary['wall_seconds']}s "
+          f"— {summary['jobs_per_sec']} jobs/sec, peak RSS {summary['peak_rss_mb']} MB "
+          f"(API process {summary['peak_rss_self_mb']} MB), {summary['rejected_429']} x 429")
+    print(f"{'stage':<14}{'n':>5}{'p50 s':>10}{'p95 s':>10}{'p99 s':>10}")
+    for name, s in summary["stages"].items():
+        print(f"{name:<14}{s['n']:>5}{s['p50']:>10.3f}{s['p95']:>10.3f}{s['p99']:>10.3f}")
+    for error in summary["errors"]:
+        print(f"[Bench] error: {error}")
+
+
+def main(argv=None) -> dict:
+    args = parse_args(argv)
+    json_out = Path(args.json_out).resolve() if args.json_out else None
+    workdir = Path(tempfile.mkdtemp(prefix="procurex-bench-"))
+    _configure_env(args, workdir)
+    os.chdir(workdir)  # main.py creates ./uploads relative to the working directory
+
+    from bench.pdfgen import make_tender_pdf
+    from bench.stub_model import StubModel
+    import agents.llm as llm
+
+    stubs = {}
+    llm.get_model = lambda agent_name="extractor": stubs.setdefault(
+        agent_name, StubModel(agent_name, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+    )
+    import main as app_module
+
+    page_counts = [max(1, min(500, int(p))) for p in args.pages.split(",")]
+    pdf_dir = workdir / "pdfs"
+    pdf_dir.mkdir()
+    pdfs = []
+    for i in range(args.jobs):
+        pages = page_counts[i % len(page_counts)]
+        seed = pages if args.reuse_pdfs else i
+        path = pdf_dir / f"tender_{pages}p_{seed}.pdf"
+        if not path.exists():
+            make_tender_pdf(str(path), pages, seed=seed)
+        pdfs.append(str(path))
+    print(f"[Bench] {len(set(pdfs))} synthetic PDFs ({args.pages} pages) in {pdf_dir}")
+
+    port = _free_port()
+    server, thread = _start_server(app_module.app, port)
+    sampler = RSSSampler()
+    sampler.start()
+    try:
+        results, wall = asyncio.run(_drive(f"http://127.0.0.1:{port}", pdfs, args.concurrency))
+    finally:
+        sampler.stop()
+        server.should_exit = True
+        thread.join(timeout=10)
+
+    summary = report(results, wall, sampler.peak_total_kb, args)
+    print_report(summary)
+    if json_out:
+        json_out.write_text(json.dumps(summary, indent=2))
+    return summary
+
+
+if __name__ == "__main__":
+    main()
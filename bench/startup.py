@@ -0,0 +1,144 @@
+"""
+bench/startup.py — Cold-start profile
+Starts the API in a fresh process the way Render does and reports how long
+`import main` takes (with the slowest modules from -X importtime), how long
+until /health answers, and how long until the background prewarm has loaded
+the LLM stack. Exits non-zero when a phase overruns its budget.
+
+    python -m bench.startup [--top 15] [--import-budget 1.5] [--serve-budget 3] [--warm-budget 15]
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="ProcureX cold-start profile")
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to list")
+    parser.add_argument("--import-budget", type=float, default=float(os.getenv("IMPORT_BUDGET_SECONDS", "1.5")))
+    parser.add_argument("--serve-budget", type=float, default=3.0, help="process start to first /health 200")
+    parser.add_argument("--warm-budget", type=float, default=15.0, help="process start to a warm LLM stack")
+    parser.add_argument("--json", dest="json_out", help="also write the report as JSON to this path")
+    return parser.parse_args(argv)
+
+
+def _env(workdir: Path) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "JOB_DB_PATH": str(workdir / "jobs.sqlite3"),
+        "QUEUE_DB_PATH": str(workdir / "queue.sqlite3"),
+        "CACHE_PATH": str(workdir / "cache.sqlite3"),
+        "HISTORY_DB_PATH": str(workdir / "history.sqlite3"),
+        "LLM_LIMITER_DB_PATH": str(workdir / "ratelimit.sqlite3"),
+        "DOC_SPILL_DIR": str(workdir / "docs"),
+        "UPLOAD_DIR": str(workdir / "uploads"),
+        "PREWARM": "background",
+        "PYTHONPATH": str(ROOT),
+    })
+    return env
+
+
+def import_profile(env: dict, top: int) -> dict:
+    """Wall time of `import main` plus the modules with the largest cumulative -X importtime."""
+    code = "import time; t0 = time.perf_counter(); import main; print(time.perf_counter() - t0)"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=env,
+                          capture_output=True, text=True, check=True)
+    modules = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            modules.append((name.strip(), int(cumulative) / 1e6))
+        except ValueError:
+            continue  # the header row
+    # Only top-level packages, so numpy doesn't show up once per submodule
+    roots = {}
+    for name, seconds in modules:
+        if "." not in name:
+            roots[name] = max(seconds, roots.get(name, 0.0))
+    slowest = sorted(roots.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    return {"seconds": round(float(proc.stdout.strip().splitlines()[-1]), 3),
+            "slowest": [{"module": name, "seconds": round(s, 3)} for name, s in slowest]}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _health(port: int):
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+            return json.loads(response.read())
+    except OSError:
+        return None
+
+
+def serve_profile(env: dict, timeout: float) -> dict:
+    """Seconds from spawning uvicorn to the first /health 200, and to llm.state == warm."""
+    port = _free_port()
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+                            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    serving = warm = health = None
+    try:
+        while time.perf_counter() - t0 < timeout and proc.poll() is None:
+            health = _health(port)
+            if health is not None:
+                serving = serving or round(time.perf_counter() - t0, 3)
+                if health["llm"]["state"] in ("warm", "failed"):
+                    warm = round(time.perf_counter() - t0, 3)
+                    break
+            time.sleep(0.05)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+    return {"serving_seconds": serving, "warm_seconds": warm,
+            "llm": (health or {}).get("llm"), "startup": (health or {}).get("startup")}
+
+
+def main(argv=None) -> dict:
+    args = parse_args(argv)
+    workdir = Path(tempfile.mkdtemp(prefix="procurex-startup-"))
+    env = _env(workdir)
+
+    imports = import_profile(env, args.top)
+    print(f"[Startup] import main: {imports['seconds']}s (budget {args.import_budget:g}s)")
+    for row in imports["slowest"]:
+        print(f"  {row['module']:<28}{row['seconds']:>8.3f}s")
+
+    serve = serve_profile(env, timeout=max(args.serve_budget, args.warm_budget) * 2)
+    print(f"[Startup] /health answered after {serve['serving_seconds']}s (budget {args.serve_budget:g}s), "
+          f"LLM stack {(serve['llm'] or {}).get('state', 'unknown')} after {serve['warm_seconds']}s "
+          f"(budget {args.warm_budget:g}s)")
+
+    over = []
+    if imports["seconds"] > args.import_budget:
+        over.append("import")
+    if serve["serving_seconds"] is None or serve["serving_seconds"] > args.serve_budget:
+        over.append("serving")
+    if serve["warm_seconds"] is None or serve["warm_seconds"] > args.warm_budget:
+        over.append("warm")
+    report = {"import": imports, "serve": serve, "over_budget": over}
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(report, indent=2))
+    if over:
+        print(f"[Startup] over budget: {', '.join(over)}")
+        sys.exit(1)
+    return report
+
+
+if __name__ == "__main__":
+    main()
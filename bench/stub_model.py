@@ -0,0 +1,122 @@
+"""
+bench/stub_model.py — Offline stand-in for the LiteLLM model
+A Strands model that streams canned JSON per agent with configurable latency
+and jitter, and reports token usage, so the full pipeline runs without quota.
+"""
+
+import json
+import random
+import asyncio
+from strands.models.model import Model
+
+CANNED = {
+    "validator": "YES",
+    "extractor": {
+        "tender_title": "Supply, installation and maintenance of IT infrastructure",
+        "issuing_authority": "National Informatics Centre",
+        "tender_number": "GEM/2026/B/1000000",
+        "submission_deadline": "15-12-2026 15:00",
+        "estimated_value_inr": "Rs. 12 Crore",
+        "eligibility_criteria": {
+            "min_turnover": "Rs. 4.8 Crore average annual turnover",
+            "years_of_experience": "5 years",
+            "technical_qualifications": ["Experience in data centre operations"],
+            "certifications_required": ["ISO 9001:2015", "ISO 27001"],
+            "prior_experience": "3 similar works for government departments",
+        },
+        "scope_of_work": ["Supply of servers", "Installation", "Five year maintenance"],
+        "technical_requirements": ["99.5% uptime SLA"],
+        "financial_requirements": ["EMD Rs. 24 Lakh", "Performance security 5%"],
+        "evaluation_criteria": ["QCBS 70:30"],
+        "key_dates": {"pre_bid": "01-12-2026", "opening": "16-12-2026"},
+        "special_conditions": ["MSE exemption as per GFR"],
+    },
+    "eligibility": {
+        "overall_eligible": True,
+        "eligibility_score": 78,
+        "recommendation": "PROCEED",
+        "reasoning": "Meets the remaining criteria with minor documentation gaps.",
+        "criteria_analysis": [
+            {"criterion": "Technical qualifications", "required": "Data centre operations",
+             "company_capability": "Cloud infrastructure", "meets_requirement": True, "gap": ""},
+        ],
+        "strengths": ["Relevant domain expertise"],
+        "disqualifiers": [],
+        "conditions": ["Submit ISO 27001 certificate"],
+    },
+    "market": {
+        "market_analysis": {"competitive_intensity": "MEDIUM", "typical_competitors": ["L1 integrators"],
+                            "market_size_estimate": "Rs. 200 Crore", "historical_bid_patterns": "L1 wins at 8-12% below estimate"},
+        "pricing_intelligence": {"estimated_market_rate_inr": "Rs. 11 Crore", "recommended_bid_price_inr": "Rs. 10.8 Crore",
+                                 "pricing_strategy": "Competitive", "margin_estimate_percent": 14},
+        "win_probability": 42,
+        "risk_assessment": {"overall_risk_score": 35, "risks": [
+            {"risk_type": "Delivery", "severity": "MEDIUM", "description": "Tight timeline", "mitigation": "Phased rollout"},
+        ]},
+        "opportunity_score": 68,
+        "key_insights": ["MSE preference applies"],
+    },
+    "strategy": {
+        "bid_decision": "BID",
+        "overall_score": 72,
+        "bid_decision_rationale": "Eligible with a competitive price position.",
+        "executive_summary": "Bid at Rs. 10.8 Crore with emphasis on uptime guarantees.",
+        "win_strategy": {"primary_strategy": "Value", "key_themes_for_proposal": ["Uptime"], "differentiators": ["Local support"]},
+        "pricing_recommendation": {"recommended_price_inr": "Rs. 10.8 Crore", "pricing_rationale": "Below L1 band",
+                                   "negotiation_floor_inr": "Rs. 10.2 Crore"},
+        "compliance_checklist": [{"item": "EMD", "status": "NEEDS PREP", "action_required": "Arrange BG"}],
+        "action_plan": [{"action": "Arrange BG", "priority": "HIGH", "deadline": "10-12-2026", "owner": "Finance"}],
+        "red_flags": [],
+        "success_factors": ["Price", "SLA track record"],
+    },
+}
+
+
+class StubModel(Model):
+    """
+    Streams CANNED[agent_name] in chunks over `latency_ms` (± uniform `jitter_ms`).
+    Sleeps are async, so concurrent calls overlap on the shared LLM event loop.
+    """
+
+    def __init__(self, agent_name: str, latency_ms: float = 800, jitter_ms: float = 200, chunk_chars: int = 64):
+        self.agent_name = agent_name
+        self.config = {"model_id": f"stub/{agent_name}", "latency_ms": latency_ms, "jitter_ms": jitter_ms, "chunk_chars": chunk_chars}
+
+    def update_config(self, **model_config):
+        self.config.update(model_config)
+
+    def get_config(self):
+        return self.config
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        """CANNED[agent_name] validated into `output_model`, after the same simulated latency."""
+        await asyncio.sleep(self._latency())
+        yield {"output": output_model.model_validate(CANNED.get(self.agent_name, {}))}
+
+    def _reply(self) -> str:
+        canned = CANNED.get(self.agent_name, {})
+        return canned if isinstance(canned, str) else json.dumps(canned)
+
+    def _latency(self) -> float:
+        return max(0.0, self.config["latency_ms"] + random.uniform(-1, 1) * self.config["jitter_ms"]) / 1000
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        text = self._reply()
+        size = self.config["chunk_chars"]
+        chunks = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+        latency = self._latency()
+        prompt_chars = len(system_prompt or "") + sum(
+            len(block.get("text", "")) for message in messages for block in message.get("content", [])
+        )
+
+        yield {"messageStart": {"role": "assistant"}}
+        for chunk in chunks:
+            await asyncio.sleep(latency / len(chunks))
+            yield {"contentBlockDelta": {"delta": {"text": chunk}}}
+        yield {"contentBlockStop": {}}
+        yield {"messageStop": {"stopReason": "end_turn"}}
+        yield {"metadata": {
+            "usage": {"inputTokens": prompt_chars // 4, "outputTokens": len(text) // 4,
+                      "totalTokens": prompt_chars // 4 + len(text) // 4},
+            "metrics": {"latencyMs": int(latency * 1000)},
+        }}
@@ -0,0 +1 @@
+from .cache import result_cache, hash_file, hash_bundle, hash_upload, hash_profile, hash_json
@@ -0,0 +1,208 @@
+"""
+core/cache.py — Content-addressed result cache
+Persists pipeline stage outputs in SQLite, keyed by the tender PDF's SHA-256
+and a normalized company profile hash, with TTL/size eviction and
+single-flight deduplication of identical in-flight computations.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CACHE_PATH = os.getenv("CACHE_PATH", "./data/cache.sqlite3")
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_bundle(digests: list) -> str:
+    """Order-independent hash of a set of files, from their SHA-256 digests."""
+    return hashlib.sha256("\n".join(sorted(digests)).encode("utf-8")).hexdigest()
+
+
+def hash_upload(path: str) -> str:
+    """hash_file for a single upload, hash_bundle over the PDFs of a bundle directory."""
+    if os.path.isdir(path):
+        return hash_bundle([hash_file(str(p)) for p in Path(path).iterdir() if p.is_file()])
+    return hash_file(path)
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        items = [_normalize(v) for v in value]
+        items = [v for v in items if v != ""]
+        return sorted(items, key=lambda v: json.dumps(v, sort_keys=True))
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def hash_profile(profile: dict) -> str:
+    """Hash of a company profile that ignores case, whitespace and list order."""
+    canonical = json.dumps(_normalize(profile), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def hash_json(value) -> str:
+    """Hash of a JSON-serializable value (key order ignored) — for stage input fingerprints."""
+    canonical = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class ResultCache:
+    """SQLite-backed JSON cache with LRU size budget, TTL and single-flight."""
+
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES, ttl_seconds: int = CACHE_TTL_SECONDS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._flights: dict = {}
+        self._flights_lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str):
+        """Return the cached value or None if missing/expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def set(self, key: str, value) -> None:
+        payload = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), now, now),
+            )
+            self._conn.commit()
+        self.evict()
+
+    def scan(self, prefix: str):
+        """(key, value) for every unexpired entry whose key starts with `prefix`."""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value FROM cache WHERE key >= ? AND key < ? AND created_at >= ?",
+                (prefix, prefix + "\uffff", cutoff),
+            ).fetchall()
+        for key, value in rows:
+            yield key, json.loads(value)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def evict(self) -> int:
+        """Drop expired entries, then least recently used ones until under the size budget."""
+        removed = 0
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM cache WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+            removed += cur.rowcount
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+            if total > self.max_bytes:
+                stale = []
+                for key, size in self._conn.execute("SELECT key, size FROM cache ORDER BY accessed_at ASC"):
+                    if total <= self.max_bytes:
+                        break
+                    stale.append((key,))
+                    total -= size
+                self._conn.executemany("DELETE FROM cache WHERE key = ?", stale)
+                removed += len(stale)
+            self._conn.commit()
+        return removed
+
+    def get_or_compute(self, key: str, compute: Callable[[], object], should_cache: Callable[[object], bool] = lambda v: True):
+        """
+        Return (value, hit). Concurrent callers with the same key share one
+        in-flight computation; errors are propagated to every waiter and not cached.
+        Single-flight is per process: another API or queue worker process may compute
+        the same key at the same time, and the later write wins.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached, True
+
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                # A flight may have finished (and stored its value) since the miss above
+                cached = self.get(key)
+                if cached is not None:
+                    return cached, True
+                flight = _Flight()
+                self._flights[key] = flight
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, True
+
+        try:
+            flight.value = compute()
+            if should_cache(flight.value):
+                self.set(key, flight.value)
+            return flight.value, False
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._flights_lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+
+result_cache = ResultCache()
@@ -0,0 +1,122 @@
+"""
+core/dag.py — Dependency-graph executor for pipeline stages
+Each node names the nodes whose outputs it takes; a node starts as soon as its
+inputs are ready, so independent stages run concurrently. Every run reports
+per-node timings and the critical path, i.e. the chain of stages that set the
+wall time, against what running the useful stages one after another would have
+cost. Speculative nodes whose output was thrown away count as wasted, not saved.
+"""
+
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable
+
+
+class Node:
+    def __init__(self, name: str, fn: Callable, inputs: tuple = ()):
+        self.name = name
+        self.fn = fn
+        self.inputs = tuple(inputs)
+
+
+def _check(nodes: list) -> None:
+    names = {node.name for node in nodes}
+    if len(names) != len(nodes):
+        raise ValueError("duplicate node names")
+    for node in nodes:
+        missing = [i for i in node.inputs if i not in names]
+        if missing:
+            raise ValueError(f"node {node.name!r} takes undeclared inputs {missing}")
+    ready, pending = set(), list(nodes)
+    while pending:
+        runnable = [n for n in pending if all(i in ready for i in n.inputs)]
+        if not runnable:
+            raise ValueError(f"dependency cycle among {[n.name for n in pending]}")
+        ready.update(n.name for n in runnable)
+        pending = [n for n in pending if n.name not in ready]
+
+
+def critical_path(nodes: list, seconds: dict) -> tuple:
+    """(path, seconds) of the longest chain of dependent nodes by their measured durations."""
+    finish, previous = {}, {}
+    pending = list(nodes)
+    while pending:
+        for node in list(pending):
+            if all(i in finish for i in node.inputs):
+                before = max(node.inputs, key=lambda i: finish[i], default=None)
+                finish[node.name] = (finish[before] if before else 0.0) + seconds.get(node.name, 0.0)
+                previous[node.name] = before
+                pending.remove(node)
+    if not finish:
+        return [], 0.0
+    last = max(finish, key=finish.get)
+    path = [last]
+    while previous[path[-1]]:
+        path.append(previous[path[-1]])
+    return path[::-1], round(finish[last], 3)
+
+
+def run_graph(nodes: list, max_workers: int = None, discarded: set = None) -> tuple:
+    """
+    Run `nodes` (each called with its inputs' outputs as keyword arguments) and return
+    (outputs, report). Workers inherit the caller's context, so stage timings land on
+    the current job. The first failure stops new nodes from starting and is re-raised
+    once the running ones finish. Nodes add the names of speculative nodes whose output
+    they threw away to `discarded`; those are reported as wasted_seconds and left out
+    of the serial baseline that saved_seconds is measured against.
+    """
+    discarded = set() if discarded is None else discarded
+    _check(nodes)
+    context = contextvars.copy_context()
+    outputs, started, finished = {}, {}, {}
+    waiting = list(nodes)
+    t0 = time.perf_counter()
+    error = None
+
+    def call(node: Node):
+        started[node.name] = time.perf_counter() - t0
+        try:
+            return node.fn(**{i: outputs[i] for i in node.inputs})
+        finally:
+            finished[node.name] = time.perf_counter() - t0
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(nodes) or 1) as pool:
+        running = {}
+        while waiting or running:
+            if error is None:
+                for node in [n for n in waiting if all(i in outputs for i in n.inputs)]:
+                    waiting.remove(node)
+                    running[pool.submit(context.copy().run, call, node)] = node
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                node = running.pop(future)
+                try:
+                    outputs[node.name] = future.result()
+                except Exception as e:
+                    error = error or e
+
+    if error is not None:
+        raise error
+
+    seconds = {name: round(finished[name] - started[name], 3) for name in finished}
+    path, path_seconds = critical_path(nodes, seconds)
+    wall = round(time.perf_counter() - t0, 3)
+    serial = round(sum(s for name, s in seconds.items() if name not in discarded), 3)
+    report = {
+        "wall_seconds": wall,
+        "serial_seconds": serial,
+        "saved_seconds": round(max(0.0, serial - wall), 3),
+        "wasted_seconds": round(sum(s for name, s in seconds.items() if name in discarded), 3),
+        "critical_path": path,
+        "critical_path_seconds": path_seconds,
+        "nodes": {
+            name: {"start": round(started[name], 3), "seconds": seconds[name],
+                   "inputs": list(next(n.inputs for n in nodes if n.name == name)),
+                   **({"discarded": True} if name in discarded else {})}
+            for name in seconds
+        },
+    }
+    return outputs, report
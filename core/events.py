@@ -0,0 +1,91 @@
+"""
+core/events.py — Server-Sent Events for job progress
+Watches a job in the job store and emits each stage transition, streamed
+fields of the stage in flight, each stage's result as soon as it is stored,
+and a final complete/failed event.
+"""
+
+import os
+import json
+import time
+import asyncio
+from typing import Awaitable, Callable
+from .jobs import job_store
+
+SSE_POLL_SECONDS = float(os.getenv("SSE_POLL_SECONDS", "0.5"))
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+# Payload keys written by the pipelines, in the order they become available
+STAGE_PAYLOADS = ["extraction", "eligibility", "market", "strategy"]
+# Streamed fields of the stage in flight: {"stage": <payload key>, "fields": {...}}
+PARTIAL_PAYLOAD = "partial"
+
+
+def format_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def job_events(job_id: str, is_disconnected: Callable[[], Awaitable[bool]], position: Callable[[str], int] = None):
+    """
+    Async generator of SSE frames for `job_id`. Status-only reads are used while
+    nothing changes; payloads are fetched once each, when they first appear.
+    Ends after the `complete` or `failed` event, or when the client goes away.
+    """
+    version = None
+    last_status = None
+    sent = set()
+    last_partial = None
+    last_frame = time.monotonic()
+
+    while True:
+        if await is_disconnected():
+            return
+
+        job = await asyncio.to_thread(job_store.get_status, job_id)
+        if job is None:
+            yield format_event("failed", {"job_id": job_id, "status": "failed", "error": "Job not found"})
+            return
+
+        if job["version"] != version:
+            version = job["version"]
+            status = job["status"]
+
+            pending = [k for k in STAGE_PAYLOADS if k not in sent]
+            if pending:
+                full = await asyncio.to_thread(job_store.get, job_id, pending + [PARTIAL_PAYLOAD])
+                partial = full.get(PARTIAL_PAYLOAD)
+                if partial and partial != last_partial and partial.get("stage") not in sent and partial.get("stage") not in full:
+                    last_partial = partial
+                    yield format_event("partial", {"job_id": job_id, **partial})
+                for key in pending:
+                    if key in full:
+                        sent.add(key)
+                        yield format_event(key, {"job_id": job_id, key: full[key]})
+
+            progress = (status, job.get("profiles_done"))
+            if progress != last_status:
+                last_status = progress
+                event = {"job_id": job_id, "status": status}
+                if status == "queued" and position is not None and position(job_id):
+                    event["queue_position"] = position(job_id)
+                if "profiles_total" in job:
+                    event["profiles_done"] = job.get("profiles_done", 0)
+                    event["profiles_total"] = job["profiles_total"]
+                yield format_event("status", event)
+            last_frame = time.monotonic()
+
+            if status == "complete":
+                result = await asyncio.to_thread(job_store.get, job_id, ["result"])
+                yield format_event("complete", result.get("result"))
+                return
+            if status == "failed":
+                yield format_event("failed", {
+                    "job_id": job_id, "status": "failed",
+                    "error": job.get("error"), "not_a_tender": job.get("not_a_tender", False),
+                })
+                return
+
+        if time.monotonic() - last_frame >= SSE_HEARTBEAT_SECONDS:
+            last_frame = time.monotonic()
+            yield ": keep-alive\n\n"
+        await asyncio.sleep(SSE_POLL_SECONDS)
@@ -0,0 +1,328 @@
+"""
+core/jobs.py — Pluggable job store
+SQLite (WAL) by default so job state survives restarts and is shared across
+uvicorn worker processes. Scalar fields (status, error, counters) live on the
+job row for cheap status reads; dict/list payloads (stage results) live in a
+side table and are only deserialized when asked for. Writes made inside
+lease_fence() only land while the job's `lease` field still names that lease.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+import contextvars
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+JOB_STORE = os.getenv("JOB_STORE", "sqlite")
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "./data/jobs.sqlite3")
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", str(24 * 3600)))
+JOB_MAX_FINISHED = int(os.getenv("JOB_MAX_FINISHED", "5000"))
+
+FINISHED_STATUSES = ("complete", "failed")
+
+
+def _is_payload(value) -> bool:
+    return isinstance(value, (dict, list))
+
+
+class LeaseLostError(Exception):
+    """Raised on a fenced write after another worker took the job over."""
+    pass
+
+
+_fence = contextvars.ContextVar("job_lease_fence", default=None)
+
+
+@contextmanager
+def lease_fence(job_id: str, lease: str, store=None):
+    """
+    Claim `job_id` for `lease` (a queue worker's attempt) and fence the job's writes
+    made in this context, including threads started with a copy of it: once the job's
+    `lease` field changes (reaped, or claimed by another worker) they raise LeaseLostError.
+    """
+    (store or job_store).update(job_id, lease=lease)
+    token = _fence.set((job_id, lease))
+    try:
+        yield
+    finally:
+        _fence.reset(token)
+
+
+def _check_fence(job_id: str, job: dict) -> None:
+    fence = _fence.get()
+    if fence is not None and fence[0] == job_id and job.get("lease") != fence[1]:
+        raise LeaseLostError(f"job {job_id} is no longer held by lease {fence[1]}")
+
+
+class MemoryJobStore:
+    """In-process store — single worker only, lost on restart."""
+
+    def __init__(self, ttl_seconds: int = JOB_TTL_SECONDS, max_finished: int = JOB_MAX_FINISHED):
+        self.ttl_seconds = ttl_seconds
+        self.max_finished = max_finished
+        self._jobs: dict = {}
+        self._lock = threading.Lock()
+
+    def create(self, job_id: str, **fields) -> None:
+        self.evict()
+        now = time.time()
+        with self._lock:
+            self._jobs[job_id] = {"created_at": now, "updated_at": now, "version": 1, **fields}
+
+    def update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            _check_fence(job_id, job)
+            job.update(fields)
+            job["updated_at"] = time.time()
+            job["version"] += 1
+            if fields.get("status") in FINISHED_STATUSES:
+                job["finished_at"] = job["updated_at"]
+            elif "status" in fields:
+                # Re-queued for a retry: not finished, so not evictable
+                job.pop("finished_at", None)
+
+    def incr(self, job_id: str, field: str, by: int = 1) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                _check_fence(job_id, job)
+                job[field] = job.get(field, 0) + by
+                job["version"] += 1
+
+    def get(self, job_id: str, fields: Optional[list] = None) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if fields is None:
+                return dict(job)
+            return {k: v for k, v in job.items() if not _is_payload(v) or k in fields}
+
+    def get_status(self, job_id: str) -> Optional[dict]:
+        """Scalar fields only (status, error, counters...)."""
+        return self.get(job_id, fields=[])
+
+    def clear(self, job_id: str, *fields: str) -> None:
+        """Drop payload `fields` (e.g. the outputs of stages about to be redone)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                for field in fields:
+                    job.pop(field, None)
+                job["version"] += 1
+
+    def delete(self, job_id: str) -> None:
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def evict(self) -> int:
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            finished = sorted(
+                (j["finished_at"], job_id) for job_id, j in self._jobs.items() if "finished_at" in j
+            )
+            stale = [job_id for ts, job_id in finished if ts < cutoff]
+            overflow = len(finished) - len(stale) - self.max_finished
+            if overflow > 0:
+                stale += [job_id for ts, job_id in finished if ts >= cutoff][:overflow]
+            for job_id in stale:
+                self._jobs.pop(job_id, None)
+        return len(stale)
+
+
+class SQLiteJobStore:
+    """SQLite/WAL store, safe across threads and uvicorn worker processes."""
+
+    def __init__(self, path: str = JOB_DB_PATH, ttl_seconds: int = JOB_TTL_SECONDS, max_finished: int = JOB_MAX_FINISHED):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_finished = max_finished
+        self._local = threading.local()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._conn()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                meta TEXT NOT NULL DEFAULT '{}',
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                finished_at REAL,
+                version INTEGER NOT NULL DEFAULT 1
+            );
+            CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished_at);
+            CREATE TABLE IF NOT EXISTS job_data (
+                job_id TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                PRIMARY KEY (job_id, key)
+            );
+            """
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _write(self, job_id: str, fields: dict, create: bool = False) -> None:
+        conn = self._conn()
+        now = time.time()
+        scalars = {k: v for k, v in fields.items() if not _is_payload(v)}
+        payloads = {k: v for k, v in fields.items() if _is_payload(v)}
+        status = scalars.pop("status", None)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT status, meta FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None and not create:
+                conn.execute("ROLLBACK")
+                return
+            if create:
+                conn.execute("DELETE FROM job_data WHERE job_id = ?", (job_id,))
+                meta = {}
+            else:
+                meta = json.loads(row[1])
+                _check_fence(job_id, meta)
+            meta.update(scalars)
+            status = status or (row[0] if row else "queued")
+            finished_at = now if status in FINISHED_STATUSES else None
+            conn.execute(
+                """INSERT INTO jobs (job_id, status, meta, created_at, updated_at, finished_at)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(job_id) DO UPDATE SET
+                     status = excluded.status, meta = excluded.meta, updated_at = excluded.updated_at,
+                     finished_at = excluded.finished_at,
+                     version = jobs.version + 1""",
+                (job_id, status, json.dumps(meta), now, now, finished_at),
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO job_data (job_id, key, value) VALUES (?, ?, ?)",
+                [(job_id, k, json.dumps(v)) for k, v in payloads.items()],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def create(self, job_id: str, **fields) -> None:
+        self.evict()
+        fields.setdefault("status", "queued")
+        self._write(job_id, fields, create=True)
+
+    def update(self, job_id: str, **fields) -> None:
+        self._write(job_id, fields)
+
+    def incr(self, job_id: str, field: str, by: int = 1) -> None:
+        conn = self._conn()
+        fence = _fence.get()
+        lease = fence[1] if fence is not None and fence[0] == job_id else None
+        cur = conn.execute(
+            """UPDATE jobs SET meta = json_set(meta, '$.' || ?, COALESCE(json_extract(meta, '$.' || ?), 0) + ?),
+                   version = version + 1, updated_at = ?
+               WHERE job_id = ? AND (? IS NULL OR json_extract(meta, '$.lease') = ?)""",
+            (field, field, by, time.time(), job_id, lease, lease),
+        )
+        if cur.rowcount == 0 and lease is not None:
+            raise LeaseLostError(f"job {job_id} is no longer held by lease {lease}")
+
+    def _row(self, job_id: str) -> Optional[dict]:
+        row = self._conn().execute(
+            "SELECT status, meta, created_at, updated_at, finished_at, version FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        job = json.loads(row[1])
+        job.update(status=row[0], created_at=row[2], updated_at=row[3], version=row[5])
+        if row[4] is not None:
+            job["finished_at"] = row[4]
+        return job
+
+    def get(self, job_id: str, fields: Optional[list] = None) -> Optional[dict]:
+        """Full job, or the scalar fields plus only the payload `fields` requested."""
+        job = self._row(job_id)
+        if job is None:
+            return None
+        if fields is None:
+            rows = self._conn().execute("SELECT key, value FROM job_data WHERE job_id = ?", (job_id,)).fetchall()
+        elif fields:
+            marks = ",".join("?" * len(fields))
+            rows = self._conn().execute(
+                f"SELECT key, value FROM job_data WHERE job_id = ? AND key IN ({marks})", (job_id, *fields)
+            ).fetchall()
+        else:
+            rows = []
+        for key, value in rows:
+            job[key] = json.loads(value)
+        return job
+
+    def get_status(self, job_id: str) -> Optional[dict]:
+        """Status row only — never touches the stage payloads."""
+        return self._row(job_id)
+
+    def clear(self, job_id: str, *fields: str) -> None:
+        """Drop payload `fields` (e.g. the outputs of stages about to be redone)."""
+        if not fields:
+            return
+        conn = self._conn()
+        marks = ",".join("?" * len(fields))
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(f"DELETE FROM job_data WHERE job_id = ? AND key IN ({marks})", (job_id, *fields))
+            conn.execute("UPDATE jobs SET version = version + 1, updated_at = ? WHERE job_id = ?", (time.time(), job_id))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, job_id: str) -> None:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM job_data WHERE job_id = ?", (job_id,))
+        conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+        conn.execute("COMMIT")
+
+    def evict(self) -> int:
+        """Drop finished jobs past the TTL, then the oldest beyond JOB_MAX_FINISHED."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            stale = [r[0] for r in conn.execute(
+                "SELECT job_id FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+                (time.time() - self.ttl_seconds,),
+            )]
+            stale += [r[0] for r in conn.execute(
+                """SELECT job_id FROM jobs WHERE finished_at IS NOT NULL AND finished_at >= ?
+                   ORDER BY finished_at DESC LIMIT -1 OFFSET ?""",
+                (time.time() - self.ttl_seconds, self.max_finished),
+            )]
+            conn.executemany("DELETE FROM job_data WHERE job_id = ?", [(j,) for j in stale])
+            conn.executemany("DELETE FROM jobs WHERE job_id = ?", [(j,) for j in stale])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return len(stale)
+
+
+def make_job_store():
+    if JOB_STORE == "memory":
+        return MemoryJobStore()
+    return SQLiteJobStore()
+
+
+job_store = make_job_store()
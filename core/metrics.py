@@ -0,0 +1,227 @@
+"""
+core/metrics.py — Pipeline instrumentation
+In-process counters and histograms rendered in Prometheus text format, plus a
+per-job timing breakdown collected through a context variable.
+"""
+
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Optional
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+SIZE_BUCKETS = (1000, 2500, 5000, 10000, 20000, 40000, 80000, 160000)
+
+_lock = threading.Lock()
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key: tuple, extra: dict = None) -> str:
+    items = list(key) + list((extra or {}).items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.values: dict = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.series: dict = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with _lock:
+            series = self.series.setdefault(key, {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self.series.items()):
+            for bound, count in zip(self.buckets, series["counts"]):
+                lines.append(f"{self.name}_bucket{_format_labels(key, {'le': f'{bound:g}'})} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, {'le': '+Inf'})} {series['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {series['sum']:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {series['count']}")
+        return lines
+
+
+STAGE_SECONDS = Histogram("procurex_stage_seconds", "Wall time per pipeline stage")
+LLM_CALL_SECONDS = Histogram("procurex_llm_call_seconds", "Wall time per LLM call, including rate-limit waits and retries")
+LLM_RATE_LIMIT_WAIT_SECONDS = Histogram("procurex_llm_rate_limit_wait_seconds", "Time spent waiting on the shared LLM rate limiter")
+LLM_PROMPT_CHARS = Histogram("procurex_llm_prompt_chars", "Prompt size in characters (system + user)", SIZE_BUCKETS)
+LLM_PROMPT_TOKENS = Counter("procurex_llm_prompt_tokens_total", "Prompt tokens reported by the model")
+LLM_COMPLETION_TOKENS = Counter("procurex_llm_completion_tokens_total", "Completion tokens reported by the model")
+LLM_RETRIES = Counter("procurex_llm_retries_total", "Transient LLM errors retried")
+LLM_ERRORS = Counter("procurex_llm_errors_total", "LLM calls that failed after retries")
+CACHE_LOOKUPS = Counter("procurex_cache_lookups_total", "Result cache lookups by stage and outcome")
+JOBS = Counter("procurex_jobs_total", "Finished jobs by outcome")
+CLASSIFIER_DECISIONS = Counter("procurex_classifier_decisions_total", "Local tender classifier decisions (uncertain goes to the LLM)")
+PARALLEL_SAVED_SECONDS = Histogram("procurex_parallel_saved_seconds", "Agent-stage wall time saved against running the stages serially")
+SPECULATION = Counter("procurex_speculation_total", "Speculative market runs by reconcile outcome (kept/rerun)")
+SPECULATION_WASTED_SECONDS = Histogram("procurex_speculation_wasted_seconds", "Speculative stage time thrown away when the speculation did not hold")
+STARTUP_SECONDS = Histogram("procurex_startup_seconds", "Process start-up time by phase (import/startup/prewarm)")
+
+REGISTRY = [
+    STAGE_SECONDS, LLM_CALL_SECONDS, LLM_RATE_LIMIT_WAIT_SECONDS, LLM_PROMPT_CHARS,
+    LLM_PROMPT_TOKENS, LLM_COMPLETION_TOKENS, LLM_RETRIES, LLM_ERRORS, CACHE_LOOKUPS, JOBS,
+    CLASSIFIER_DECISIONS, PARALLEL_SAVED_SECONDS, SPECULATION, SPECULATION_WASTED_SECONDS, STARTUP_SECONDS,
+]
+
+
+def render_prometheus() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class JobTimings:
+    """Per-job breakdown: stage wall times and every LLM call made on the job's behalf."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: dict = {}
+        self.llm_calls: list = []
+        self.cache_hits: dict = {}
+        self.graphs: dict = {}
+        self._lock = threading.Lock()
+
+    def add_stage(self, stage: str, seconds: float):
+        with self._lock:
+            self.stages[stage] = round(self.stages.get(stage, 0) + seconds, 3)
+
+    def add_llm_call(self, call: dict):
+        with self._lock:
+            self.llm_calls.append(call)
+
+    def add_graph(self, name: str, report: dict):
+        """Critical-path report of one core.dag.run_graph run (one per profile in a batch)."""
+        with self._lock:
+            self.graphs[name] = report
+
+    def summary(self) -> dict:
+        with self._lock:
+            summary = {
+                "total_seconds": round(time.perf_counter() - self.started, 3),
+                "stages": dict(self.stages),
+                "llm_calls": list(self.llm_calls),
+                "prompt_tokens": sum(c.get("prompt_tokens", 0) for c in self.llm_calls),
+                "completion_tokens": sum(c.get("completion_tokens", 0) for c in self.llm_calls),
+                "cache_hits": dict(self.cache_hits),
+            }
+            if self.graphs:
+                summary["critical_path"] = dict(self.graphs)
+            return summary
+
+
+_current_job: contextvars.ContextVar = contextvars.ContextVar("procurex_job_timings", default=None)
+
+
+@contextmanager
+def job_scope():
+    """Collect timings for everything run in this context (threads need contextvars.copy_context)."""
+    timings = JobTimings()
+    token = _current_job.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_job.reset(token)
+
+
+def current_job() -> Optional[JobTimings]:
+    return _current_job.get()
+
+
+@contextmanager
+def stage(name: str):
+    """Time a pipeline stage into the histogram and the current job's breakdown."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        job = current_job()
+        if job is not None:
+            job.add_stage(name, elapsed)
+
+
+def record_cache(stage_name: str, hit: bool):
+    CACHE_LOOKUPS.inc(stage=stage_name, outcome="hit" if hit else "miss")
+    job = current_job()
+    if job is not None:
+        job.cache_hits[stage_name] = hit
+
+
+def record_llm_call(agent: str, seconds: float, waited: float, prompt_chars: int,
+                    prompt_tokens: int, completion_tokens: int, retries: int, ok: bool = True):
+    LLM_CALL_SECONDS.observe(seconds, agent=agent)
+    LLM_RATE_LIMIT_WAIT_SECONDS.observe(waited, agent=agent)
+    LLM_PROMPT_CHARS.observe(prompt_chars, agent=agent)
+    LLM_PROMPT_TOKENS.inc(prompt_tokens, agent=agent)
+    LLM_COMPLETION_TOKENS.inc(completion_tokens, agent=agent)
+    if retries:
+        LLM_RETRIES.inc(retries, agent=agent)
+    if not ok:
+        LLM_ERRORS.inc(agent=agent)
+    job = current_job()
+    if job is not None:
+        job.add_llm_call({
+            "agent": agent,
+            "seconds": round(seconds, 3),
+            "rate_limit_wait_seconds": round(waited, 3),
+            "prompt_chars": prompt_chars,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "retries": retries,
+            "ok": ok,
+        })
+
+
+def record_graph(name: str, report: dict):
+    PARALLEL_SAVED_SECONDS.observe(report["saved_seconds"])
+    if report.get("wasted_seconds"):
+        SPECULATION_WASTED_SECONDS.observe(report["wasted_seconds"])
+    job = current_job()
+    if job is not None:
+        job.add_graph(name, report)
+
+
+startup_profile: dict = {}
+
+
+def record_startup(phase: str, seconds: float, budget: float = None):
+    """Record a start-up phase for /health and /metrics, warning when it overruns its budget."""
+    over = budget is not None and seconds > budget
+    STARTUP_SECONDS.observe(seconds, phase=phase)
+    startup_profile[phase] = {"seconds": round(seconds, 3), "budget": budget, "over_budget": over}
+    if over:
+        print(f"[Startup] {phase} took {seconds:.2f}s, over its {budget:g}s budget")
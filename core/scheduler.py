@@ -0,0 +1,413 @@
+"""
+core/scheduler.py — Job scheduling with admission control
+A bounded queue of pipeline jobs, earliest submission deadline first, with
+per-source caps so one intake feed can't take every worker or queue slot
+while other sources wait. Two backends:
+- JobScheduler (EXECUTION_MODE=inline): async workers inside the API process,
+  blocking pipeline/agent calls run off the event loop via asyncio.to_thread.
+- DurableQueue (EXECUTION_MODE=queue): a SQLite queue drained by standalone
+  worker.py processes, with job leases kept alive by heartbeats; jobs whose
+  worker dies are re-queued up to QUEUE_MAX_ATTEMPTS times.
+"""
+
+import os
+import json
+import math
+import time
+import socket
+import asyncio
+import sqlite3
+import importlib
+import itertools
+import threading
+from pathlib import Path
+from collections import OrderedDict, Counter
+from typing import Callable, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PIPELINE_CONCURRENCY = int(os.getenv("PIPELINE_CONCURRENCY", "2"))
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "20"))
+SCHEDULER_SOURCE_SHARE = float(os.getenv("SCHEDULER_SOURCE_SHARE", "0.5"))
+SCHEDULER_SOURCE_QUEUE_SHARE = float(os.getenv("SCHEDULER_SOURCE_QUEUE_SHARE", "0.75"))
+# inline: jobs run in the API process; queue: the API only enqueues, worker.py processes run them
+EXECUTION_MODE = os.getenv("EXECUTION_MODE", "inline")
+QUEUE_DB_PATH = os.getenv("QUEUE_DB_PATH", "./data/queue.sqlite3")
+QUEUE_LEASE_SECONDS = float(os.getenv("QUEUE_LEASE_SECONDS", "60"))
+QUEUE_HEARTBEAT_SECONDS = float(os.getenv("QUEUE_HEARTBEAT_SECONDS", "15"))
+QUEUE_POLL_SECONDS = float(os.getenv("QUEUE_POLL_SECONDS", "1"))
+QUEUE_MAX_ATTEMPTS = int(os.getenv("QUEUE_MAX_ATTEMPTS", "3"))
+DEFAULT_SOURCE = "api"
+
+
+class QueueFullError(Exception):
+    """Raised when the scheduler can't admit another job."""
+    pass
+
+
+class JobScheduler:
+    def __init__(
+        self,
+        concurrency: int = PIPELINE_CONCURRENCY,
+        max_queue: int = PIPELINE_QUEUE_SIZE,
+        source_share: float = SCHEDULER_SOURCE_SHARE,
+        source_queue_share: float = SCHEDULER_SOURCE_QUEUE_SHARE,
+    ):
+        self.concurrency = max(1, concurrency)
+        self.max_queue = max_queue
+        # Per-source caps: workers only while other sources have jobs waiting; queue slots always,
+        # so a crawl can't fill the queue and turn interactive uploads away with 429s
+        self.source_workers = max(1, math.ceil(source_share * self.concurrency))
+        self.source_queue = max(1, math.ceil(source_queue_share * max_queue))
+        self._pending: "OrderedDict[str, dict]" = OrderedDict()
+        self._running: dict = {}
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workers: list = []
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.concurrency)]
+        print(f"[Scheduler] Started {self.concurrency} workers, queue size {self.max_queue}")
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def has_capacity(self, source: str = DEFAULT_SOURCE) -> bool:
+        if len(self._pending) >= self.max_queue:
+            return False
+        queued = sum(1 for entry in self._pending.values() if entry["source"] == source)
+        return queued < self.source_queue
+
+    def submit(self, job_id: str, fn: Callable, *args, source: str = DEFAULT_SOURCE, deadline: Optional[float] = None) -> int:
+        """
+        Queue `fn(*args)` from `source`, ordered by `deadline` (epoch seconds;
+        None sorts after every dated job). Returns the 1-based queue position.
+        Raises QueueFullError.
+        """
+        if not self.has_capacity(source):
+            raise QueueFullError(f"Queue full ({self.max_queue} jobs waiting)")
+        self._pending[job_id] = {"fn": fn, "args": args, "source": source, "deadline": deadline, "seq": next(self._seq)}
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return self.position(job_id)
+
+    def set_deadline(self, job_id: str, deadline: Optional[float]) -> bool:
+        """Re-prioritize a waiting job once a better deadline is known. False if it isn't waiting."""
+        entry = self._pending.get(job_id)
+        if entry is None:
+            return False
+        entry["deadline"] = deadline
+        return True
+
+    def waiting_for(self, tender_hash: str) -> list:
+        """Waiting jobs for the tender with this hash (pipelines take it as their fourth argument)."""
+        return [job_id for job_id, entry in list(self._pending.items())
+                if len(entry["args"]) > 3 and entry["args"][3] == tender_hash]
+
+    def _ordered(self) -> list:
+        return sorted(
+            self._pending.items(),
+            key=lambda item: (item[1]["deadline"] is None, item[1]["deadline"] or 0, item[1]["seq"]),
+        )
+
+    def position(self, job_id: str) -> Optional[int]:
+        """1-based position among waiting jobs, 0 if running, None if unknown/finished."""
+        if job_id in self._running:
+            return 0
+        for i, (pending_id, _) in enumerate(self._ordered()):
+            if pending_id == job_id:
+                return i + 1
+        return None
+
+    def stats(self) -> dict:
+        queued = Counter(entry["source"] for entry in self._pending.values())
+        running = Counter(self._running.values())
+        return {
+            "mode": "inline",
+            "queued": len(self._pending),
+            "running": len(self._running),
+            "concurrency": self.concurrency,
+            "max_queue": self.max_queue,
+            "sources": {s: {"queued": queued[s], "running": running[s]} for s in sorted(set(queued) | set(running))},
+        }
+
+    def _pick(self) -> str:
+        """Earliest deadline whose source is under its worker share; any job if every source is at its share."""
+        running = Counter(self._running.values())
+        ordered = self._ordered()
+        for job_id, entry in ordered:
+            if running[entry["source"]] < self.source_workers:
+                return job_id
+        return ordered[0][0]
+
+    async def _next(self) -> tuple:
+        while not self._pending:
+            self._wakeup.clear()
+            await self._wakeup.wait()
+        job_id = self._pick()
+        return job_id, self._pending.pop(job_id)
+
+    async def _worker(self, worker_id: int):
+        while True:
+            job_id, entry = await self._next()
+            self._running[job_id] = entry["source"]
+            try:
+                await asyncio.to_thread(entry["fn"], *entry["args"])
+            except Exception as e:
+                # Pipelines record their own failures; this only guards the worker loop
+                print(f"[Scheduler] Worker {worker_id} job {job_id} crashed: {e}")
+            finally:
+                self._running.pop(job_id, None)
+
+
+def task_name(fn: Callable) -> str:
+    return f"{fn.__module__}:{fn.__qualname__}"
+
+
+def resolve_task(name: str) -> Callable:
+    module, _, attr = name.partition(":")
+    return getattr(importlib.import_module(module), attr)
+
+
+class DurableQueue:
+    """
+    Drop-in for JobScheduler on the API side (submit/has_capacity/position/stats),
+    plus the lease/heartbeat/complete/reap calls used by workers.
+    Jobs are stored as a task name ("module:function") and JSON arguments.
+    """
+
+    def __init__(
+        self,
+        path: str = QUEUE_DB_PATH,
+        max_queue: int = PIPELINE_QUEUE_SIZE,
+        lease_seconds: float = QUEUE_LEASE_SECONDS,
+        max_attempts: int = QUEUE_MAX_ATTEMPTS,
+        source_share: float = SCHEDULER_SOURCE_SHARE,
+        source_queue_share: float = SCHEDULER_SOURCE_QUEUE_SHARE,
+    ):
+        self.path = path
+        self.max_queue = max_queue
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.source_share = source_share
+        self.source_queue = max(1, math.ceil(source_queue_share * max_queue))
+        self._local = threading.local()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn().executescript(
+            """
+            CREATE TABLE IF NOT EXISTS queue (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT UNIQUE NOT NULL,
+                task TEXT NOT NULL,
+                args TEXT NOT NULL,
+                source TEXT NOT NULL,
+                deadline REAL,
+                state TEXT NOT NULL DEFAULT 'queued',
+                worker_id TEXT,
+                lease_until REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                enqueued_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS queue_state ON queue (state, lease_until);
+            CREATE TABLE IF NOT EXISTS workers (
+                worker_id TEXT PRIMARY KEY,
+                host TEXT NOT NULL,
+                pid INTEGER NOT NULL,
+                slots INTEGER NOT NULL,
+                started_at REAL NOT NULL,
+                heartbeat_at REAL NOT NULL
+            );
+            """
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # --- API side (same surface as JobScheduler) ---
+
+    async def start(self):
+        print(f"[Queue] Enqueueing to {self.path} for standalone workers, queue size {self.max_queue}")
+
+    async def stop(self):
+        pass
+
+    def has_capacity(self, source: str = DEFAULT_SOURCE) -> bool:
+        total, mine = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(source = ?), 0) FROM queue WHERE state = 'queued'", (source,)
+        ).fetchone()
+        return total < self.max_queue and mine < self.source_queue
+
+    def submit(self, job_id: str, fn: Callable, *args, source: str = DEFAULT_SOURCE, deadline: Optional[float] = None) -> int:
+        """Persist `fn(*args)` (args must be JSON-serializable); returns the 1-based queue position."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if not self.has_capacity(source):
+                raise QueueFullError(f"Queue full ({self.max_queue} jobs waiting)")
+            conn.execute(
+                "INSERT INTO queue (job_id, task, args, source, deadline, enqueued_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, task_name(fn), json.dumps(args), source, deadline, time.time()),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return self.position(job_id)
+
+    def set_deadline(self, job_id: str, deadline: Optional[float]) -> bool:
+        cur = self._conn().execute(
+            "UPDATE queue SET deadline = ? WHERE job_id = ? AND state = 'queued'", (deadline, job_id)
+        )
+        return cur.rowcount > 0
+
+    def waiting_for(self, tender_hash: str) -> list:
+        return [r[0] for r in self._conn().execute(
+            "SELECT job_id FROM queue WHERE state = 'queued' AND json_extract(args, '$[3]') = ?", (tender_hash,)
+        )]
+
+    _ORDER = "ORDER BY deadline IS NULL, deadline, seq"
+
+    def position(self, job_id: str) -> Optional[int]:
+        """1-based position among waiting jobs, 0 if leased by a worker, None if unknown/finished."""
+        conn = self._conn()
+        row = conn.execute("SELECT state FROM queue WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        if row[0] == "leased":
+            return 0
+        ids = [r[0] for r in conn.execute(f"SELECT job_id FROM queue WHERE state = 'queued' {self._ORDER}")]
+        return ids.index(job_id) + 1
+
+    def stats(self) -> dict:
+        conn = self._conn()
+        sources = {}
+        for source, state, n in conn.execute("SELECT source, state, COUNT(*) FROM queue GROUP BY source, state"):
+            entry = sources.setdefault(source, {"queued": 0, "running": 0})
+            entry["queued" if state == "queued" else "running"] += n
+        workers, slots = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(slots), 0) FROM workers WHERE heartbeat_at > ?",
+            (time.time() - self.lease_seconds,),
+        ).fetchone()
+        return {
+            "mode": "queue",
+            "queued": sum(s["queued"] for s in sources.values()),
+            "running": sum(s["running"] for s in sources.values()),
+            "workers": workers,
+            "concurrency": slots,
+            "max_queue": self.max_queue,
+            "sources": dict(sorted(sources.items())),
+        }
+
+    # --- Worker side ---
+
+    def register_worker(self, worker_id: str, slots: int) -> None:
+        now = time.time()
+        self._conn().execute(
+            "INSERT OR REPLACE INTO workers (worker_id, host, pid, slots, started_at, heartbeat_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (worker_id, socket.gethostname(), os.getpid(), slots, now, now),
+        )
+
+    def unregister_worker(self, worker_id: str) -> None:
+        self._conn().execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+
+    def lease(self, worker_id: str) -> Optional[dict]:
+        """
+        Claim the next job for `worker_id`: earliest deadline whose source holds
+        fewer than its share of live worker slots, else the earliest overall.
+        Returns {"job_id", "task", "args", "attempts"} or None if nothing is waiting.
+        """
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            candidates = conn.execute(
+                f"SELECT job_id, task, args, source, attempts FROM queue WHERE state = 'queued' {self._ORDER}"
+            ).fetchall()
+            if not candidates:
+                conn.execute("COMMIT")
+                return None
+            slots = conn.execute(
+                "SELECT COALESCE(SUM(slots), 0) FROM workers WHERE heartbeat_at > ?", (now - self.lease_seconds,)
+            ).fetchone()[0]
+            cap = max(1, math.ceil(self.source_share * max(1, slots)))
+            running = dict(conn.execute("SELECT source, COUNT(*) FROM queue WHERE state = 'leased' GROUP BY source"))
+            job = next((c for c in candidates if running.get(c[3], 0) < cap), candidates[0])
+            conn.execute(
+                "UPDATE queue SET state = 'leased', worker_id = ?, lease_until = ?, attempts = attempts + 1 WHERE job_id = ?",
+                (worker_id, now + self.lease_seconds, job[0]),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return {"job_id": job[0], "task": job[1], "args": json.loads(job[2]), "attempts": job[4] + 1}
+
+    def heartbeat(self, worker_id: str, job_ids: list) -> list:
+        """Extend this worker's leases; returns the job_ids it no longer holds (lease expired and was reaped)."""
+        conn = self._conn()
+        now = time.time()
+        conn.execute("UPDATE workers SET heartbeat_at = ? WHERE worker_id = ?", (now, worker_id))
+        lost = []
+        for job_id in job_ids:
+            cur = conn.execute(
+                "UPDATE queue SET lease_until = ? WHERE job_id = ? AND worker_id = ? AND state = 'leased'",
+                (now + self.lease_seconds, job_id, worker_id),
+            )
+            if cur.rowcount == 0:
+                lost.append(job_id)
+        return lost
+
+    def complete(self, job_id: str, worker_id: str) -> None:
+        self._conn().execute("DELETE FROM queue WHERE job_id = ? AND worker_id = ?", (job_id, worker_id))
+
+    def reap(self) -> list:
+        """
+        Re-queue jobs whose lease expired, or drop them after max_attempts.
+        Returns [{"job_id", "args", "attempts", "requeued": bool}] so the caller can update the job store.
+        """
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            expired = conn.execute(
+                "SELECT job_id, args, attempts FROM queue WHERE state = 'leased' AND lease_until < ?", (now,)
+            ).fetchall()
+            out = []
+            for job_id, args, attempts in expired:
+                requeued = attempts < self.max_attempts
+                if requeued:
+                    conn.execute(
+                        "UPDATE queue SET state = 'queued', worker_id = NULL, lease_until = NULL WHERE job_id = ?", (job_id,)
+                    )
+                else:
+                    conn.execute("DELETE FROM queue WHERE job_id = ?", (job_id,))
+                out.append({"job_id": job_id, "args": json.loads(args), "attempts": attempts, "requeued": requeued})
+            conn.execute("DELETE FROM workers WHERE heartbeat_at < ?", (now - 10 * self.lease_seconds,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return out
+
+
+def make_scheduler():
+    if EXECUTION_MODE == "queue":
+        from .jobs import JOB_STORE
+        if JOB_STORE != "sqlite":
+            raise RuntimeError("EXECUTION_MODE=queue needs JOB_STORE=sqlite so workers and the API share job state")
+        return DurableQueue()
+    return JobScheduler()
+
+
+scheduler = make_scheduler()
@@ -0,0 +1,250 @@
+"""
+core/uploads.py — Streaming upload stage
+Copies an upload to disk chunk by chunk, enforcing the size limit, checking
+the PDF magic bytes and hashing the content on the way through. Bundles
+(several PDFs and/or ZIPs of PDFs) and files picked up from the local intake
+directory go through the same checks.
+"""
+
+import os
+import re
+import time
+import shutil
+import hashlib
+import zipfile
+from pathlib import Path
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+BUNDLE_MAX_BYTES = int(os.getenv("BUNDLE_MAX_BYTES", str(100 * 1024 * 1024)))
+BUNDLE_MAX_FILES = int(os.getenv("BUNDLE_MAX_FILES", "50"))
+INTAKE_DIR = os.getenv("INTAKE_DIR", "")
+UPLOAD_CHUNK_BYTES = 256 * 1024
+PDF_MAGIC = b"%PDF-"
+ZIP_MAGIC = b"PK\x03\x04"
+# Slack for the multipart envelope and the other form fields
+MULTIPART_SLACK_BYTES = 64 * 1024
+
+
+
+def too_large(max_bytes: int, what: str = "file") -> HTTPException:
+    """413 quoting the limit that was actually applied (`what`: file, bundle or batch)."""
+    limit = f"{max_bytes / (1024 * 1024):g}MB"
+    if what == "file":
+        return HTTPException(status_code=413, detail=f"File too large. Please upload a PDF under {limit}.")
+    return HTTPException(status_code=413, detail=f"{what.capitalize()} too large. Please keep it under {limit}.")
+
+
+def check_content_length(content_length: str, max_bytes: int = MAX_UPLOAD_BYTES, what: str = "file") -> None:
+    """Reject obviously oversize requests before the body is parsed."""
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes + MULTIPART_SLACK_BYTES:
+        raise too_large(max_bytes, what)
+
+
+class UploadLimitMiddleware:
+    """
+    ASGI middleware capping the request body of the upload routes. `limits` maps a
+    path to (max_bytes, what). A declared Content-Length is checked up front; the body
+    itself is counted as it is received, so a chunked request without one is cut off
+    before Starlette spools the whole multipart form to disk.
+    """
+
+    def __init__(self, app, limits: dict):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope.get("path")) if scope["type"] == "http" and scope["method"] == "POST" else None
+        if limit is None:
+            return await self.app(scope, receive, send)
+        max_bytes, what = limit
+        headers = dict(scope["headers"])
+        try:
+            check_content_length(headers.get(b"content-length", b"").decode("latin-1"), max_bytes, what)
+        except HTTPException as e:
+            return await JSONResponse(status_code=e.status_code, content={"detail": e.detail})(scope, receive, send)
+
+        received = 0
+
+        async def counted_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes + MULTIPART_SLACK_BYTES:
+                    # FastAPI passes an HTTPException raised while reading the form through to its handler
+                    raise too_large(max_bytes, what)
+            return message
+
+        await self.app(scope, counted_receive, send)
+
+
+async def save_upload(file: UploadFile, dest_path: str, max_bytes: int = MAX_UPLOAD_BYTES, magic: tuple = (PDF_MAGIC,),
+                      what: str = "file") -> dict:
+    """
+    Stream `file` to `dest_path`. Returns {"path", "size", "sha256"}.
+    Raises HTTPException (and removes the partial file) on non-PDF (or other `magic`) input,
+    or 413 past `max_bytes` (see too_large for `what`).
+    """
+    digest = hashlib.sha256()
+    size = 0
+    Path(dest_path).parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with open(dest_path, "wb") as out:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                if size == 0 and not chunk.startswith(magic):
+                    raise HTTPException(status_code=400, detail=_type_error(magic))
+                size += len(chunk)
+                if size > max_bytes:
+                    raise too_large(max_bytes, what)
+                digest.update(chunk)
+                out.write(chunk)
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Uploaded file is empty.")
+    except BaseException:
+        try:
+            os.remove(dest_path)
+        except OSError:
+            pass
+        raise
+
+    return {"path": dest_path, "size": size, "sha256": digest.hexdigest()}
+
+
+def resolve_intake_path(path: str) -> Path:
+    """`path` resolved inside INTAKE_DIR; HTTPException 400 if intake is disabled or the path escapes it."""
+    if not INTAKE_DIR:
+        raise HTTPException(status_code=400, detail="Local paths are disabled (INTAKE_DIR is not set).")
+    root = Path(INTAKE_DIR).resolve()
+    resolved = (root / path).resolve()
+    if resolved != root and root not in resolved.parents:
+        raise HTTPException(status_code=400, detail=f"{path}: outside the intake directory.")
+    if not resolved.exists():
+        raise HTTPException(status_code=400, detail=f"{path}: not found.")
+    return resolved
+
+
+def copy_local(src_path: str, dest_path: str, max_bytes: int = MAX_UPLOAD_BYTES) -> dict:
+    """
+    Blocking counterpart of save_upload for a file already on this host: copies
+    it into the upload area (the pipeline deletes its input) with the same checks.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    Path(dest_path).parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with open(src_path, "rb") as src, open(dest_path, "wb") as out:
+            for chunk in iter(lambda: src.read(UPLOAD_CHUNK_BYTES), b""):
+                if size == 0 and not chunk.startswith(PDF_MAGIC):
+                    raise HTTPException(status_code=400, detail=_type_error((PDF_MAGIC,)))
+                size += len(chunk)
+                if size > max_bytes:
+                    raise too_large(max_bytes)
+                digest.update(chunk)
+                out.write(chunk)
+        if size == 0:
+            raise HTTPException(status_code=400, detail="File is empty.")
+    except BaseException:
+        try:
+            os.remove(dest_path)
+        except OSError:
+            pass
+        raise
+
+    return {"path": dest_path, "size": size, "sha256": digest.hexdigest()}
+
+
+def _type_error(magic: tuple) -> str:
+    return "Only PDF or ZIP files are accepted." if ZIP_MAGIC in magic else "Only PDF files are accepted."
+
+
+def safe_name(filename: str) -> str:
+    """Basename with anything unusual replaced — member names come from untrusted archives."""
+    name = re.sub(r"[^A-Za-z0-9._\- ]+", "_", Path(filename.replace("\\", "/")).name).strip(" .")
+    return name or "document.pdf"
+
+
+def unique_path(directory: Path, name: str) -> Path:
+    path = directory / name
+    n = 1
+    while path.exists():
+        path = directory / f"{Path(name).stem}_{n}{Path(name).suffix}"
+        n += 1
+    return path
+
+
+def extract_pdfs(zip_path: str, dest_dir: str, max_files: int = BUNDLE_MAX_FILES, max_bytes: int = BUNDLE_MAX_BYTES) -> list:
+    """
+    Unpack the PDF members of a ZIP into `dest_dir`, streaming each with the same
+    magic/size checks as a direct upload. Declared sizes in the archive are only used
+    to refuse an oversize bundle before anything is inflated; they are not trusted, so
+    the limits are enforced again on the bytes actually written.
+    Returns [{"path", "size", "sha256"}]; non-PDF members are skipped.
+    Raises HTTPException 400 on a bad archive or when the limits are exceeded — the
+    caller owns `dest_dir` and removes it.
+    """
+    out, total = [], 0
+    try:
+        with zipfile.ZipFile(zip_path) as archive:
+            members = [m for m in archive.infolist() if not m.is_dir() and not Path(m.filename).name.startswith(".")]
+            declared = [m.file_size for m in members if m.filename.lower().endswith(".pdf")]
+            if any(size > MAX_UPLOAD_BYTES for size in declared):
+                raise too_large(MAX_UPLOAD_BYTES)
+            if sum(declared) > max_bytes:
+                raise too_large(BUNDLE_MAX_BYTES, "bundle")
+            if len(declared) > max_files:
+                raise HTTPException(status_code=400, detail=f"At most {max_files} PDFs per bundle.")
+            for member in members:
+                with archive.open(member) as src:
+                    head = src.read(len(PDF_MAGIC))
+                    if head != PDF_MAGIC:
+                        continue
+                    if len(out) >= max_files:
+                        raise HTTPException(status_code=400, detail=f"At most {max_files} PDFs per bundle.")
+                    dest = unique_path(Path(dest_dir), safe_name(member.filename))
+                    digest = hashlib.sha256(head)
+                    size = len(head)
+                    with open(dest, "wb") as f:
+                        f.write(head)
+                        for chunk in iter(lambda: src.read(UPLOAD_CHUNK_BYTES), b""):
+                            size += len(chunk)
+                            if size > MAX_UPLOAD_BYTES:
+                                raise too_large(MAX_UPLOAD_BYTES)
+                            if total + size > max_bytes:
+                                raise too_large(BUNDLE_MAX_BYTES, "bundle")
+                            digest.update(chunk)
+                            f.write(chunk)
+                    total += size
+                    out.append({"path": str(dest), "size": size, "sha256": digest.hexdigest()})
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Could not read the ZIP archive.")
+    return out
+
+
+def remove_upload(path: str) -> None:
+    """Delete a single-file upload or a bundle directory."""
+    try:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+    except OSError:
+        pass
+
+
+def sweep_uploads(directory: Path, max_age_seconds: float) -> int:
+    """Delete uploads older than `max_age_seconds` — ones kept for a retry that never came."""
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for path in Path(directory).iterdir():
+        try:
+            if path.stat().st_mtime < cutoff:
+                remove_upload(str(path))
+                removed += 1
+        except OSError:
+            pass
+    return removed
@@ -119,6 +119,7 @@ export default function App() {
   const [activeTab, setActiveTab] = useState("strategy");
   const fileRef = useRef();
   const pollRef = useRef();
+  const streamRef = useRef();
 
   const handleDrop = (e) => {
     e.preventDefault(); setDragging(false);
@@ -140,6 +141,27 @@ export default function App() {
     }
   };
 
+  // Prefer the SSE stream; fall back to polling if it can't be opened or drops
+  const watchJob = (id) => {
+    if (!window.EventSource) {
+      pollRef.current = setInterval(() => pollStatus(id), 3000);
+      return;
+    }
+    const es = new EventSource(`${API_URL}/stream/${id}`);
+    streamRef.current = es;
+    es.addEventListener("status", (e) => setStage(JSON.parse(e.data).status));
+    es.addEventListener("complete", (e) => {
+      es.close(); setStage("complete"); setResult(JSON.parse(e.data)); setStep("results");
+    });
+    es.addEventListener("failed", (e) => {
+      es.close(); setError(JSON.parse(e.data).error); setStep("upload");
+    });
+    es.onerror = () => {
+      es.close();
+      pollRef.current = setInterval(() => pollStatus(id), 3000);
+    };
+  };
+
   const analyze = async () => {
     if (!file) return;
     setError(null); setResult(null); setStage("ingesting"); setStep("processing");
@@ -164,7 +186,7 @@ export default function App() {
         setStep("upload");
         return;
       }
-      pollRef.current = setInterval(() => pollStatus(data.job_id), 3000);
+      watchJob(data.job_id);
     } catch {
       setError("Could not reach backend."); setStep("upload");
     }
@@ -174,6 +196,7 @@ export default function App() {
     setFile(null); setStage(null); setResult(null);
     setError(null); setActiveTab("strategy"); setStep("profile");
     clearInterval(pollRef.current);
+    streamRef.current?.close();
   };
 
   const bid = result?.bid_strategy;
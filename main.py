@@ -3,12 +3,19 @@ main.py — ProcureX FastAPI Application
 Multi-agent government tender analysis pipeline.
 """
 
+import time
+
+# Start-up profile: everything below, up to the app object, counts as import time
+IMPORT_STARTED = time.perf_counter()
+
 import os
-import shutil
+import json
 import uuid
+import asyncio
 from pathlib import Path
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional
@@ -16,18 +23,73 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-from rag.ingest import ingest_pdf
-from agents.extractor import run_extractor
-from agents.eligibility import run_eligibility_check
-from agents.market import run_market_intelligence
-from agents.strategy import run_strategy
+from rag.ingest import peek_text
+from rag.store import doc_store
+from rag.history import tender_history, value_inr, OUTCOMES
+from agents.deadlines import parse_deadline, sniff_deadline
+from core.cache import result_cache, hash_bundle
+from core.uploads import (
+    save_upload, UploadLimitMiddleware, extract_pdfs, safe_name, unique_path, remove_upload, sweep_uploads,
+    resolve_intake_path, copy_local, too_large, PDF_MAGIC, ZIP_MAGIC, MAX_UPLOAD_BYTES, BUNDLE_MAX_BYTES, BUNDLE_MAX_FILES,
+)
+from core.scheduler import scheduler, QueueFullError, DEFAULT_SOURCE, task_name, resolve_task
+from core.jobs import job_store, JOB_TTL_SECONDS
+from core.events import job_events, PARTIAL_PAYLOAD
+from core.metrics import render_prometheus, record_startup, startup_profile
+from agents.llm import prewarm, warm_state
+from pipeline import run_pipeline, run_batch_pipeline, resume_point, BATCH_MAX_PROFILES, STAGES
+
+INTAKE_MAX_FILES = int(os.getenv("INTAKE_MAX_FILES", "100"))
+# background: load the LLM stack once the server is up; startup: before it binds; off: on the first job
+PREWARM = os.getenv("PREWARM", "background").lower()
+PREWARM_DELAY_SECONDS = float(os.getenv("PREWARM_DELAY_SECONDS", "1"))
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "1.5"))
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "2.5"))
+PREWARM_BUDGET_SECONDS = float(os.getenv("PREWARM_BUDGET_SECONDS", "10"))
+
+
+async def _prewarm(delay: float = 0.0):
+    await asyncio.sleep(delay)
+    state = await asyncio.to_thread(prewarm)
+    record_startup("prewarm", state.get("seconds", 0.0), PREWARM_BUDGET_SECONDS)
+    print(f"[Startup] LLM stack {state['state']} in {state.get('seconds', 0.0):.2f}s")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Uploads kept for a retry live as long as their job
+    sweep_uploads(UPLOAD_DIR, JOB_TTL_SECONDS)
+    await scheduler.start()
+    warming = None
+    if PREWARM == "startup":
+        await _prewarm()
+    elif PREWARM == "background":
+        # The delay lets uvicorn bind and answer health checks before the imports take the GIL
+        warming = asyncio.create_task(_prewarm(PREWARM_DELAY_SECONDS))
+    record_startup("startup", time.perf_counter() - IMPORT_STARTED, STARTUP_BUDGET_SECONDS)
+    yield
+    if warming is not None:
+        warming.cancel()
+    await scheduler.stop()
+
 
 app = FastAPI(
     title="ProcureX — Government Tender Analyzer",
     description="Multi-agent AI system for analyzing government tenders using LangChain + Gemini",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
+
+app.add_middleware(UploadLimitMiddleware, limits={
+    "/analyze": (MAX_UPLOAD_BYTES, "file"),
+    "/webhook": (MAX_UPLOAD_BYTES, "file"),
+    "/analyze/bundle": (BUNDLE_MAX_BYTES, "bundle"),
+    "/analyze/batch": (BUNDLE_MAX_BYTES, "batch"),
+    "/webhook/batch": (BUNDLE_MAX_BYTES, "batch"),
+})
+
+# Registered last so CORS headers also wrap early rejections above
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -35,11 +97,17 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+record_startup("import", time.perf_counter() - IMPORT_STARTED, IMPORT_BUDGET_SECONDS)
+
+# Absolute, so queued jobs still resolve from a worker started elsewhere
+UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "./uploads")).resolve()
+UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
-UPLOAD_DIR = Path("./uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
 
-jobs: dict = {}
+
+class TenderOutcome(BaseModel):
+    outcome: str
+    award_value_inr: Optional[str] = None
 
 
 class CompanyProfile(BaseModel):
@@ -54,75 +122,110 @@ class CompanyProfile(BaseModel):
     msme_registered: bool = True
 
 
+class RerunRequest(BaseModel):
+    from_stage: str = "eligibility"
+    profile: Optional[CompanyProfile] = None
+
+
 @app.get("/")
 def root():
     return {
         "service": "ProcureX",
         "status": "running",
-        "endpoints": ["/analyze", "/status/{job_id}", "/health"]
+        "endpoints": ["/analyze", "/analyze/batch", "/analyze/bundle", "/webhook", "/webhook/batch", "/status/{job_id}", "/stream/{job_id}", "/retry/{job_id}", "/rerun/{job_id}", "/outcome/{job_id}", "/health", "/metrics"]
     }
 
 
 @app.get("/health")
 def health():
-    return {"status": "ok", "google_api_key_set": bool(os.getenv("GOOGLE_API_KEY"))}
+    return {"status": "ok", "google_api_key_set": bool(os.getenv("GOOGLE_API_KEY")),
+            "scheduler": scheduler.stats(), "doc_store": doc_store.stats(),
+            "llm": warm_state(), "startup": startup_profile}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text exposition of stage, LLM and cache metrics."""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+def _queue_full() -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Too many tenders in the queue right now. Please retry in a minute.",
+        headers={"Retry-After": "30"},
+    )
+
+
+def _known_deadline(upload_path: str, tender_hash: str) -> tuple:
+    """
+    (deadline, how) before the job runs: the extracted deadline if this tender was
+    analysed before (feeds re-send the same documents), else a sniff of the first pages.
+    """
+    cached = result_cache.get(f"extraction:{tender_hash}")
+    if cached:
+        deadline = parse_deadline((cached.get("extraction") or {}).get("submission_deadline"))
+        if deadline:
+            return deadline, "extraction"
+    paths = sorted(Path(upload_path).iterdir()) if os.path.isdir(upload_path) else [Path(upload_path)]
+    for path in paths:
+        try:
+            deadline = sniff_deadline(peek_text(str(path)))
+        except Exception:
+            continue
+        if deadline:
+            return deadline, "sniffed"
+    return None, None
 
 
-def run_pipeline(job_id: str, pdf_path: str, company_profile: dict):
-    """Background task — runs the 4-agent pipeline."""
+async def _start_job(file: UploadFile, company_profile, pipeline=run_pipeline, source: str = DEFAULT_SOURCE) -> dict:
+    if not file.filename.endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Only PDF files are accepted.")
+    # Admission control before we spend disk I/O on the upload
+    if not scheduler.has_capacity(source):
+        raise _queue_full()
+
+    job_id = str(uuid.uuid4())[:8]
+    pdf_path = str(UPLOAD_DIR / f"{job_id}_{Path(file.filename).name}")
+    upload = await save_upload(file, pdf_path)
+    deadline = await asyncio.to_thread(_known_deadline, pdf_path, upload["sha256"])
+    return _submit_job(job_id, pdf_path, upload["sha256"], file.filename, company_profile, pipeline, source, deadline)
+
+
+def _submit_job(
+    job_id: str, upload_path: str, tender_hash: str, filename: str, company_profile,
+    pipeline=run_pipeline, source: str = DEFAULT_SOURCE, deadline: tuple = (None, None),
+) -> dict:
+    deadline, deadline_source = deadline
+    fields = {"deadline": deadline.isoformat(), "deadline_source": deadline_source} if deadline else {}
+    job_store.create(
+        job_id, status="queued", filename=filename, source=source, tender_hash=tender_hash,
+        upload_path=upload_path, pipeline=task_name(pipeline), profile=company_profile, **fields,
+    )
+    if pipeline is run_batch_pipeline:
+        job_store.update(job_id, profiles_total=len(company_profile))
+    # Tenders that have already closed go to the back with the undated ones
+    priority = deadline.timestamp() if deadline and deadline.timestamp() > time.time() else None
     try:
-        jobs[job_id]["status"] = "ingesting"
-        collection_name = f"tender_{job_id}"
-        context = ingest_pdf(pdf_path, collection_name=collection_name).get("text", "")
-        if not context or len(context.strip()) < 100:
-            jobs[job_id]["status"] = "failed"
-            jobs[job_id]["error"] = "This PDF appears to be image-based and contains no readable text. Please upload a text-based tender PDF from GeM, CPPP, or NIC portals."
-            jobs[job_id]["not_a_tender"] = True
-            return
-        
-
-        jobs[job_id]["status"] = "extracting"
-        extracted = run_extractor(collection_name=collection_name)
-        jobs[job_id]["extraction"] = extracted
-
-        jobs[job_id]["status"] = "eligibility_check"
-        eligibility = run_eligibility_check(extracted, company_profile)
-        jobs[job_id]["eligibility"] = eligibility
-
-        jobs[job_id]["status"] = "market_intelligence"
-        market = run_market_intelligence(extracted, eligibility)
-        jobs[job_id]["market"] = market
-
-        jobs[job_id]["status"] = "strategy_synthesis"
-        strategy = run_strategy(extracted, eligibility, market)
-        jobs[job_id]["strategy"] = strategy
-
-        jobs[job_id]["status"] = "complete"
-        jobs[job_id]["result"] = {
-            "job_id": job_id,
-            "tender_extraction": extracted,
-            "eligibility_report": eligibility,
-            "market_intelligence": market,
-            "bid_strategy": strategy
-        }
+        position = scheduler.submit(
+            job_id, pipeline, job_id, upload_path, company_profile, tender_hash, source=source, deadline=priority,
+        )
+    except QueueFullError:
+        job_store.delete(job_id)
+        remove_upload(upload_path)
+        raise _queue_full()
 
-    except Exception as e:
-        error_msg = str(e)
-        jobs[job_id]["status"] = "failed"
-        jobs[job_id]["error"] = error_msg
-        # Flag as not-a-tender for frontend to show sarcastic message
-        if "NotATenderError" in str(type(e)) or any(phrase in error_msg for phrase in ["not a tender", "That's not a tender", "Nice try", "agents are confused", "Error 404: Tender"]):
-            jobs[job_id]["not_a_tender"] = True
-    finally:
-        try:
-            os.remove(pdf_path)
-        except Exception:
-            pass
+    return {
+        "job_id": job_id,
+        "message": "Analysis started. Poll /status/{job_id} for results.",
+        "poll_url": f"/status/{job_id}",
+        "queue_position": position,
+        "deadline": fields.get("deadline"),
+    }
 
 
 @app.post("/analyze")
 async def analyze_tender(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     company_name: str = Form("My Company"),
     domain_expertise: str = Form("software development, AI/ML"),
@@ -134,20 +237,6 @@ async def analyze_tender(
     registered_as: str = Form("Pvt Ltd"),
     msme_registered: bool = Form(True)
 ):
-    if not file.filename.endswith(".pdf"):
-        raise HTTPException(status_code=400, detail="Only PDF files are accepted.")
-
-    contents = await file.read()
-    if len(contents) > 10 * 1024 * 1024:  # 10MB
-        raise HTTPException(status_code=400, detail="File too large. Please upload a PDF under 10MB.")
-    await file.seek(0)
-
-    job_id = str(uuid.uuid4())[:8]
-    pdf_path = str(UPLOAD_DIR / f"{job_id}_{file.filename}")
-
-    with open(pdf_path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
-
     company_profile = {
         "name": company_name,
         "annual_turnover_cr": annual_turnover_cr,
@@ -159,41 +248,300 @@ async def analyze_tender(
         "registered_as": registered_as,
         "msme_registered": msme_registered
     }
-
-    jobs[job_id] = {"status": "queued", "filename": file.filename}
-    background_tasks.add_task(run_pipeline, job_id, pdf_path, company_profile)
-
-    return {
-        "job_id": job_id,
-        "message": "Analysis started. Poll /status/{job_id} for results.",
-        "poll_url": f"/status/{job_id}"
-    }
+    return await _start_job(file, company_profile)
 
 @app.post("/webhook")
 async def n8n_webhook(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
+    source: str = Form("n8n"),
 ):
-    return await analyze_tender(background_tasks, file)
+    return await _start_job(file, CompanyProfile().model_dump(), source=source)
+
+
+async def _receive_intake_item(item, source: str) -> dict:
+    """Store one batch item (an UploadFile or a local Path) and date it, without queueing it yet."""
+    name = item.name if isinstance(item, Path) else item.filename
+    if not name.lower().endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Only PDF files are accepted.")
+    if not scheduler.has_capacity(source):
+        raise _queue_full()
+    job_id = str(uuid.uuid4())[:8]
+    pdf_path = str(UPLOAD_DIR / f"{job_id}_{safe_name(name)}")
+    if isinstance(item, Path):
+        upload = await asyncio.to_thread(copy_local, str(item), pdf_path)
+    else:
+        upload = await save_upload(item, pdf_path)
+    deadline = await asyncio.to_thread(_known_deadline, pdf_path, upload["sha256"])
+    return {"job_id": job_id, "path": pdf_path, "sha256": upload["sha256"], "filename": name, "deadline": deadline}
+
+
+@app.post("/webhook/batch")
+async def n8n_webhook_batch(
+    files: Optional[list[UploadFile]] = File(None, description="Tender PDFs, one job each"),
+    paths: Optional[str] = Form(None, description="JSON array of PDF files or directories under INTAKE_DIR"),
+    source: str = Form("n8n"),
+):
+    """
+    Batch intake for crawlers: one job per tender, queued by submission deadline.
+    Each item is accepted or rejected on its own; 429 is only returned if none fit.
+    """
+    items = [(f.filename, f) for f in files or []]
+    if paths:
+        try:
+            raw_paths = json.loads(paths)
+            if not isinstance(raw_paths, list):
+                raise ValueError
+        except ValueError:
+            raise HTTPException(status_code=400, detail="paths must be a JSON array of strings.")
+        for raw in raw_paths:
+            try:
+                resolved = resolve_intake_path(str(raw))
+            except HTTPException as e:
+                items.append((str(raw), e))
+                continue
+            if resolved.is_dir():
+                items += [(str(raw).rstrip("/") + "/" + p.name, p) for p in sorted(resolved.glob("*.pdf"))]
+            else:
+                items.append((str(raw), resolved))
+    if not items:
+        raise HTTPException(status_code=400, detail="Send files and/or paths.")
+    if len(items) > INTAKE_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {INTAKE_MAX_FILES} tenders per batch.")
+
+    # Everything is stored and dated before anything is queued, so the batch drains in deadline order
+    received = []
+    for name, item in items:
+        try:
+            if isinstance(item, HTTPException):
+                raise item
+            received.append((name, await _receive_intake_item(item, source)))
+        except HTTPException as e:
+            received.append((name, e))
+
+    profile = CompanyProfile().model_dump()
+    jobs = []
+    for name, r in received:
+        try:
+            if isinstance(r, HTTPException):
+                raise r
+            entry = _submit_job(r["job_id"], r["path"], r["sha256"], r["filename"], profile,
+                                source=source, deadline=r["deadline"])
+            jobs.append({"filename": name, **entry})
+        except HTTPException as e:
+            jobs.append({"filename": name, "error": e.detail, "status_code": e.status_code})
+
+    accepted = sum(1 for j in jobs if "job_id" in j)
+    if not accepted and all(j["status_code"] == 429 for j in jobs):
+        raise _queue_full()
+    return {"source": source, "accepted": accepted, "rejected": len(jobs) - accepted, "jobs": jobs}
+
+
+@app.post("/analyze/batch")
+async def analyze_tender_batch(
+    file: UploadFile = File(...),
+    profiles: str = Form(..., description="JSON array of CompanyProfile objects"),
+):
+    """One tender against several company profiles — extraction runs once, results come back ranked."""
+    try:
+        raw_profiles = json.loads(profiles)
+        if not isinstance(raw_profiles, list) or not raw_profiles:
+            raise ValueError
+        company_profiles = [CompanyProfile(**p).model_dump() for p in raw_profiles]
+    except Exception:
+        raise HTTPException(status_code=400, detail="profiles must be a non-empty JSON array of company profiles.")
+    if len(company_profiles) > BATCH_MAX_PROFILES:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_PROFILES} profiles per batch.")
+
+    return await _start_job(file, company_profiles, pipeline=run_batch_pipeline)
+
+
+@app.post("/analyze/bundle")
+async def analyze_tender_bundle(
+    files: list[UploadFile] = File(..., description="Tender PDFs (NIT, BOQ, specs, corrigenda) and/or ZIPs of them"),
+    profile: Optional[str] = Form(None, description="CompanyProfile as JSON; defaults to the sample profile"),
+):
+    """Several documents of one tender, ingested concurrently into a single collection."""
+    try:
+        company_profile = CompanyProfile(**(json.loads(profile) if profile else {})).model_dump()
+    except Exception:
+        raise HTTPException(status_code=400, detail="profile must be a JSON company profile.")
+    if not scheduler.has_capacity():
+        raise _queue_full()
+
+    job_id = str(uuid.uuid4())[:8]
+    bundle_dir = UPLOAD_DIR / f"{job_id}_bundle"
+    bundle_dir.mkdir(parents=True)
+    try:
+        saved = []
+        for file in files:
+            name = safe_name(file.filename or "document.pdf")
+            # A ZIP may take whatever is left of the bundle budget; a PDF still has the per-file limit
+            remaining = BUNDLE_MAX_BYTES - sum(u["size"] for u in saved)
+            try:
+                upload = await save_upload(file, str(unique_path(bundle_dir, name)), max_bytes=remaining,
+                                           magic=(PDF_MAGIC, ZIP_MAGIC), what="bundle")
+            except HTTPException as e:
+                if e.status_code == 413:  # quote the bundle limit, not what was left of it
+                    raise too_large(BUNDLE_MAX_BYTES, "bundle")
+                raise
+            with open(upload["path"], "rb") as f:
+                is_zip = f.read(len(ZIP_MAGIC)) == ZIP_MAGIC
+            if not is_zip and upload["size"] > MAX_UPLOAD_BYTES:
+                raise too_large(MAX_UPLOAD_BYTES)
+            if is_zip:
+                saved += await asyncio.to_thread(
+                    extract_pdfs, upload["path"], str(bundle_dir), BUNDLE_MAX_FILES - len(saved), remaining,
+                )
+                os.remove(upload["path"])
+            else:
+                saved.append(upload)
+            if len(saved) > BUNDLE_MAX_FILES:
+                raise HTTPException(status_code=400, detail=f"At most {BUNDLE_MAX_FILES} PDFs per bundle.")
+            if sum(u["size"] for u in saved) > BUNDLE_MAX_BYTES:
+                raise too_large(BUNDLE_MAX_BYTES, "bundle")
+        if not saved:
+            raise HTTPException(status_code=400, detail="The bundle contains no PDF files.")
+    except BaseException:
+        remove_upload(str(bundle_dir))
+        raise
+
+    bundle_hash = hash_bundle([u["sha256"] for u in saved])
+    deadline = await asyncio.to_thread(_known_deadline, str(bundle_dir), bundle_hash)
+    label = f"{len(saved)} documents ({', '.join(Path(u['path']).name for u in saved[:3])}{', ...' if len(saved) > 3 else ''})"
+    return _submit_job(job_id, str(bundle_dir), bundle_hash, label, company_profile, deadline=deadline)
 
 
 @app.get("/status/{job_id}")
 def get_status(job_id: str):
-    if job_id not in jobs:
+    job = job_store.get_status(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    job = jobs[job_id]
-
     if job["status"] == "complete":
-        return JSONResponse(content=job["result"])
+        return JSONResponse(content=job_store.get(job_id, fields=["result"]).get("result"))
     elif job["status"] == "failed":
-        return JSONResponse(
-            status_code=500,
-            content={"job_id": job_id, "status": "failed", "error": job.get("error")}
-        )
+        content = {"job_id": job_id, "status": "failed", "error": job.get("error")}
+        if not job.get("not_a_tender"):
+            content["retry_url"] = f"/retry/{job_id}"
+        return JSONResponse(status_code=500, content=content)
     else:
-        return {
+        response = {
             "job_id": job_id,
             "status": job["status"],
             "message": f"Pipeline running... current stage: {job['status']}"
-        }
\ No newline at end of file
+        }
+        position = scheduler.position(job_id)
+        if job["status"] == "queued" and position:
+            response["queue_position"] = position
+            response["message"] = f"Queued — {position - 1} job(s) ahead of you."
+        if job.get("deadline"):
+            response["deadline"] = job["deadline"]
+        if "profiles_total" in job:
+            response["profiles_done"] = job.get("profiles_done", 0)
+            response["profiles_total"] = job["profiles_total"]
+        return response
+
+
+def _resume_job(job_id: str, job: dict, rerun_from: Optional[str] = None) -> dict:
+    """Re-queue a finished job; the pipeline skips every stage whose checkpoint still matches its inputs."""
+    first = resume_point(job.get("checkpoints") or {}, rerun_from)
+    if first == "extraction" and not os.path.exists(job.get("upload_path") or ""):
+        raise HTTPException(status_code=409, detail="The upload is gone, so extraction can't be redone. Please upload the tender again.")
+    source = job.get("source", DEFAULT_SOURCE)
+    if not scheduler.has_capacity(source):
+        raise _queue_full()
+    deadline = parse_deadline(job.get("deadline"))
+    priority = deadline.timestamp() if deadline and deadline.timestamp() > time.time() else None
+
+    checkpoints = job.get("checkpoints") or {}
+    # Outputs of the stages about to run again would otherwise reach /stream clients as new results
+    redo = [name for name in STAGES if (checkpoints.get(name) or {}).get("status") != "done"]
+    job_store.clear(job_id, *redo, PARTIAL_PAYLOAD)
+    job_store.update(job_id, status="queued", error=None, not_a_tender=False, rerun_from=rerun_from,
+                     profile=job["profile"], checkpoints=checkpoints)
+    try:
+        position = scheduler.submit(
+            job_id, resolve_task(job["pipeline"]), job_id, job["upload_path"], job["profile"], job["tender_hash"],
+            source=source, deadline=priority,
+        )
+    except QueueFullError:
+        job_store.update(job_id, status="failed", error=job.get("error"))
+        raise _queue_full()
+    return {
+        "job_id": job_id,
+        "message": f"Resuming from the {first} stage. Poll /status/{{job_id}} for results." if first
+                   else "Every stage is checkpointed; rebuilding the result.",
+        "poll_url": f"/status/{job_id}",
+        "queue_position": position,
+        "resume_from": first,
+    }
+
+
+def _finished_job(job_id: str) -> dict:
+    job = job_store.get(job_id, ["checkpoints", "profile"])
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if "pipeline" not in job:
+        raise HTTPException(status_code=409, detail="This job can't be resumed. Please upload the tender again.")
+    if job["status"] not in ("complete", "failed"):
+        raise HTTPException(status_code=409, detail=f"The job is still {job['status']}.")
+    return job
+
+
+@app.post("/retry/{job_id}")
+def retry_job(job_id: str):
+    """Resume a failed job from its first missing or failed stage, reusing every checkpointed one."""
+    job = _finished_job(job_id)
+    if job["status"] != "failed":
+        raise HTTPException(status_code=409, detail="Only failed jobs can be retried; use /rerun to redo a stage.")
+    if job.get("not_a_tender"):
+        raise HTTPException(status_code=409, detail="The document was rejected as not a tender; retrying won't change that.")
+    return _resume_job(job_id, job)
+
+
+@app.post("/rerun/{job_id}")
+def rerun_job(job_id: str, body: RerunRequest):
+    """
+    Re-run a job from `from_stage` on, optionally with an edited company profile.
+    Upstream stages are reused; a changed profile also invalidates every stage that depends on it.
+    """
+    job = _finished_job(job_id)
+    if body.from_stage not in STAGES:
+        raise HTTPException(status_code=400, detail=f"from_stage must be one of: {', '.join(STAGES)}")
+    if job.get("not_a_tender"):
+        raise HTTPException(status_code=409, detail="The document was rejected as not a tender.")
+    if body.profile is not None:
+        if job["pipeline"] != task_name(run_pipeline):
+            raise HTTPException(status_code=400, detail="Batch jobs can't take a single edited profile; submit a new batch.")
+        job["profile"] = body.profile.model_dump()
+    # Drop the checkpoints being redone so an interrupted re-run doesn't resume past them
+    redo = STAGES[STAGES.index(body.from_stage):]
+    job["checkpoints"] = {name: entry for name, entry in (job.get("checkpoints") or {}).items() if name not in redo}
+    return _resume_job(job_id, job, rerun_from=body.from_stage)
+
+
+@app.post("/outcome/{job_id}")
+def report_outcome(job_id: str, body: TenderOutcome):
+    """Record how an analysed tender ended (won/lost/not_bid/cancelled, award value) in the historical index."""
+    job = job_store.get_status(job_id)
+    if job is None or not job.get("tender_hash"):
+        raise HTTPException(status_code=404, detail="Job not found")
+    outcome = body.outcome.strip().lower()
+    if outcome not in OUTCOMES:
+        raise HTTPException(status_code=400, detail=f"outcome must be one of: {', '.join(OUTCOMES)}")
+    award = value_inr(body.award_value_inr) if body.award_value_inr else None
+    if not tender_history.update(job["tender_hash"], outcome=outcome, award_value_inr=award):
+        raise HTTPException(status_code=409, detail="This tender has not been analysed to completion yet.")
+    return {"job_id": job_id, "outcome": outcome, "award_value_inr": award}
+
+
+@app.get("/stream/{job_id}")
+async def stream_status(job_id: str, request: Request):
+    """Server-Sent Events: status transitions and stage results as they land, then complete/failed."""
+    if job_store.get_status(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        job_events(job_id, request.is_disconnected, position=scheduler.position),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,601 @@
+"""
+pipeline.py — ProcureX analysis pipelines
+Ingestion, extraction and the per-profile agent stages, run as one job per
+tender — by the API's in-process scheduler or by standalone workers (worker.py).
+"""
+
+import os
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from rag.ingest import ingest_pdf, ingest_bundle, release_collection, ImageBasedPDFError, IMAGE_BASED_MESSAGE
+from rag.dedup import tender_index, fingerprint, diff, DEDUP_ENABLED, DEDUP_MAX_CHANGED_RATIO
+from rag.history import tender_history, value_inr
+from agents.extractor import run_extractor
+from agents.eligibility import run_eligibility_check
+from agents.market import run_market_intelligence, MARKET_MODE
+from agents.strategy import run_strategy
+from agents.extractor import NotATenderError, run_partial_extractor, fields_touched
+from agents.eligibility import eligibility_inputs
+from agents.rules import evaluate as evaluate_rules, rules_only_report
+from agents.context import context_fingerprint
+from agents.deadlines import parse_deadline
+from core.cache import result_cache, hash_upload, hash_profile, hash_json
+from core.uploads import remove_upload
+from core.jobs import job_store, LeaseLostError
+from core.scheduler import scheduler
+from core.dag import Node, run_graph
+from core.metrics import job_scope, stage, record_cache, record_graph, JOBS, SPECULATION
+
+
+def _ingest_and_extract(job_id: str, pdf_path: str, collection_name: str, tender_hash: str) -> dict:
+    """Ingestion + extraction, shaped so the outcome (including rejections) can be cached."""
+    with stage("ingest"):
+        if os.path.isdir(pdf_path):
+            files = [(p.name, str(p)) for p in Path(pdf_path).iterdir() if p.is_file()]
+            ingested = ingest_bundle(files, collection_name=collection_name)
+        else:
+            ingested = ingest_pdf(pdf_path, collection_name=collection_name)
+    context = ingested.get("text", "")
+    ingest_stats = {
+        "num_pages": ingested.get("num_pages"),
+        "elapsed_ms": ingested.get("elapsed_ms"),
+        "slowest_pages": sorted(ingested.get("page_timings", []), key=lambda p: -p["ms"])[:5],
+    }
+    if "documents" in ingested:
+        ingest_stats.update(documents=ingested["documents"], skipped=ingested["skipped"])
+    job_store.update(job_id, ingest_stats=ingest_stats)
+    if not context or len(context.strip()) < 100:
+        return {"image_based": True}
+    job_store.update(job_id, status="extracting")
+
+    fp = None
+    if DEDUP_ENABLED:
+        with stage("dedup"):
+            fp = fingerprint(collection_name)
+            reused = _extract_from_near_duplicate(job_id, collection_name, tender_hash, fp)
+        if reused is not None:
+            tender_index.add(tender_hash, fp)
+            return reused
+
+    try:
+        with stage("extraction"):
+            extraction = run_extractor(collection_name=collection_name, on_field=_partial_publisher(job_id, "extraction"))
+    except NotATenderError as e:
+        return {"not_a_tender": str(e), "cacheable": e.cacheable}
+    if fp is not None and "error" not in extraction:
+        tender_index.add(tender_hash, fp)
+    return {"extraction": extraction}
+
+
+def _extract_from_near_duplicate(job_id: str, collection_name: str, tender_hash: str, fp: dict) -> Optional[dict]:
+    """
+    Reissue/corrigendum of a tender analysed before: start from its cached extraction and
+    re-extract only the fields the changed sections touch. Candidates are tried best first;
+    None means none of them could be reused, so run a full extraction.
+    """
+    for candidate in tender_index.candidates(fp, exclude=tender_hash):
+        prior = result_cache.get(f"extraction:{candidate['tender_hash']}")
+        if not prior or "extraction" not in prior:
+            continue
+        changes = diff(candidate, fp)
+        if changes["changed_ratio"] > DEDUP_MAX_CHANGED_RATIO:
+            continue
+
+        changed_text = changes["changed_text"]
+        fields = fields_touched(changed_text + "\n" + "\n".join(changes["removed_sections"]))
+        extraction = dict(prior["extraction"])
+        if fields:
+            with stage("extraction"):
+                updated = run_partial_extractor(
+                    collection_name, fields, changed_text, on_field=_partial_publisher(job_id, "extraction"),
+                )
+            if not updated:
+                continue
+            extraction.update(updated)
+
+        print(f"[Dedup] {collection_name}: near-duplicate of {candidate['tender_hash'][:12]} "
+              f"(similarity {candidate['similarity']}), re-extracted {fields or 'nothing'}")
+        return {"extraction": extraction, "near_duplicate": {
+            "of": candidate["tender_hash"],
+            "similarity": candidate["similarity"],
+            "changed_sections": changes["changed_sections"],
+            "removed_sections": changes["removed_sections"],
+            "changed_pages": changes["changed_pages"],
+            "reextracted_fields": fields,
+        }}
+    return None
+
+
+def _cacheable_extraction(outcome: dict) -> bool:
+    # A map-reduce extraction with failed section calls is served once but never cached,
+    # and neither is a rejection drawn from one
+    if "not_a_tender" in outcome:
+        return outcome.get("cacheable", True)
+    extraction = outcome.get("extraction", {})
+    return "error" not in extraction and not extraction.get("failed_sections")
+
+
+def _partial_publisher(job_id: str, stage: str):
+    """on_field hook for the agents — stores each streamed top-level field as it closes."""
+    fields = {}
+
+    def on_field(key, value):
+        fields[key] = value
+        job_store.update(job_id, partial={"stage": stage, "fields": fields})
+
+    return on_field
+
+
+# Checkpointed stages in pipeline order; a re-run from one recomputes it and everything after it
+STAGES = ("extraction", "history", "eligibility", "market", "strategy")
+
+
+class StageCheckpoints:
+    """
+    Stage outputs of one job, stored on the job together with the fingerprint of the
+    inputs they were computed from (the stage's result-cache key). A retry reuses every
+    stage whose fingerprint still matches and resumes at the first one that doesn't.
+    Stages from the job's `rerun_from` on also skip the result cache.
+    """
+
+    def __init__(self, job_id: str):
+        job = job_store.get(job_id, ["checkpoints", "near_duplicate", *STAGES]) or {}
+        self.job_id = job_id
+        self.entries = job.get("checkpoints") or {}
+        self.outputs = {name: job[name] for name in STAGES if name in job}
+        self.near_duplicate = job.get("near_duplicate")
+        rerun_from = job.get("rerun_from")
+        self.forced = set(STAGES[STAGES.index(rerun_from):]) if rerun_from in STAGES else set()
+        # Stages of the agent graph finish concurrently; writes go out one at a time
+        self._lock = threading.Lock()
+
+    def get(self, name: str, fingerprint: str):
+        """The stored output of `name` if it completed from the same inputs (and isn't being re-run), else None."""
+        entry = self.entries.get(name) or {}
+        if name in self.forced or entry.get("status") != "done" or entry.get("fingerprint") != fingerprint:
+            return None
+        return self.outputs.get(name)
+
+    def done(self, name: str, fingerprint: str, output, ok: bool = True, **fields) -> None:
+        # A degraded output (the agent's fallback stub) is kept for the result but redone on retry
+        with self._lock:
+            self.entries[name] = {"fingerprint": fingerprint, "status": "done" if ok else "degraded", "at": time.time()}
+            self.outputs[name] = output
+            job_store.update(self.job_id, checkpoints=dict(self.entries), **{name: output}, **fields)
+
+    def failed(self, name: str, fingerprint: str, error: Exception) -> None:
+        with self._lock:
+            self.entries[name] = {"fingerprint": fingerprint, "status": "failed", "error": str(error), "at": time.time()}
+            job_store.update(self.job_id, checkpoints=dict(self.entries))
+
+
+def resume_point(checkpoints: dict, rerun_from: Optional[str] = None) -> Optional[str]:
+    """First stage a retry (or a re-run from `rerun_from`) will actually run; None if all are done."""
+    for name in STAGES:
+        if name == rerun_from or (checkpoints.get(name) or {}).get("status") != "done":
+            return name
+    return None
+
+
+def _cached_stage(name: str, key: str, compute, should_cache, cache_hits: dict, checkpoints: StageCheckpoints = None):
+    """
+    result_cache.get_or_compute with the stage timed (only when it actually runs) and the hit recorded.
+    With `checkpoints`, a stage already completed from the same inputs is reused and the outcome is checkpointed.
+    """
+    def timed():
+        with stage(name):
+            return compute()
+
+    if checkpoints is not None:
+        reused = checkpoints.get(name, key)
+        if reused is not None:
+            cache_hits[name] = True
+            record_cache(name, True)
+            return reused
+    try:
+        if checkpoints is not None and name in checkpoints.forced:
+            value, hit = timed(), False
+            if should_cache(value):
+                result_cache.set(key, value)
+        else:
+            value, hit = result_cache.get_or_compute(key, timed, should_cache=should_cache)
+    except Exception as e:
+        if checkpoints is not None:
+            checkpoints.failed(name, key, e)
+        raise
+    if checkpoints is not None:
+        checkpoints.done(name, key, value, ok=should_cache(value))
+    cache_hits[name] = hit
+    record_cache(name, hit)
+    return value
+
+
+def _has_key(key: str):
+    """Cache predicate — agents fall back to a stub dict without `key` when the LLM reply doesn't parse."""
+    return lambda value: key in value
+
+
+NOT_A_TENDER_PHRASES = ["not a tender", "That's not a tender", "Nice try", "agents are confused", "Error 404: Tender"]
+
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_MAX_PROFILES = int(os.getenv("BATCH_MAX_PROFILES", "20"))
+SPECULATIVE_MARKET = os.getenv("SPECULATIVE_MARKET", "true").lower() == "true"
+SPECULATION_SCORE_TOLERANCE = float(os.getenv("SPECULATION_SCORE_TOLERANCE", "25"))
+
+
+def _extraction_stage(job_id: str, pdf_path: str, tender_hash: str, cache_hits: dict,
+                      checkpoints: StageCheckpoints = None) -> dict:
+    """
+    Ingestion + extraction (cached by PDF hash, checkpointed on the job). Returns
+    {"extraction", "near_duplicate"?}. Raises on image-only PDFs and non-tenders.
+    """
+    if checkpoints is not None:
+        reused = checkpoints.get("extraction", tender_hash)
+        if reused is not None:
+            cache_hits["extraction"] = True
+            record_cache("extraction", True)
+            return {"extraction": reused, "near_duplicate": checkpoints.near_duplicate}
+
+    collection_name = f"tender_{job_id}"
+    compute = lambda: _ingest_and_extract(job_id, pdf_path, collection_name, tender_hash)
+    # Ingest and extraction are timed individually inside _ingest_and_extract
+    try:
+        if checkpoints is not None and "extraction" in checkpoints.forced:
+            outcome, cache_hits["extraction"] = compute(), False
+            if _cacheable_extraction(outcome):
+                result_cache.set(f"extraction:{tender_hash}", outcome)
+        else:
+            outcome, cache_hits["extraction"] = result_cache.get_or_compute(
+                f"extraction:{tender_hash}", compute, should_cache=_cacheable_extraction,
+            )
+    except Exception as e:
+        if checkpoints is not None:
+            checkpoints.failed("extraction", tender_hash, e)
+        raise
+    record_cache("extraction", cache_hits["extraction"])
+    if outcome.get("image_based"):
+        raise ImageBasedPDFError(IMAGE_BASED_MESSAGE)
+    if outcome.get("not_a_tender"):
+        raise NotATenderError(outcome["not_a_tender"])
+    _reprioritize_waiting(tender_hash, outcome["extraction"])
+    if checkpoints is not None:
+        checkpoints.done(
+            "extraction", tender_hash, outcome["extraction"], ok=_cacheable_extraction(outcome),
+            near_duplicate=outcome.get("near_duplicate"), **_deadline_fields(outcome["extraction"]),
+        )
+    return outcome
+
+
+def _history_stage(tender_hash: str, extracted: dict, checkpoints: StageCheckpoints = None) -> dict:
+    """Record the tender in the historical index and return market stats from the tenders before it."""
+    fingerprint = hash_json(extracted)
+    if checkpoints is not None:
+        reused = checkpoints.get("history", fingerprint)
+        if reused is not None:
+            return reused
+    with stage("history"):
+        try:
+            deadline = parse_deadline(extracted.get("submission_deadline"))
+            tender_history.record(tender_hash, extracted, deadline.timestamp() if deadline else None)
+            stats = tender_history.market_stats(extracted, exclude=tender_hash)
+        except Exception as e:
+            # Market analysis still runs ungrounded; history is an aid, not a dependency
+            print(f"[History] {tender_hash[:12]}: {e}")
+            return {}
+    if checkpoints is not None:
+        checkpoints.done("history", fingerprint, stats)
+    return stats
+
+
+def _eligibility_key(extracted: dict, company_profile: dict) -> str:
+    return f"eligibility:{hash_json(eligibility_inputs(extracted))}:{hash_profile(company_profile)}"
+
+
+def _significant(value, digits: int = 2):
+    return float(f"{value:.{digits}g}") if isinstance(value, (int, float)) else None
+
+
+def _history_signature(history: dict) -> dict:
+    """
+    The history stats as the market cache key sees them. Every recorded tender shifts the
+    exact numbers, so only a material move re-runs the agent: the comparables doubling,
+    a percentile changing in its second significant figure, a win rate moving 10 points.
+    """
+    history = history or {}
+    rounded = lambda stats: {k: _significant(v) for k, v in (stats or {}).items()}
+    return {
+        "category": history.get("category"),
+        "scope": history.get("comparable_scope"),
+        "comparables": int(history.get("comparables") or 0).bit_length(),
+        "awards": int(history.get("awards_reported") or 0).bit_length(),
+        "values": rounded(history.get("value_percentiles_inr")),
+        "award_ratio": rounded(history.get("award_to_estimate_ratio")),
+        "estimate_decile": (history.get("estimate_percentile") or 0) // 10,
+        "win_rate": _significant(history.get("win_rate"), 1),
+        "authority_win_rate": _significant((history.get("authority") or {}).get("win_rate"), 1),
+    }
+
+
+def _market_key(extracted: dict, eligibility: dict, history: dict) -> str:
+    # Tender and eligibility as the prompt sees them; the history only coarsely
+    inputs = context_fingerprint("market", tender=extracted, eligibility=eligibility)
+    return f"market:{MARKET_MODE}:{inputs}:{hash_json(_history_signature(history))}"
+
+
+def speculation_holds(provisional: dict, eligibility: dict) -> bool:
+    """Whether a market analysis run on the rules-only eligibility still stands once the full check is in."""
+    if provisional == eligibility:
+        return True
+    if bool(provisional.get("overall_eligible")) != bool(eligibility.get("overall_eligible")):
+        return False
+    try:
+        gap = abs(float(provisional.get("eligibility_score") or 0) - float(eligibility.get("eligibility_score") or 0))
+    except (TypeError, ValueError):
+        return False
+    return gap <= SPECULATION_SCORE_TOLERANCE
+
+
+def _profile_stages(extracted: dict, company_profile: dict, cache_hits: dict, on_stage=None, publish=None,
+                    history: dict = None, checkpoints: StageCheckpoints = None, graph: str = "agents") -> tuple:
+    """
+    Eligibility → market → strategy for one company profile, run as a dependency graph
+    (core/dag.py). Each stage is cached by a fingerprint of its own inputs, so a
+    corrigendum that leaves an agent's inputs untouched reuses that agent's earlier result.
+    With SPECULATIVE_MARKET, market analysis starts alongside the eligibility check on the
+    rules-only eligibility verdict and is re-run only if the full verdict disagrees.
+    `publish(key)` returns the on_field hook used to stream that stage's fields.
+    """
+    on_stage = on_stage or (lambda stage, key, value: None)
+    publish = publish or (lambda key: None)
+
+    def eligibility_node():
+        on_stage("eligibility_check", None, None)
+        return _cached_stage(
+            "eligibility", _eligibility_key(extracted, company_profile),
+            lambda: run_eligibility_check(extracted, company_profile, on_field=publish("eligibility")),
+            _has_key("criteria_analysis"), cache_hits, checkpoints,
+        )
+
+    def market_run(eligibility: dict) -> dict:
+        on_stage("market_intelligence", None, None)
+        return _cached_stage(
+            "market", _market_key(extracted, eligibility, history),
+            lambda: run_market_intelligence(extracted, eligibility, on_field=publish("market"), history=history),
+            _has_key("pricing_intelligence"), cache_hits, checkpoints,
+        )
+
+    def strategy_node(eligibility: dict, market: dict) -> dict:
+        on_stage("strategy_synthesis", None, None)
+        return _cached_stage(
+            "strategy", f"strategy:{context_fingerprint('strategy', tender=extracted, eligibility=eligibility, market=market)}",
+            lambda: run_strategy(extracted, eligibility, market, on_field=publish("strategy")),
+            _has_key("win_strategy"), cache_hits, checkpoints,
+        )
+
+    # The deterministic rules are what the eligibility agent starts from, at no LLM cost;
+    # when they decide nothing there is no provisional verdict to speculate on
+    rules = evaluate_rules(extracted, company_profile)
+    speculative = SPECULATIVE_MARKET and bool(rules["decided"] or rules["disqualifiers"])
+    speculation, discarded = {}, set()
+    if speculative:
+        provisional = rules_only_report(rules)
+
+        def reconcile(eligibility: dict, speculative_market: dict) -> dict:
+            speculation["outcome"] = "kept" if speculation_holds(provisional, eligibility) else "rerun"
+            SPECULATION.inc(outcome=speculation["outcome"])
+            if speculation["outcome"] == "kept":
+                return speculative_market
+            discarded.add("speculative_market")
+            print(f"[Pipeline] eligibility moved from {provisional.get('eligibility_score')} to "
+                  f"{eligibility.get('eligibility_score')}; re-running market analysis")
+            return market_run(eligibility)
+
+        nodes = [
+            Node("eligibility", eligibility_node),
+            Node("speculative_market", lambda: market_run(provisional)),
+            Node("market", reconcile, ("eligibility", "speculative_market")),
+            Node("strategy", strategy_node, ("eligibility", "market")),
+        ]
+    else:
+        nodes = [
+            Node("eligibility", eligibility_node),
+            Node("market", market_run, ("eligibility",)),
+            Node("strategy", strategy_node, ("eligibility", "market")),
+        ]
+
+    outputs, report = run_graph(nodes, discarded=discarded)
+    if speculative:
+        report["speculation"] = speculation.get("outcome")
+    record_graph(graph, report)
+    return outputs["eligibility"], outputs["market"], outputs["strategy"]
+
+
+def _mark_failed(job_id: str, e: Exception, checkpoints: StageCheckpoints = None) -> bool:
+    """Record the failure; returns True when the upload should be kept for a retry (extraction never finished)."""
+    JOBS.inc(outcome="failed")
+    error_msg = str(e)
+    # Flag as not-a-tender for frontend to show sarcastic message
+    not_a_tender = isinstance(e, (NotATenderError, ImageBasedPDFError)) or any(phrase in error_msg for phrase in NOT_A_TENDER_PHRASES)
+    job_store.update(job_id, status="failed", error=error_msg, not_a_tender=not_a_tender)
+    return (
+        not not_a_tender and checkpoints is not None
+        and (checkpoints.entries.get("extraction") or {}).get("status") != "done"
+    )
+
+
+def run_pipeline(job_id: str, pdf_path: str, company_profile: dict, tender_hash: Optional[str] = None):
+    """Scheduled job — runs the 4-agent pipeline, resuming from the job's checkpoints on a retry."""
+    checkpoints, keep_upload = None, False
+    with job_scope() as timings:
+        try:
+            job_store.update(job_id, status="ingesting")
+            tender_hash = tender_hash or hash_upload(pdf_path)
+            cache_hits = {}
+            checkpoints = StageCheckpoints(job_id)
+
+            outcome = _extraction_stage(job_id, pdf_path, tender_hash, cache_hits, checkpoints)
+            extracted = outcome["extraction"]
+
+            def on_stage(stage, key, value):
+                # Outputs are written by the checkpoints; only the status is left to publish
+                if key is None:
+                    job_store.update(job_id, status=stage)
+
+            history = _history_stage(tender_hash, extracted, checkpoints)
+            eligibility, market, strategy = _profile_stages(
+                extracted, company_profile, cache_hits, on_stage,
+                publish=lambda key: _partial_publisher(job_id, key), history=history, checkpoints=checkpoints,
+            )
+            try:
+                tender_history.update(
+                    tender_hash, bid_decision=strategy.get("bid_decision"),
+                    recommended_bid_inr=value_inr((market.get("pricing_intelligence") or {}).get("recommended_bid_price_inr")),
+                )
+            except Exception as e:
+                # The analysis is complete; a history write isn't worth failing it over
+                print(f"[History] {tender_hash[:12]}: {e}")
+
+            job_store.update(job_id, status="complete", cache_hits=cache_hits, rerun_from=None, result={
+                "job_id": job_id,
+                "tender_extraction": extracted,
+                "eligibility_report": eligibility,
+                "market_intelligence": market,
+                "bid_strategy": strategy,
+                "near_duplicate": outcome.get("near_duplicate"),
+                "timings": timings.summary(),
+            })
+            JOBS.inc(outcome="complete")
+
+        except LeaseLostError as e:
+            # Another worker owns the job now; its state and upload are no longer ours to touch
+            keep_upload = True
+            print(f"[Pipeline] {job_id}: stopped, {e}")
+        except Exception as e:
+            keep_upload = _mark_failed(job_id, e, checkpoints)
+        finally:
+            release_collection(f"tender_{job_id}")
+            if not keep_upload:
+                remove_upload(pdf_path)
+
+
+BID_DECISION_RANK = {"BID": 0, "CONDITIONAL BID": 1, "NO BID": 2}
+
+
+def _rank_key(entry: dict):
+    strategy = entry.get("bid_strategy") or {}
+    eligibility = entry.get("eligibility_report") or {}
+    market = entry.get("market_intelligence") or {}
+    return (
+        0 if entry.get("error") is None else 1,
+        BID_DECISION_RANK.get(str(strategy.get("bid_decision", "")).upper(), 3),
+        -(_as_number(strategy.get("overall_score"))),
+        -(_as_number(eligibility.get("eligibility_score"))),
+        -(_as_number(market.get("win_probability"))),
+    )
+
+
+def _as_number(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def run_batch_pipeline(job_id: str, pdf_path: str, company_profiles: list, tender_hash: Optional[str] = None):
+    """Scheduled job — one ingestion/extraction, then per-profile stages fanned out with bounded concurrency."""
+    checkpoints, keep_upload = None, False
+    with job_scope() as timings:
+        try:
+            job_store.update(job_id, status="ingesting")
+            tender_hash = tender_hash or hash_upload(pdf_path)
+            cache_hits = {}
+            checkpoints = StageCheckpoints(job_id)
+
+            outcome = _extraction_stage(job_id, pdf_path, tender_hash, cache_hits, checkpoints)
+            extracted = outcome["extraction"]
+            job_store.update(job_id, status="evaluating_profiles", profiles_done=0)
+
+            # Per-profile stages aren't checkpointed; on a retry they come back from the result cache
+            history = _history_stage(tender_hash, extracted, checkpoints)
+
+            def evaluate(profile: dict) -> dict:
+                entry = {"company": profile.get("name"), "error": None}
+                try:
+                    eligibility, market, strategy = _profile_stages(
+                        extracted, profile, {}, history=history, graph=str(profile.get("name")),
+                    )
+                    entry.update(eligibility_report=eligibility, market_intelligence=market, bid_strategy=strategy)
+                except Exception as e:
+                    entry["error"] = str(e)
+                job_store.incr(job_id, "profiles_done")
+                return entry
+
+            # Each worker gets its own copy of this context so per-profile timings land on this job
+            with ThreadPoolExecutor(max_workers=max(1, BATCH_CONCURRENCY)) as pool:
+                futures = [pool.submit(contextvars.copy_context().run, evaluate, p) for p in company_profiles]
+                entries = [f.result() for f in futures]
+
+            ranked = sorted(entries, key=_rank_key)
+            comparison = []
+            for rank, entry in enumerate(ranked, start=1):
+                strategy = entry.get("bid_strategy") or {}
+                comparison.append({
+                    "rank": rank,
+                    "company": entry["company"],
+                    "bid_decision": strategy.get("bid_decision"),
+                    "overall_score": strategy.get("overall_score"),
+                    "eligibility_score": (entry.get("eligibility_report") or {}).get("eligibility_score"),
+                    "win_probability": (entry.get("market_intelligence") or {}).get("win_probability"),
+                    **entry,
+                })
+
+            job_store.update(job_id, status="complete", cache_hits=cache_hits, rerun_from=None, result={
+                "job_id": job_id,
+                "tender_extraction": extracted,
+                "best_entity": comparison[0]["company"] if comparison else None,
+                "comparison": comparison,
+                "near_duplicate": outcome.get("near_duplicate"),
+                "timings": timings.summary(),
+            })
+            JOBS.inc(outcome="complete")
+
+        except LeaseLostError as e:
+            # Another worker owns the job now; its state and upload are no longer ours to touch
+            keep_upload = True
+            print(f"[Pipeline] {job_id}: stopped, {e}")
+        except Exception as e:
+            keep_upload = _mark_failed(job_id, e, checkpoints)
+        finally:
+            release_collection(f"tender_{job_id}")
+            if not keep_upload:
+                remove_upload(pdf_path)
+
+
+def _deadline_fields(extracted: dict) -> dict:
+    """The extracted submission deadline as a job field, when it parses."""
+    deadline = parse_deadline(extracted.get("submission_deadline"))
+    return {"deadline": deadline.isoformat(), "deadline_source": "extraction"} if deadline else {}
+
+
+def _reprioritize_waiting(tender_hash: str, extracted: dict) -> None:
+    """
+    Move jobs still queued for this tender (feeds re-send the same documents) to its
+    extracted deadline, which beats whatever was sniffed from the first pages at intake.
+    """
+    fields = _deadline_fields(extracted)
+    if not fields:
+        return
+    deadline = parse_deadline(extracted.get("submission_deadline")).timestamp()
+    # Tenders that have already closed go to the back with the undated ones, as at intake
+    priority = deadline if deadline > time.time() else None
+    for job_id in scheduler.waiting_for(tender_hash):
+        if scheduler.set_deadline(job_id, priority):
+            job_store.update(job_id, **fields)
@@ -1,2 +1,3 @@
-from .ingest import ingest_pdf, load_vectorstore
-from .retriever import get_retriever, query_vectorstore
+from .ingest import ingest_pdf, ingest_bundle, load_vectorstore, load_pages, iter_pages, peek_text, release_collection
+from .retriever import get_retriever, query_vectorstore, build_context, FIELD_QUERIES
+from .store import doc_store
@@ -0,0 +1,89 @@
+"""
+rag/chunking.py — Page/section-aware chunking
+Splits the page-level text from ingest_pdf into heading-delimited sections
+and retrieval-sized chunks that never straddle a page.
+"""
+
+import re
+
+HEADING_PATTERNS = [
+    re.compile(r"^(section|chapter|part|annexure|appendix|schedule)\b[\s\-–:]*[\w.]*", re.IGNORECASE),
+    re.compile(r"^\d{1,2}(\.\d{1,2}){0,2}\.?\s+[A-Z][A-Za-z /&,()\-]{2,80}$"),
+    re.compile(r"^[IVX]{1,5}\.\s+[A-Z][A-Za-z /&,()\-]{2,80}$"),
+]
+
+
+def is_heading(line: str) -> bool:
+    """Cheap heading test: numbered titles, SECTION/ANNEXURE markers, or short ALL-CAPS lines."""
+    line = line.strip()
+    if not line or len(line) > 90 or line.endswith((",", ";")):
+        return False
+    if any(p.match(line) for p in HEADING_PATTERNS):
+        return True
+    letters = [c for c in line if c.isalpha()]
+    return len(letters) >= 4 and len(line.split()) <= 10 and all(c.isupper() for c in letters)
+
+
+def split_sections(pages: list) -> list:
+    """
+    Group page-level text into sections starting at detected headings.
+    Returns [{"heading", "start_page", "end_page", "text"}] in document order.
+    """
+    sections = []
+    current = {"heading": "Preamble", "start_page": 1, "end_page": 1, "lines": []}
+    for page in pages:
+        if page.get("source_page") == 1:
+            # Each document of a bundle opens its own section
+            if current["lines"]:
+                sections.append(current)
+            current = {"heading": page["source"], "start_page": page["page"], "end_page": page["page"], "lines": []}
+        for line in page["text"].splitlines():
+            if is_heading(line) and current["lines"]:
+                sections.append(current)
+                current = {"heading": line.strip(), "start_page": page["page"], "end_page": page["page"], "lines": []}
+            elif is_heading(line):
+                current["heading"] = line.strip()
+            current["lines"].append(line)
+            current["end_page"] = page["page"]
+    if current["lines"]:
+        sections.append(current)
+    return [
+        {"heading": s["heading"], "start_page": s["start_page"], "end_page": s["end_page"], "text": "\n".join(s["lines"])}
+        for s in sections
+    ]
+
+
+def chunk_pages(pages: list, max_chars: int = 1200, overlap_lines: int = 2) -> list:
+    """
+    Chunks of at most ~max_chars lines, broken at headings and page boundaries.
+    Each chunk carries its page number and the heading it falls under (plus its
+    source document and page within it, for bundles).
+    """
+    chunks = []
+    heading = "Preamble"
+
+    def flush(lines, page):
+        text = "\n".join(lines).strip()
+        if text:
+            chunk = {"id": len(chunks), "page": page["page"], "section": heading, "text": text}
+            if "source" in page:
+                chunk["source"], chunk["source_page"] = page["source"], page["source_page"]
+            chunks.append(chunk)
+
+    for page in pages:
+        if page.get("source_page") == 1:
+            heading = page["source"]
+        lines, size = [], 0
+        for line in page["text"].splitlines():
+            if is_heading(line):
+                flush(lines, page)
+                lines, size = [], 0
+                heading = line.strip()
+            elif size + len(line) > max_chars and lines:
+                flush(lines, page)
+                lines = lines[-overlap_lines:] if overlap_lines else []
+                size = sum(len(l) + 1 for l in lines)
+            lines.append(line)
+            size += len(line) + 1
+        flush(lines, page)
+    return chunks
@@ -0,0 +1,193 @@
+"""
+rag/dedup.py — Near-duplicate and corrigendum detection
+MinHash signatures over word shingles of ingested tender text, banded into an
+LSH index in SQLite, plus per-page and per-section fingerprints so a reissued
+tender can be diffed against the version analysed before.
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from dotenv import load_dotenv
+from .chunking import split_sections
+from .ingest import load_pages
+
+load_dotenv()
+
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() in ("1", "true", "yes")
+DEDUP_DB_PATH = os.getenv("DEDUP_DB_PATH", "./data/dedup.sqlite3")
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+DEDUP_MAX_CHANGED_RATIO = float(os.getenv("DEDUP_MAX_CHANGED_RATIO", "0.5"))
+
+NUM_PERM = 128
+BANDS = 16  # 16 bands x 8 rows: candidates from Jaccard ~0.7 up
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 5
+_MAX_HASH = (1 << 64) - 1
+
+
+def _normalize(text: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(_normalize(text).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def minhash(text: str, num_perm: int = NUM_PERM) -> list:
+    """
+    One-permutation MinHash: each shingle hash lands in one of `num_perm` bins
+    and keeps the bin minimum — one hash per shingle instead of one per permutation.
+    Empty bins borrow from the next filled bin (rotation densification).
+    """
+    words = _normalize(text).split()
+    signature = [_MAX_HASH] * num_perm
+    for i in range(max(1, len(words) - SHINGLE_WORDS + 1)):
+        shingle = " ".join(words[i:i + SHINGLE_WORDS])
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        b, v = h % num_perm, h // num_perm
+        if v < signature[b]:
+            signature[b] = v
+    filled = [i for i, v in enumerate(signature) if v != _MAX_HASH]
+    if filled and len(filled) < num_perm:
+        for i in range(num_perm):
+            if signature[i] == _MAX_HASH:
+                j = next((f for f in filled if f > i), filled[0])
+                signature[i] = signature[j] + (j - i) % num_perm
+    return signature
+
+
+def similarity(a: list, b: list) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a) if a else 0.0
+
+
+def fingerprint(collection_name: str) -> dict:
+    """Signature plus page and section digests of an ingested collection (page text kept for diffs, not indexed)."""
+    pages = load_pages(collection_name)
+    sections = split_sections(pages)
+    return {
+        "signature": minhash("\n".join(p["text"] for p in pages)),
+        "pages": [_digest(p["text"]) for p in pages],
+        "page_texts": [p["text"] for p in pages],
+        "sections": [{"heading": s["heading"], "digest": _digest(s["text"]), "text": s["text"],
+                      "start_page": s["start_page"], "end_page": s["end_page"]} for s in sections],
+    }
+
+
+def diff(old: dict, new: dict) -> dict:
+    """
+    Page/section diff of two fingerprints. Sections are matched by heading (and
+    occurrence); pages by content, so inserted pages don't mark the rest as changed.
+    """
+    def keyed(sections):
+        seen, out = {}, {}
+        for s in sections:
+            n = seen[s["heading"]] = seen.get(s["heading"], 0) + 1
+            out[(s["heading"], n)] = s
+        return out
+
+    old_sections, new_sections = keyed(old["sections"]), keyed(new["sections"])
+    changed = [s for k, s in new_sections.items() if k not in old_sections or old_sections[k]["digest"] != s["digest"]]
+    removed = [k[0] for k in old_sections if k not in new_sections]
+    old_pages = set(old["pages"])
+    changed_pages = [i + 1 for i, d in enumerate(new["pages"]) if d not in old_pages]
+    if new.get("page_texts") and changed_pages:
+        # Changed pages are the tighter description of what was amended
+        changed_text = "\n\n".join(new["page_texts"][p - 1] for p in changed_pages)
+    else:
+        changed_text = "\n\n".join(s.get("text", "") for s in changed)
+    return {
+        "changed_sections": [{"heading": s["heading"], "start_page": s["start_page"], "end_page": s["end_page"]} for s in changed],
+        "removed_sections": removed,
+        "changed_pages": changed_pages,
+        "changed_text": changed_text,
+        "removed_pages": len(old_pages - set(new["pages"])),
+        "changed_ratio": round(len(changed) / max(1, len(new_sections)), 3),
+    }
+
+
+class TenderIndex:
+    """LSH index of previously analysed tenders (SQLite), keyed by tender PDF hash."""
+
+    def __init__(self, path: str = DEDUP_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS tenders (
+                tender_hash TEXT PRIMARY KEY,
+                signature TEXT NOT NULL,
+                pages TEXT NOT NULL,
+                sections TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS bands (
+                band INTEGER NOT NULL,
+                bucket TEXT NOT NULL,
+                tender_hash TEXT NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS bands_lookup ON bands (band, bucket)")
+        self._conn.commit()
+
+    @staticmethod
+    def _buckets(signature: list) -> list:
+        return [
+            hashlib.blake2b(json.dumps(signature[b * ROWS:(b + 1) * ROWS]).encode(), digest_size=8).hexdigest()
+            for b in range(BANDS)
+        ]
+
+    def add(self, tender_hash: str, fp: dict) -> None:
+        # Section text is only needed for the new side of a diff; store digests only
+        sections = [{k: s[k] for k in ("heading", "digest", "start_page", "end_page")} for s in fp["sections"]]
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tenders (tender_hash, signature, pages, sections, created_at) VALUES (?, ?, ?, ?, ?)",
+                (tender_hash, json.dumps(fp["signature"]), json.dumps(fp["pages"]), json.dumps(sections), time.time()),
+            )
+            self._conn.execute("DELETE FROM bands WHERE tender_hash = ?", (tender_hash,))
+            self._conn.executemany(
+                "INSERT INTO bands (band, bucket, tender_hash) VALUES (?, ?, ?)",
+                [(b, bucket, tender_hash) for b, bucket in enumerate(self._buckets(fp["signature"]))],
+            )
+            self._conn.commit()
+
+    def remove(self, tender_hash: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM tenders WHERE tender_hash = ?", (tender_hash,))
+            self._conn.execute("DELETE FROM bands WHERE tender_hash = ?", (tender_hash,))
+            self._conn.commit()
+
+    def candidates(self, fp: dict, threshold: float = DEDUP_THRESHOLD, exclude: str = None) -> list:
+        """Indexed tenders sharing an LSH band with `fp`, with estimated similarity >= threshold, best first."""
+        buckets = self._buckets(fp["signature"])
+        with self._lock:
+            hashes = {
+                row[0] for b, bucket in enumerate(buckets)
+                for row in self._conn.execute("SELECT tender_hash FROM bands WHERE band = ? AND bucket = ?", (b, bucket))
+            }
+            hashes.discard(exclude)
+            rows = [
+                self._conn.execute("SELECT tender_hash, signature, pages, sections FROM tenders WHERE tender_hash = ?", (h,)).fetchone()
+                for h in hashes
+            ]
+        out = []
+        for row in filter(None, rows):
+            score = similarity(fp["signature"], json.loads(row[1]))
+            if score >= threshold:
+                out.append({"tender_hash": row[0], "similarity": round(score, 3),
+                            "pages": json.loads(row[2]), "sections": json.loads(row[3])})
+        return sorted(out, key=lambda c: -c["similarity"])
+
+
+tender_index = TenderIndex()
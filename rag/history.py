@@ -0,0 +1,303 @@
+"""
+rag/history.py — Historical tender index for market pricing
+Every extraction is recorded in SQLite (authority, category, estimated value
+in rupees, deadline, our bid decision and, once reported, the award outcome).
+Queries run on NumPy columns loaded from it: value percentiles per category,
+award frequency by authority and nearest similar past tenders.
+
+    python -m rag.history --backfill   # index extractions already in the result cache
+"""
+
+import os
+import re
+import sys
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from typing import Optional
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+HISTORY_DB_PATH = os.getenv("HISTORY_DB_PATH", "./data/history.sqlite3")
+HISTORY_MIN_COMPARABLES = int(os.getenv("HISTORY_MIN_COMPARABLES", "5"))
+
+RUPEES_PER_CRORE = 1e7
+FEATURE_DIM = 256
+OUTCOMES = ("won", "lost", "not_bid", "cancelled")
+
+# Checked in order; the category with the most keyword hits wins
+CATEGORY_KEYWORDS = {
+    "it_software": ["software", "application", "portal", "erp", "website", "cloud", "data centre", "data center",
+                    "digital", "it services", "artificial intelligence", "analytics", "e-governance"],
+    "it_hardware": ["computers", "laptops", "servers", "printers", "networking equipment", "desktop", "storage"],
+    "civil_works": ["construction", "civil work", "road", "building", "renovation", "bridge", "repair work"],
+    "electrical": ["electrical", "electrification", "transformer", "solar", "lighting", "substation"],
+    "consultancy": ["consultancy", "consultant", "advisory", "detailed project report", "feasibility", "dpr"],
+    "manpower_services": ["manpower", "security services", "housekeeping", "outsourcing", "facility management"],
+    "medical": ["medical", "hospital", "drugs", "pharmaceutical", "diagnostic", "surgical"],
+    "transport": ["hiring of vehicle", "vehicles", "transport", "logistics", "taxi"],
+}
+
+
+def categorize(extracted: dict) -> str:
+    text = " ".join(str(extracted.get(k) or "") for k in ("tender_title", "scope_of_work")).lower()
+    scores = {c: sum(1 for kw in kws if kw in text) for c, kws in CATEGORY_KEYWORDS.items()}
+    best = max(scores, key=scores.get)
+    return best if scores[best] else "other"
+
+
+def normalize_authority(name) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", str(name or "").lower())) or "unknown"
+
+
+def value_inr(value) -> Optional[float]:
+    """
+    Rupees from the extractor's free text ("₹2.5 Cr", "45,00,000"), or None. Only
+    unambiguous amounts count: "Rs 500" could mean rupees or crore and would skew the
+    percentiles either way, so it is dropped.
+    """
+    from agents.rules import parse_amount_cr  # agents import rag; keep rag importable on its own
+    crore = parse_amount_cr(value, strict=True, rupees=True)
+    return crore * RUPEES_PER_CRORE if crore else None
+
+
+def features(text: str) -> np.ndarray:
+    """L2-normalized hashed bag of words (unigrams + bigrams) for similar-tender lookup."""
+    words = re.findall(r"[a-z0-9]{2,}", text.lower())
+    vec = np.zeros(FEATURE_DIM, dtype=np.float32)
+    for token in words + [" ".join(p) for p in zip(words, words[1:])]:
+        h = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest(), "big")
+        vec[h % FEATURE_DIM] += 1.0 if h & 0x80000000 else -1.0
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+def _profile_text(extracted: dict) -> str:
+    return " ".join(str(extracted.get(k) or "") for k in ("tender_title", "scope_of_work", "technical_requirements"))[:4000]
+
+
+def _percentiles(values: np.ndarray, pcts=(10, 25, 50, 75, 90), digits: int = None) -> dict:
+    return {f"p{p}": round(float(v), digits) for p, v in zip(pcts, np.percentile(values, pcts))}
+
+
+class TenderHistory:
+    """SQLite-backed history with a lazily (re)loaded columnar view for aggregation."""
+
+    def __init__(self, path: str = HISTORY_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS history (
+                tender_hash TEXT PRIMARY KEY,
+                tender_number TEXT,
+                title TEXT,
+                authority TEXT NOT NULL,
+                category TEXT NOT NULL,
+                value_inr REAL,
+                deadline REAL,
+                bid_decision TEXT,
+                recommended_bid_inr REAL,
+                outcome TEXT,
+                award_value_inr REAL,
+                features BLOB NOT NULL,
+                recorded_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS history_updated ON history (updated_at)")
+        self._conn.commit()
+        self._columns = None
+        self._loaded_marker = None
+
+    def record(self, tender_hash: str, extracted: dict, deadline: Optional[float] = None) -> None:
+        """Insert or refresh a tender from its extraction; keeps any bid decision/outcome already stored."""
+        now = time.time()
+        row = (
+            tender_hash, extracted.get("tender_number"), extracted.get("tender_title"),
+            normalize_authority(extracted.get("issuing_authority")), categorize(extracted),
+            value_inr(extracted.get("estimated_value_inr")), deadline,
+            features(_profile_text(extracted)).astype(np.float16).tobytes(), now, now,
+        )
+        with self._lock:
+            self._conn.execute(
+                """INSERT INTO history (tender_hash, tender_number, title, authority, category, value_inr, deadline,
+                                        features, recorded_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (tender_hash) DO UPDATE SET tender_number = excluded.tender_number,
+                       title = excluded.title, authority = excluded.authority, category = excluded.category,
+                       value_inr = excluded.value_inr, deadline = excluded.deadline,
+                       features = excluded.features, updated_at = excluded.updated_at""",
+                row,
+            )
+            self._conn.commit()
+
+    def update(self, tender_hash: str, **fields) -> bool:
+        """Set bid_decision / recommended_bid_inr / outcome / award_value_inr. False if the tender isn't indexed."""
+        allowed = {k: v for k, v in fields.items() if k in ("bid_decision", "recommended_bid_inr", "outcome", "award_value_inr")}
+        if not allowed:
+            return False
+        sets = ", ".join(f"{k} = ?" for k in allowed)
+        with self._lock:
+            cur = self._conn.execute(
+                f"UPDATE history SET {sets}, updated_at = ? WHERE tender_hash = ?",
+                (*allowed.values(), time.time(), tender_hash),
+            )
+            self._conn.commit()
+        return cur.rowcount > 0
+
+    def _load(self) -> dict:
+        """Columnar snapshot, reloaded when any process has written since the last load."""
+        with self._lock:
+            marker = self._conn.execute("SELECT COUNT(*), MAX(updated_at) FROM history").fetchone()
+            if self._columns is not None and marker == self._loaded_marker:
+                return self._columns
+            rows = self._conn.execute(
+                """SELECT tender_hash, tender_number, title, authority, category, value_inr,
+                          outcome, award_value_inr, features FROM history"""
+            ).fetchall()
+        authorities, authority_codes = np.unique([r[3] for r in rows] or [""], return_inverse=True)
+        categories, category_codes = np.unique([r[4] for r in rows] or [""], return_inverse=True)
+        columns = {
+            "hash": [r[0] for r in rows],
+            "number": [r[1] for r in rows],
+            "title": [r[2] for r in rows],
+            "authorities": authorities,
+            "authority": authority_codes[:len(rows)].astype(np.int32),
+            "categories": categories,
+            "category": category_codes[:len(rows)].astype(np.int32),
+            "value": np.array([r[5] if r[5] else np.nan for r in rows], dtype=np.float64),
+            "outcome": np.array([r[6] or "" for r in rows], dtype=object),
+            "award": np.array([r[7] if r[7] else np.nan for r in rows], dtype=np.float64),
+            "features": (np.frombuffer(b"".join(r[8] for r in rows), dtype=np.float16)
+                         .reshape(len(rows), FEATURE_DIM).astype(np.float32)),
+        }
+        with self._lock:
+            self._columns, self._loaded_marker = columns, marker
+        return columns
+
+    def size(self) -> int:
+        return len(self._load()["hash"])
+
+    def market_stats(self, extracted: dict, exclude: str = None, neighbors: int = 5) -> dict:
+        """
+        Pricing and competition stats for `extracted` from past tenders (excluding
+        `exclude`, normally this tender's own hash). Comparables are tenders in the
+        same category, or all tenders when the category has fewer than
+        HISTORY_MIN_COMPARABLES priced entries.
+        """
+        cols = self._load()
+        n = len(cols["hash"])
+        own_value = value_inr(extracted.get("estimated_value_inr"))
+        category = categorize(extracted)
+        authority = normalize_authority(extracted.get("issuing_authority"))
+        keep = np.ones(n, dtype=bool)
+        if exclude is not None and exclude in cols["hash"]:
+            keep[cols["hash"].index(exclude)] = False
+
+        def code(names, name):
+            i = int(np.searchsorted(names, name))
+            return i if i < len(names) and names[i] == name else -1
+
+        in_category = keep & (cols["category"] == code(cols["categories"], category))
+        priced = ~np.isnan(cols["value"])
+        scope = "category"
+        if np.count_nonzero(in_category & priced) < HISTORY_MIN_COMPARABLES:
+            in_category, scope = keep, "all"
+        comparable = in_category & priced
+
+        stats = {"history_size": int(np.count_nonzero(keep)), "category": category,
+                 "comparables": int(np.count_nonzero(comparable)), "comparable_scope": scope}
+        values = cols["value"][comparable]
+        if len(values):
+            stats["value_percentiles_inr"] = _percentiles(values)
+            if own_value:
+                stats["estimate_percentile"] = round(float(np.mean(values <= own_value)) * 100)
+
+        # Award price relative to the estimate, where the award value was reported
+        awarded = comparable & ~np.isnan(cols["award"])
+        if np.count_nonzero(awarded):
+            ratios = cols["award"][awarded] / cols["value"][awarded]
+            stats["award_to_estimate_ratio"] = _percentiles(ratios, (25, 50, 75), digits=3)
+            stats["awards_reported"] = int(np.count_nonzero(awarded))
+
+        outcomes = cols["outcome"][in_category]
+        won, lost = int(np.count_nonzero(outcomes == "won")), int(np.count_nonzero(outcomes == "lost"))
+        if won + lost:
+            stats["win_rate"] = round(won / (won + lost), 3)
+
+        # Award frequency by authority within the comparables
+        codes, counts = np.unique(cols["authority"][in_category], return_counts=True)
+        top = np.argsort(-counts)[:5]
+        total = max(1, int(counts.sum()))
+        stats["top_authorities"] = [
+            {"authority": str(cols["authorities"][codes[i]]), "tenders": int(counts[i]), "share": round(counts[i] / total, 3)}
+            for i in top
+        ]
+
+        auth_mask = keep & (cols["authority"] == code(cols["authorities"], authority))
+        outcomes = cols["outcome"][auth_mask]
+        won, lost = int(np.count_nonzero(outcomes == "won")), int(np.count_nonzero(outcomes == "lost"))
+        auth_values = cols["value"][auth_mask & priced]
+        stats["authority"] = {
+            "name": authority,
+            "past_tenders": int(np.count_nonzero(auth_mask)),
+            "won": won,
+            "lost": lost,
+            "win_rate": round(won / (won + lost), 3) if won + lost else None,
+            "median_value_inr": round(float(np.median(auth_values))) if len(auth_values) else None,
+        }
+
+        if neighbors and np.count_nonzero(keep):
+            scores = cols["features"] @ features(_profile_text(extracted))
+            if own_value:
+                # Prefer neighbours of similar size: penalize each order of magnitude apart
+                gap = np.abs(np.log10(np.where(priced, cols["value"], own_value)) - np.log10(own_value))
+                scores = scores - 0.1 * gap
+            scores = np.where(keep, scores, -np.inf)
+            k = min(neighbors, int(np.count_nonzero(keep)))
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best])]
+            stats["similar_tenders"] = [
+                {"tender_number": cols["number"][i], "title": cols["title"][i],
+                 "authority": str(cols["authorities"][cols["authority"][i]]),
+                 "value_inr": None if np.isnan(cols["value"][i]) else round(float(cols["value"][i])),
+                 "outcome": cols["outcome"][i] or None, "similarity": round(float(scores[i]), 3)}
+                for i in best
+            ]
+        return stats
+
+
+tender_history = TenderHistory()
+
+
+def backfill() -> int:
+    """Index every extraction already in the result cache; returns how many were recorded."""
+    from core.cache import result_cache
+    from agents.deadlines import parse_deadline
+    recorded = 0
+    for key, outcome in result_cache.scan("extraction:"):
+        extracted = (outcome or {}).get("extraction") or {}
+        if not extracted or "error" in extracted:
+            continue
+        deadline = parse_deadline(extracted.get("submission_deadline"))
+        tender_history.record(key.split(":", 1)[1], extracted, deadline.timestamp() if deadline else None)
+        recorded += 1
+    return recorded
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ProcureX historical tender index")
+    parser.add_argument("--backfill", action="store_true", help="index extractions already in the result cache")
+    args = parser.parse_args()
+    if not args.backfill:
+        parser.print_help()
+        sys.exit(1)
+    print(f"[History] Recorded {backfill()} tenders; index now holds {tender_history.size()}")
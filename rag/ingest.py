@@ -1,34 +1,257 @@
 import os
+import re
+import time
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from pypdf import PdfReader
 from dotenv import load_dotenv
+from .store import doc_store
 
 load_dotenv()
 
-# Simple in-memory store — no ChromaDB, no embeddings
-_pdf_store = {}
+# Text lives in the byte-budgeted doc_store (rag.store) — no ChromaDB, no embeddings.
+# Page offsets are kept alongside as [(page_no, start, end), ...]; BM25 lives in rag.retriever.
 
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))
+INGEST_PARALLEL_MIN_PAGES = int(os.getenv("INGEST_PARALLEL_MIN_PAGES", "24"))
+INGEST_PAGES_PER_TASK = int(os.getenv("INGEST_PAGES_PER_TASK", "8"))
+SLOW_PAGE_MS = float(os.getenv("INGEST_SLOW_PAGE_MS", "500"))
+# Page-range tasks in flight per worker while ingesting a bundle
+BUNDLE_TASKS_PER_WORKER = int(os.getenv("BUNDLE_TASKS_PER_WORKER", "2"))
 
-def ingest_pdf(pdf_path: str, collection_name: str = "tender_docs") -> dict:
-    """Extract text from PDF and store in memory."""
+# Bundle ordering: the notice first, amendments last, everything else by name in between
+MAIN_DOC_PATTERN = re.compile(r"\b(nit|notice|tender|rfp|main)\b", re.IGNORECASE)
+AMENDMENT_PATTERN = re.compile(r"corrigend|addend|amendment|clarification", re.IGNORECASE)
+
+IMAGE_BASED_MESSAGE = (
+    "This PDF appears to be image-based and contains no readable text. "
+    "Please upload a text-based tender PDF from GeM, CPPP, or NIC portals."
+)
+
+
+class ImageBasedPDFError(ValueError):
+    """Raised when the PDF (or every document in a bundle) has no readable text layer."""
+
+
+_pool = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    # spawn, not fork — the API process is multi-threaded
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=INGEST_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def _extract_range(pdf_path: str, start: int, stop: int) -> list:
+    """Worker: extract pages [start, stop) as (index, text, elapsed_ms)."""
+    reader = PdfReader(pdf_path)
+    out = []
+    for i in range(start, stop):
+        t0 = time.perf_counter()
+        text = reader.pages[i].extract_text() or ""
+        out.append((i, text, (time.perf_counter() - t0) * 1000))
+    return out
+
+
+def iter_pages(pdf_path: str, parallel: bool = None, stop_after_chars: int = None):
+    """
+    Yield pages in order as {"page", "text", "offset", "elapsed_ms"}.
+    `offset` is the page's start in the "\\n"-joined document text. Large PDFs are
+    split into page ranges across a process pool; with `stop_after_chars` the
+    generator stops (and cancels pending ranges) once that much text has been seen.
+    """
+    num_pages = len(PdfReader(pdf_path).pages)
+    if parallel is None:
+        parallel = INGEST_WORKERS > 1 and num_pages >= INGEST_PARALLEL_MIN_PAGES
+
+    if parallel:
+        pool = _get_pool()
+        futures = [
+            pool.submit(_extract_range, pdf_path, start, min(start + INGEST_PAGES_PER_TASK, num_pages))
+            for start in range(0, num_pages, INGEST_PAGES_PER_TASK)
+        ]
+        batches = (f.result() for f in futures)
+    else:
+        futures = []
+        batches = ([page] for page in _iter_sequential(pdf_path))
+
+    offset = 0
+    seen = 0
+    try:
+        for batch in batches:
+            for index, text, elapsed_ms in batch:
+                yield {"page": index + 1, "text": text, "offset": offset, "elapsed_ms": elapsed_ms}
+                offset += len(text) + 1
+                seen += len(text)
+                if stop_after_chars is not None and seen >= stop_after_chars:
+                    return
+    finally:
+        for f in futures:
+            f.cancel()
+
+
+def _iter_sequential(pdf_path: str):
     reader = PdfReader(pdf_path)
-    raw_text = "\n".join(page.extract_text() or "" for page in reader.pages)
+    for i, page in enumerate(reader.pages):
+        t0 = time.perf_counter()
+        text = page.extract_text() or ""
+        yield i, text, (time.perf_counter() - t0) * 1000
+
+
+def peek_text(pdf_path: str, min_chars: int = 3000) -> str:
+    """Text of the first pages only — enough for validation without parsing the whole PDF."""
+    return "\n".join(p["text"] for p in iter_pages(pdf_path, parallel=False, stop_after_chars=min_chars))
+
+
+def ingest_pdf(pdf_path: str, collection_name: str = "tender_docs", parallel: bool = None) -> dict:
+    """Extract text from PDF and store in memory."""
+    t0 = time.perf_counter()
+    texts, offsets, page_timings = [], [], []
+    for page in iter_pages(pdf_path, parallel=parallel):
+        texts.append(page["text"])
+        offsets.append((page["page"], page["offset"], page["offset"] + len(page["text"])))
+        page_timings.append({"page": page["page"], "ms": round(page["elapsed_ms"], 1), "chars": len(page["text"])})
+    raw_text = "\n".join(texts)
 
     if not raw_text.strip():
-        raise ValueError(
-            "This PDF appears to be image-based and contains no readable text. "
-            "Please upload a text-based tender PDF from GeM, CPPP, or NIC portals."
+        raise ImageBasedPDFError(IMAGE_BASED_MESSAGE)
+
+    doc_store.put(collection_name, raw_text, pages=offsets)
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    slow = [p for p in page_timings if p["ms"] >= SLOW_PAGE_MS]
+    print(f"[Ingest] Stored {len(raw_text)} chars / {len(offsets)} pages from '{Path(pdf_path).name}' in {elapsed_ms:.0f}ms")
+    for p in slow:
+        print(f"[Ingest] Slow page {p['page']}: {p['ms']:.0f}ms ({p['chars']} chars)")
+    return {
+        "collection_name": collection_name,
+        "text": raw_text,
+        "num_pages": len(offsets),
+        "elapsed_ms": round(elapsed_ms, 1),
+        "page_timings": page_timings,
+    }
+
+
+def _bundle_order(name: str) -> tuple:
+    stem = re.sub(r"[_\-.]+", " ", Path(name).stem)
+    if AMENDMENT_PATTERN.search(stem):
+        return (2, name.lower())
+    return (0 if MAIN_DOC_PATTERN.search(stem) else 1, name.lower())
+
+
+def _iter_bundle_ranges(docs: list, parallel: bool):
+    """
+    Yield (doc_index, [(page_index, text, elapsed_ms), ...]) in document/page order.
+    In parallel mode page ranges of every document share the process pool, with at
+    most BUNDLE_TASKS_PER_WORKER ranges per worker in flight so memory stays bounded.
+    """
+    if not parallel:
+        # One reader per document; ranges only pay off when they can run side by side
+        for d, doc in enumerate(docs):
+            yield d, _extract_range(doc["path"], 0, doc["num_pages"])
+        return
+
+    tasks = [
+        (d, start, min(start + INGEST_PAGES_PER_TASK, doc["num_pages"]))
+        for d, doc in enumerate(docs)
+        for start in range(0, doc["num_pages"], INGEST_PAGES_PER_TASK)
+    ]
+    pool = _get_pool()
+    window = max(1, INGEST_WORKERS * BUNDLE_TASKS_PER_WORKER)
+    pending = deque()
+    try:
+        for d, start, stop in tasks:
+            pending.append((d, pool.submit(_extract_range, docs[d]["path"], start, stop)))
+            if len(pending) >= window:
+                d0, f = pending.popleft()
+                yield d0, f.result()
+        while pending:
+            d0, f = pending.popleft()
+            yield d0, f.result()
+    finally:
+        for _, f in pending:
+            f.cancel()
+
+
+def ingest_bundle(files: list, collection_name: str = "tender_docs", parallel: bool = None) -> dict:
+    """
+    Ingest several PDFs (e.g. NIT + BOQ + specs + corrigenda) into one collection.
+    `files` is [(source_name, path)]. Pages are numbered across the bundle and tagged
+    with their source document; each document starts with a "[Document: name]" line.
+    Unreadable documents are skipped and reported rather than failing the bundle.
+    """
+    t0 = time.perf_counter()
+    docs, skipped = [], []
+    for source, path in sorted(files, key=lambda f: _bundle_order(f[0])):
+        try:
+            docs.append({"source": source, "path": path, "num_pages": len(PdfReader(path).pages)})
+        except Exception as e:
+            skipped.append({"source": source, "error": str(e)})
+    total_pages = sum(d["num_pages"] for d in docs)
+    if parallel is None:
+        parallel = INGEST_WORKERS > 1 and total_pages >= INGEST_PARALLEL_MIN_PAGES
+
+    texts, offsets, page_timings = [], [], []
+    chars = [0] * len(docs)
+    offset = readable = 0
+    for d, batch in _iter_bundle_ranges(docs, parallel):
+        source = docs[d]["source"]
+        for index, text, elapsed_ms in batch:
+            readable += len(text.strip())
+            if index == 0:
+                text = f"[Document: {source}]\n{text}"
+            page_no = len(offsets) + 1
+            texts.append(text)
+            offsets.append((page_no, offset, offset + len(text), source, index + 1))
+            page_timings.append({"page": page_no, "source": source, "ms": round(elapsed_ms, 1), "chars": len(text)})
+            offset += len(text) + 1
+            chars[d] += len(text)
+    raw_text = "\n".join(texts)
+
+    # The "[Document: name]" headers alone don't make a bundle readable
+    if not readable:
+        raise ImageBasedPDFError(
+            "This bundle contains no readable text. "
+            "Please upload text-based tender PDFs from GeM, CPPP, or NIC portals."
         )
 
-    _pdf_store[collection_name] = raw_text
-    print(f"[Ingest] Stored {len(raw_text)} chars from '{Path(pdf_path).name}'")
-    return {"collection_name": collection_name, "text": raw_text}
+    doc_store.put(collection_name, raw_text, pages=offsets)
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    print(f"[Ingest] Stored {len(raw_text)} chars / {len(offsets)} pages from {len(docs)} documents in {elapsed_ms:.0f}ms")
+    for item in skipped:
+        print(f"[Ingest] Skipped '{item['source']}': {item['error']}")
+    return {
+        "collection_name": collection_name,
+        "text": raw_text,
+        "num_pages": len(offsets),
+        "elapsed_ms": round(elapsed_ms, 1),
+        "page_timings": page_timings,
+        "documents": [{"source": doc["source"], "pages": doc["num_pages"], "chars": chars[d]} for d, doc in enumerate(docs)],
+        "skipped": skipped,
+    }
 
 
 def load_vectorstore(collection_name: str = "tender_docs"):
-    return _pdf_store.get(collection_name, "")
+    return doc_store.get(collection_name)
+
+
+def load_pages(collection_name: str = "tender_docs") -> list:
+    """Per-page text and offsets for a stored collection; bundle pages also carry "source" and "source_page"."""
+    text = doc_store.get(collection_name)
+    pages = []
+    for page, start, end, *source in doc_store.pages(collection_name):
+        entry = {"page": page, "offset": start, "text": text[start:end]}
+        if source:
+            entry["source"], entry["source_page"] = source
+        pages.append(entry)
+    return pages
 
 
-def query_vectorstore(query: str, collection_name: str = "tender_docs", k: int = 5) -> str:
-    """Return full text — let Gemini handle the retrieval."""
-    return _pdf_store.get(collection_name, "")
+def release_collection(collection_name: str) -> None:
+    """Free a collection's text and its retrieval index once the pipeline is done with it."""
+    from .retriever import drop_retriever
+    doc_store.release(collection_name)
+    drop_retriever(collection_name)
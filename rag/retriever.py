@@ -1,9 +1,144 @@
-from .ingest import query_vectorstore
+"""
+rag/retriever.py — Chunked BM25 retrieval over ingested tenders
+Pure-Python BM25 index, built once per collection on first query.
+"""
 
+import re
+import math
+from collections import Counter
+from .ingest import load_vectorstore, load_pages
+from .chunking import chunk_pages
+from .store import doc_store
 
-def get_retriever(collection_name: str = "tender_docs", k: int = 5):
-    return None  # Not used in simple mode
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it", "of",
+    "on", "or", "shall", "should", "that", "the", "this", "to", "will", "with", "which", "any",
+}
+
+# Field-targeted queries used to assemble the extractor's context
+FIELD_QUERIES = {
+    "tender_details": "tender number title issuing authority department organisation name of work notice inviting tender",
+    "estimated_value": "estimated value cost of work tender value amount rupees crore lakh inr",
+    "key_dates": "bid submission end date last date closing date opening date pre-bid meeting schedule time",
+    "eligibility_criteria": "eligibility criteria qualification minimum average annual turnover years experience similar work certification iso registration",
+    "financial_requirements": "emd earnest money deposit performance security bank guarantee tender fee payment",
+    "scope_of_work": "scope of work deliverables requirements services supply installation",
+    "evaluation_criteria": "evaluation criteria technical bid financial bid l1 qcbs marks scoring",
+    "special_conditions": "special conditions penalty liquidated damages warranty msme exemption preference",
+}
+
+
+def tokenize(text: str) -> list:
+    return [t for t in re.findall(r"[a-z0-9]+", text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+
+class BM25Index:
+    """Okapi BM25 over a list of chunks ({"id", "page", "section", "text"})."""
+
+    def __init__(self, chunks: list, k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = []
+        self.lengths = []
+        df = Counter()
+        for chunk in chunks:
+            # Section headings are weighted in by indexing them alongside the body
+            tf = Counter(tokenize(chunk["section"] + "\n" + chunk["text"]))
+            self.term_freqs.append(tf)
+            self.lengths.append(sum(tf.values()))
+            df.update(tf.keys())
+        n = len(chunks)
+        self.avg_len = (sum(self.lengths) / n) if n else 0.0
+        self.idf = {t: math.log(1 + (n - f + 0.5) / (f + 0.5)) for t, f in df.items()}
+
+    def scores(self, query: str) -> list:
+        terms = [t for t in set(tokenize(query)) if t in self.idf]
+        out = []
+        for tf, length in zip(self.term_freqs, self.lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / (self.avg_len or 1))
+            score = 0.0
+            for t in terms:
+                f = tf.get(t)
+                if f:
+                    score += self.idf[t] * f * (self.k1 + 1) / (f + norm)
+            out.append(score)
+        return out
+
+    def query(self, query: str, k: int = 5) -> list:
+        """Top-k chunks with a positive score, best first."""
+        scored = [(s, i) for i, s in enumerate(self.scores(query)) if s > 0]
+        scored.sort(key=lambda x: (-x[0], x[1]))
+        return [dict(self.chunks[i], score=round(s, 3)) for s, i in scored[:k]]
+
+
+# collection_name -> (doc_store generation the index was built from, index)
+_index_store = {}
+
+
+def get_retriever(collection_name: str = "tender_docs"):
+    """BM25 index for a collection, built on first use. None if nothing is ingested."""
+    generation = doc_store.generation(collection_name)
+    if generation is None:
+        _index_store.pop(collection_name, None)
+        return None
+    cached = _index_store.get(collection_name)
+    if cached is not None and cached[0] == generation:
+        return cached[1]
+    pages = load_pages(collection_name) or [{"page": 1, "offset": 0, "text": load_vectorstore(collection_name)}]
+    index = BM25Index(chunk_pages(pages))
+    _index_store[collection_name] = (generation, index)
+    return index
+
+
+def drop_retriever(collection_name: str) -> None:
+    _index_store.pop(collection_name, None)
+
+
+def _chunk_label(chunk: dict) -> str:
+    if "source" in chunk:
+        return f"[{chunk['source']} p.{chunk['source_page']} | {chunk['section']}]"
+    return f"[Page {chunk['page']} | {chunk['section']}]"
+
+
+def _format_chunks(chunks: list) -> str:
+    return "\n\n".join(f"{_chunk_label(c)}\n{c['text']}" for c in chunks)
+
+
+def query_vectorstore(query: str, collection_name: str = "tender_docs", k: int = 5) -> str:
+    """Top-k chunks for `query`, formatted with page/section tags."""
+    index = get_retriever(collection_name)
+    if index is None:
+        return ""
+    return _format_chunks(index.query(query, k=k))
 
 
 def query_vectorstore_simple(query: str, collection_name: str = "tender_docs", k: int = 5) -> str:
     return query_vectorstore(query, collection_name=collection_name, k=k)
+
+
+def build_context(collection_name: str = "tender_docs", fields: dict = None, k: int = 3, budget_chars: int = 8000, lead_chunks: int = 2) -> str:
+    """
+    Compact extraction context: the opening chunks (title page) plus the top-k
+    chunks per field query, deduplicated, kept in document order and capped at
+    `budget_chars`. Short documents are returned whole.
+    """
+    text = load_vectorstore(collection_name)
+    if len(text) <= budget_chars:
+        return text
+    index = get_retriever(collection_name)
+    fields = fields or FIELD_QUERIES
+
+    # Round-robin over fields so every field gets its best chunk before any gets a second
+    ranked = [index.query(q, k=k) for q in fields.values()]
+    selected = {c["id"]: c for c in index.chunks[:lead_chunks]}
+    used = sum(len(c["text"]) for c in selected.values())
+    for rank in range(k):
+        for hits in ranked:
+            if rank < len(hits) and hits[rank]["id"] not in selected:
+                chunk = hits[rank]
+                if used + len(chunk["text"]) > budget_chars:
+                    continue
+                selected[chunk["id"]] = chunk
+                used += len(chunk["text"])
+    return _format_chunks(sorted(selected.values(), key=lambda c: c["id"]))
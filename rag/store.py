@@ -0,0 +1,217 @@
+"""
+rag/store.py — Memory-bounded document store
+Byte-budgeted LRU of ingested tender text with explicit release, optional
+spill of large (or evicted) documents to memory-mapped files, and counters.
+Spill files are written and removed outside the store lock, and are named
+after the host and process that own them so a restart can sweep the ones
+left behind by a crash.
+"""
+
+import os
+import mmap
+import uuid
+import socket
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DOC_STORE_MAX_BYTES = int(os.getenv("DOC_STORE_MAX_BYTES", str(256 * 1024 * 1024)))
+DOC_SPILL_BYTES = int(os.getenv("DOC_SPILL_BYTES", str(2 * 1024 * 1024)))
+DOC_SPILL_DIR = os.getenv("DOC_SPILL_DIR", "./data/docs")
+DOC_SPILL_ENABLED = os.getenv("DOC_SPILL_ENABLED", "true").lower() == "true"
+
+
+class _Entry:
+    __slots__ = ("text", "pages", "size", "generation", "path", "mm")
+
+    def __init__(self, text, pages, size, generation):
+        self.text = text
+        self.pages = pages
+        self.size = size
+        self.generation = generation
+        self.path = None
+        self.mm = None
+
+    def read(self) -> str:
+        if self.text is not None:
+            return self.text
+        return self.mm[:].decode("utf-8")
+
+    def close(self):
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            self.path = None
+
+
+class DocumentStore:
+    """LRU over resident bytes; spilled documents only cost an open mmap."""
+
+    def __init__(self, max_bytes: int = DOC_STORE_MAX_BYTES, spill_bytes: int = DOC_SPILL_BYTES,
+                 spill_dir: str = DOC_SPILL_DIR, spill_enabled: bool = DOC_SPILL_ENABLED):
+        self.max_bytes = max_bytes
+        self.spill_bytes = spill_bytes
+        self.spill_dir = Path(spill_dir)
+        self.spill_enabled = spill_enabled
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.resident_bytes = 0
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "spills": 0, "releases": 0}
+        self._owner = f"{socket.gethostname()}-{os.getpid()}"
+        swept = self.sweep_orphans()
+        if swept:
+            print(f"[DocStore] Removed {swept} spill file(s) left by a previous run")
+
+    def put(self, name: str, text: str, pages: list = None) -> None:
+        data = text.encode("utf-8")
+        spill = self.spill_enabled and len(data) >= self.spill_bytes
+        mapped = self._write_spill(data) if spill else None
+        with self._lock:
+            dropped = self._drop(name)
+            self._generation += 1
+            entry = _Entry(text, pages or [], len(data), self._generation)
+            self._entries[name] = entry
+            if mapped:
+                entry.path, entry.mm = mapped
+                entry.text = None
+                self.counters["spills"] += 1
+            else:
+                self.resident_bytes += entry.size
+            victims = self._over_budget(keep=name)
+        if dropped:
+            dropped.close()
+        self._evict(victims)
+
+    def get(self, name: str) -> str:
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                self.counters["misses"] += 1
+                return ""
+            self.counters["hits"] += 1
+            self._entries.move_to_end(name)
+            return entry.read()
+
+    def pages(self, name: str) -> list:
+        with self._lock:
+            entry = self._entries.get(name)
+            return list(entry.pages) if entry else []
+
+    def generation(self, name: str):
+        """Changes whenever `name` is (re)stored — lets derived indexes detect staleness."""
+        with self._lock:
+            entry = self._entries.get(name)
+            return entry.generation if entry else None
+
+    def release(self, name: str) -> bool:
+        with self._lock:
+            dropped = self._drop(name)
+            if dropped:
+                self.counters["releases"] += 1
+        if dropped:
+            dropped.close()
+        return dropped is not None
+
+    def stats(self) -> dict:
+        with self._lock:
+            spilled = sum(1 for e in self._entries.values() if e.text is None)
+            return {
+                **self.counters,
+                "documents": len(self._entries),
+                "spilled_documents": spilled,
+                "resident_bytes": self.resident_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def sweep_orphans(self) -> int:
+        """Delete spill files whose process on this host is gone (or that predate owner-named files)."""
+        if not self.spill_dir.is_dir():
+            return 0
+        host = socket.gethostname()
+        removed = 0
+        for path in self.spill_dir.glob("*.txt"):
+            parts = path.stem.rsplit("-", 2)
+            if len(parts) == 3 and (parts[0] != host or not parts[1].isdigit() or _alive(int(parts[1]))):
+                continue
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def _drop(self, name: str):
+        """Unlink `name` and return its entry; the caller closes it once the lock is released."""
+        entry = self._entries.pop(name, None)
+        if entry is not None and entry.text is not None:
+            self.resident_bytes -= entry.size
+        return entry
+
+    def _write_spill(self, data: bytes) -> tuple:
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        path = self.spill_dir / f"{self._owner}-{uuid.uuid4().hex}.txt"
+        with open(path, "wb") as f:
+            f.write(data)
+        with open(path, "rb") as f:
+            return str(path), mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _over_budget(self, keep: str) -> list:
+        """Oldest resident documents to bring the store back under budget; dropped here if spill is off."""
+        victims, excess = [], self.resident_bytes - self.max_bytes
+        for name in list(self._entries):
+            if excess <= 0:
+                break
+            entry = self._entries[name]
+            if entry.text is None or name == keep:
+                continue
+            excess -= entry.size
+            if self.spill_enabled:
+                victims.append((name, entry, entry.text))
+            else:
+                self.counters["evictions"] += 1
+                victims.append((name, self._drop(name), None))
+        return victims
+
+    def _evict(self, victims: list) -> None:
+        if not self.spill_enabled:
+            for _, entry, _ in victims:
+                entry.close()
+            return
+        for name, entry, text in victims:
+            # The entry stays readable from memory while its spill file is written
+            path, mm = self._write_spill(text.encode("utf-8"))
+            with self._lock:
+                current = self._entries.get(name) is entry and entry.text is not None
+                if current:
+                    entry.path, entry.mm = path, mm
+                    entry.text = None
+                    self.resident_bytes -= entry.size
+                    self.counters["evictions"] += 1
+                    self.counters["spills"] += 1
+            if not current:
+                # Released, replaced or spilled by another caller meanwhile
+                orphan = _Entry(None, [], 0, 0)
+                orphan.path, orphan.mm = path, mm
+                orphan.close()
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+doc_store = DocumentStore()
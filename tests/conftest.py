@@ -0,0 +1,27 @@
+"""
+tests/conftest.py — Shared test setup
+Points every store the app opens at import time to a throwaway directory, so
+the suite never touches ./data or ./uploads.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+_workdir = Path(tempfile.mkdtemp(prefix="procurex-tests-"))
+os.environ.update({
+    "JOB_STORE": "memory",
+    "JOB_DB_PATH": str(_workdir / "jobs.sqlite3"),
+    "QUEUE_DB_PATH": str(_workdir / "queue.sqlite3"),
+    "CACHE_PATH": str(_workdir / "cache.sqlite3"),
+    "HISTORY_DB_PATH": str(_workdir / "history.sqlite3"),
+    "DEDUP_DB_PATH": str(_workdir / "dedup.sqlite3"),
+    "LLM_LIMITER_DB_PATH": str(_workdir / "ratelimit.sqlite3"),
+    "DOC_SPILL_DIR": str(_workdir / "docs"),
+    "UPLOAD_DIR": str(_workdir / "uploads"),
+})
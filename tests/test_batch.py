@@ -0,0 +1,79 @@
+import json
+import uuid
+from collections import Counter
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import pipeline
+from core.cache import hash_upload
+from core.jobs import job_store
+
+# Per-company stub outcomes: (bid_decision, overall_score), or None for a strategy call that fails
+OUTCOMES = {"No Bid Co": ("NO BID", 90), "Strong Co": ("BID", 80), "Weak Co": ("BID", 55), "Broken Co": None}
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = Counter()
+
+    def ingest(path, collection_name):
+        return {"text": "Notice inviting tender. " * 20, "num_pages": 1, "elapsed_ms": 1, "page_timings": []}
+
+    def extract(collection_name, on_field=None):
+        calls["extraction"] += 1
+        return {"tender_title": "Supply of laptops", "eligibility_criteria": {}}
+
+    def eligibility(extracted, profile, on_field=None):
+        calls["eligibility"] += 1
+        return {"overall_eligible": True, "eligibility_score": 80, "criteria_analysis": [], "profile": profile["name"]}
+
+    def market(extracted, eligibility, on_field=None, history=None):
+        return {"pricing_intelligence": {}, "win_probability": 40, "profile": eligibility["profile"]}
+
+    def strategy(extracted, eligibility, market, on_field=None):
+        outcome = OUTCOMES[eligibility["profile"].split("#")[0]]
+        if outcome is None:
+            raise RuntimeError("model timed out")
+        return {"bid_decision": outcome[0], "overall_score": outcome[1]}
+
+    monkeypatch.setattr(pipeline, "ingest_pdf", ingest)
+    monkeypatch.setattr(pipeline, "run_extractor", extract)
+    monkeypatch.setattr(pipeline, "run_eligibility_check", eligibility)
+    monkeypatch.setattr(pipeline, "run_market_intelligence", market)
+    monkeypatch.setattr(pipeline, "run_strategy", strategy)
+    monkeypatch.setattr(pipeline, "DEDUP_ENABLED", False)
+    return calls
+
+
+def test_batch_extracts_once_and_ranks_the_profiles(tmp_path, calls):
+    upload = tmp_path / f"{uuid.uuid4().hex}.pdf"
+    upload.write_bytes(b"%PDF-1.4 " + uuid.uuid4().hex.encode())
+    run = uuid.uuid4().hex  # profile names unique to this run, so nothing comes from the result cache
+    profiles = [{"name": f"{name}#{run}"} for name in OUTCOMES]
+    job_id = uuid.uuid4().hex
+    job_store.create(job_id, status="queued", upload_path=str(upload), profile=profiles)
+
+    pipeline.run_batch_pipeline(job_id, str(upload), profiles, hash_upload(str(upload)))
+
+    job = job_store.get(job_id)
+    assert job["status"] == "complete" and job["profiles_done"] == 4
+    assert calls["extraction"] == 1 and calls["eligibility"] == 4
+    comparison = job["result"]["comparison"]
+    assert [entry["company"].split("#")[0] for entry in comparison] == ["Strong Co", "Weak Co", "No Bid Co", "Broken Co"]
+    assert [entry["rank"] for entry in comparison] == [1, 2, 3, 4]
+    assert comparison[-1]["error"] == "model timed out"
+    assert job["result"]["best_entity"] == f"Strong Co#{run}"
+
+
+@pytest.mark.parametrize("profiles, detail", [
+    ("[]", "profiles must be a non-empty JSON array of company profiles."),
+    (json.dumps([{"name": f"Co {i}"} for i in range(pipeline.BATCH_MAX_PROFILES + 1)]),
+     f"At most {pipeline.BATCH_MAX_PROFILES} profiles per batch."),
+])
+def test_batch_route_validates_the_profiles(profiles, detail):
+    client = TestClient(main.app)
+    response = client.post("/analyze/batch", data={"profiles": profiles},
+                           files={"file": ("tender.pdf", b"%PDF-1.4 tender", "application/pdf")})
+    assert response.status_code == 400 and response.json()["detail"] == detail
@@ -0,0 +1,88 @@
+import io
+import uuid
+import zipfile
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import main
+from bench.pdfgen import make_tender_pdf, write_pdf
+from core import uploads
+from rag.ingest import ingest_bundle, load_pages, release_collection
+
+MB = 1024 * 1024
+
+
+def _pdf(size: int) -> bytes:
+    return b"%PDF-1.4\n" + b"0" * (size - 9)
+
+
+def _zip(members: dict) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as z:
+        for name, data in members.items():
+            z.writestr(name, data)
+    return buffer.getvalue()
+
+
+def test_extract_pdfs_keeps_only_pdf_members(tmp_path):
+    archive = tmp_path / "bundle.zip"
+    archive.write_bytes(_zip({"docs/NIT.pdf": _pdf(100), "boq.xlsx": b"PK not a pdf", ".hidden.pdf": _pdf(100),
+                              "../../escape.pdf": _pdf(100)}))
+    out = tmp_path / "out"
+    out.mkdir()
+    saved = uploads.extract_pdfs(str(archive), str(out))
+    assert sorted(p.name for p in out.iterdir()) == ["NIT.pdf", "escape.pdf"]
+    assert all(item["size"] == 100 for item in saved)
+
+
+def test_extract_pdfs_enforces_limits_on_the_inflated_bytes(tmp_path, monkeypatch):
+    # Members not named .pdf escape the declared-size precheck; the stream still catches them
+    archive = tmp_path / "bundle.zip"
+    archive.write_bytes(_zip({"a.bin": _pdf(MB), "b.bin": _pdf(MB), "c.bin": _pdf(MB)}))
+    with pytest.raises(HTTPException) as e:
+        uploads.extract_pdfs(str(archive), str(tmp_path), max_files=2)
+    assert e.value.status_code == 400
+    with pytest.raises(HTTPException) as e:
+        uploads.extract_pdfs(str(archive), str(tmp_path), max_bytes=2 * MB)
+    assert e.value.status_code == 413 and e.value.detail.startswith("Bundle")
+    monkeypatch.setattr(uploads, "MAX_UPLOAD_BYTES", MB // 2)
+    with pytest.raises(HTTPException) as e:
+        uploads.extract_pdfs(str(archive), str(tmp_path))
+    assert e.value.detail == "File too large. Please upload a PDF under 0.5MB."
+
+
+def test_bad_archive_is_a_400(tmp_path):
+    archive = tmp_path / "bundle.zip"
+    archive.write_bytes(b"PK\x03\x04 truncated")
+    with pytest.raises(HTTPException) as e:
+        uploads.extract_pdfs(str(archive), str(tmp_path))
+    assert e.value.status_code == 400
+
+
+def test_bundle_route_limits_the_pdf_count(monkeypatch):
+    monkeypatch.setattr(main, "BUNDLE_MAX_FILES", 2)
+    client = TestClient(main.app)
+    files = [("files", (f"doc{i}.pdf", _pdf(200), "application/pdf")) for i in range(3)]
+    response = client.post("/analyze/bundle", files=files)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "At most 2 PDFs per bundle."
+
+
+def test_ingest_bundle_puts_the_notice_first_and_tags_sources(tmp_path):
+    nit = make_tender_pdf(str(tmp_path / "nit.pdf"), 2, seed=3)
+    corrigendum = write_pdf(str(tmp_path / "c.pdf"), [["Corrigendum 1: bid submission date extended."]])
+    boq = write_pdf(str(tmp_path / "b.pdf"), [["Bill of quantities: 20 laptops."]])
+    scan = write_pdf(str(tmp_path / "s.pdf"), [[]])
+    collection = f"test_{uuid.uuid4().hex}"
+    result = ingest_bundle([("Corrigendum-1.pdf", corrigendum), ("BOQ.pdf", boq), ("NIT.pdf", nit),
+                            ("broken.pdf", str(tmp_path / "missing.pdf")), ("scan.pdf", scan)], collection)
+    assert [d["source"] for d in result["documents"]] == ["NIT.pdf", "BOQ.pdf", "scan.pdf", "Corrigendum-1.pdf"]
+    assert [s["source"] for s in result["skipped"]] == ["broken.pdf"]
+    pages = load_pages(collection)
+    assert [(p["page"], p["source"], p["source_page"]) for p in pages] == [
+        (1, "NIT.pdf", 1), (2, "NIT.pdf", 2), (3, "BOQ.pdf", 1), (4, "scan.pdf", 1), (5, "Corrigendum-1.pdf", 1),
+    ]
+    assert pages[2]["text"].startswith("[Document: BOQ.pdf]\nBill of quantities")
+    release_collection(collection)
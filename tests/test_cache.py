@@ -0,0 +1,95 @@
+import threading
+import time
+
+import pytest
+
+from core.cache import ResultCache, hash_profile, hash_json
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(str(tmp_path / "cache.sqlite3"), max_bytes=10_000, ttl_seconds=60)
+
+
+def test_round_trip_and_miss(cache):
+    assert cache.get("extraction:a") is None
+    cache.set("extraction:a", {"tender_title": "Laptops"})
+    assert cache.get("extraction:a") == {"tender_title": "Laptops"}
+
+
+def test_expired_entries_are_dropped(cache):
+    cache.set("k", [1])
+    cache.ttl_seconds = 0
+    time.sleep(0.01)
+    assert cache.get("k") is None
+
+
+def test_lru_eviction_keeps_recently_read_entries(tmp_path):
+    cache = ResultCache(str(tmp_path / "lru.sqlite3"), max_bytes=250, ttl_seconds=60)
+    for key in ("a", "b"):
+        cache.set(key, "x" * 100)
+        time.sleep(0.01)
+    cache.get("a")  # "b" is now the least recently used
+    time.sleep(0.01)
+    cache.set("c", "x" * 100)
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.get("b") is None
+
+
+def test_scan_by_prefix(cache):
+    cache.set("extraction:1", 1)
+    cache.set("extraction:2", 2)
+    cache.set("market:1", 3)
+    assert sorted(cache.scan("extraction:")) == [("extraction:1", 1), ("extraction:2", 2)]
+
+
+def test_single_flight_shares_one_computation(cache):
+    calls, results = [], []
+    gate = threading.Event()
+
+    def compute():
+        calls.append(1)
+        gate.wait(1)
+        return {"ok": True}
+
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert sorted(hit for _, hit in results) == [False, True, True, True, True]
+
+
+def test_flight_finishing_after_the_miss_is_not_recomputed(cache, monkeypatch):
+    # The first lookup misses; another caller's flight stores the value before this one elects a leader
+    real_get, lookups = cache.get, []
+
+    def get(key):
+        lookups.append(key)
+        if len(lookups) == 1:
+            cache.set(key, {"ok": True})
+            return None
+        return real_get(key)
+
+    monkeypatch.setattr(cache, "get", get)
+    value, hit = cache.get_or_compute("k", lambda: pytest.fail("recomputed a value already stored"))
+    assert (value, hit) == ({"ok": True}, True)
+
+
+def test_errors_and_rejected_values_are_not_cached(cache):
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute("k", lambda: (_ for _ in ()).throw(RuntimeError("boom")))
+    assert cache.get("k") is None
+    value, hit = cache.get_or_compute("k", lambda: {"error": "bad"}, should_cache=lambda v: "error" not in v)
+    assert (value, hit) == ({"error": "bad"}, False)
+    assert cache.get("k") is None
+
+
+def test_profile_hash_ignores_case_whitespace_and_order():
+    a = {"name": "Acme  Ltd", "certifications": ["ISO 9001", "CMMI Level 3"], "annual_turnover_cr": 5.0}
+    b = {"certifications": ["cmmi level 3", "iso 9001"], "annual_turnover_cr": 5, "name": "acme ltd"}
+    assert hash_profile(a) == hash_profile(b)
+    assert hash_json({"a": 1, "b": 2}) == hash_json({"b": 2, "a": 1})
@@ -0,0 +1,152 @@
+import os
+import uuid
+from collections import Counter
+
+import pytest
+
+import pipeline
+from core.cache import hash_upload
+from core.jobs import job_store
+
+
+@pytest.mark.parametrize("statuses, rerun_from, expected", [
+    ({}, None, "extraction"),
+    ({"extraction": "done", "history": "done", "eligibility": "failed"}, None, "eligibility"),
+    ({"extraction": "done", "history": "done", "eligibility": "degraded"}, None, "eligibility"),
+    ({name: "done" for name in pipeline.STAGES}, None, None),
+    ({name: "done" for name in pipeline.STAGES}, "market", "market"),
+])
+def test_resume_point(statuses, rerun_from, expected):
+    checkpoints = {name: {"status": status} for name, status in statuses.items()}
+    assert pipeline.resume_point(checkpoints, rerun_from) == expected
+
+
+@pytest.fixture
+def agents(monkeypatch):
+    """Stub ingest and the four agents; returns per-agent call counts and a switch to fail strategy."""
+    calls, state = Counter(), {"strategy_fails": True}
+
+    def ingest(path, collection_name):
+        return {"text": "Notice inviting tender. " * 20, "num_pages": 1, "elapsed_ms": 1, "page_timings": []}
+
+    def extract(collection_name, on_field=None):
+        calls["extraction"] += 1
+        return {"tender_title": "Supply of laptops", "eligibility_criteria": {"min_turnover": "₹5 Cr"}}
+
+    def eligibility(extracted, profile, on_field=None):
+        calls["eligibility"] += 1
+        return {"overall_eligible": True, "eligibility_score": 90, "criteria_analysis": [], "profile": profile["name"]}
+
+    def market(extracted, eligibility, on_field=None, history=None):
+        calls["market"] += 1
+        return {"pricing_intelligence": {}, "win_probability": 40}
+
+    def strategy(extracted, eligibility, market, on_field=None):
+        calls["strategy"] += 1
+        if state["strategy_fails"]:
+            raise RuntimeError("model timed out")
+        return {"win_strategy": "Bid", "bid_decision": "BID"}
+
+    monkeypatch.setattr(pipeline, "ingest_pdf", ingest)
+    monkeypatch.setattr(pipeline, "run_extractor", extract)
+    monkeypatch.setattr(pipeline, "run_eligibility_check", eligibility)
+    monkeypatch.setattr(pipeline, "run_market_intelligence", market)
+    monkeypatch.setattr(pipeline, "run_strategy", strategy)
+    monkeypatch.setattr(pipeline, "DEDUP_ENABLED", False)
+    monkeypatch.setattr(pipeline, "SPECULATIVE_MARKET", False)
+    return calls, state
+
+
+def _submit(tmp_path, profile_name: str):
+    upload = tmp_path / f"{uuid.uuid4().hex}.pdf"
+    upload.write_bytes(b"%PDF-1.4 " + uuid.uuid4().hex.encode())  # unique content, so nothing is in the result cache
+    job_id, tender_hash = uuid.uuid4().hex, hash_upload(str(upload))
+    profile = {"name": profile_name}
+    # As main._admit creates it; retries pass the stored tender_hash since the upload may be gone
+    job_store.create(job_id, status="queued", upload_path=str(upload), profile=profile, tender_hash=tender_hash)
+    return job_id, str(upload), profile, tender_hash
+
+
+def test_retry_runs_only_the_failed_stage(tmp_path, agents):
+    calls, state = agents
+    job_id, upload, profile, tender_hash = _submit(tmp_path, "Acme")
+    pipeline.run_pipeline(job_id, upload, profile, tender_hash)
+    job = job_store.get(job_id)
+    assert job["status"] == "failed"
+    assert job["checkpoints"]["strategy"]["status"] == "failed"
+    assert pipeline.resume_point(job["checkpoints"]) == "strategy"
+
+    state["strategy_fails"] = False
+    calls.clear()
+    pipeline.run_pipeline(job_id, upload, profile, tender_hash)
+    assert job_store.get(job_id)["status"] == "complete"
+    assert calls == Counter({"strategy": 1})
+
+
+def test_rerun_from_eligibility_keeps_extraction(tmp_path, agents):
+    calls, state = agents
+    state["strategy_fails"] = False
+    job_id, upload, profile, tender_hash = _submit(tmp_path, "Acme")
+    pipeline.run_pipeline(job_id, upload, profile, tender_hash)
+    assert job_store.get(job_id)["status"] == "complete"
+
+    calls.clear()
+    job_store.update(job_id, status="queued", rerun_from="eligibility")
+    pipeline.run_pipeline(job_id, upload, {"name": "Acme Infra"}, tender_hash)
+    job = job_store.get(job_id)
+    assert job["status"] == "complete"
+    assert job["rerun_from"] is None
+    assert calls == Counter({"eligibility": 1, "market": 1, "strategy": 1})
+    assert job["result"]["eligibility_report"]["profile"] == "Acme Infra"
+
+
+def test_failure_before_extraction_keeps_the_upload(tmp_path, agents, monkeypatch):
+    def extraction_down(collection_name, on_field=None):
+        raise RuntimeError("model unavailable")
+
+    monkeypatch.setattr(pipeline, "run_extractor", extraction_down)
+    job_id, upload, profile, tender_hash = _submit(tmp_path, "Acme")
+    pipeline.run_pipeline(job_id, upload, profile, tender_hash)
+    job = job_store.get(job_id)
+    assert job["status"] == "failed" and not job["not_a_tender"]
+    assert (tmp_path / upload.split("/")[-1]).exists()
+
+
+def test_rerun_clears_the_payloads_being_redone(tmp_path, agents, monkeypatch):
+    import main
+
+    calls, state = agents
+    state["strategy_fails"] = False
+    job_id, upload, profile, tender_hash = _submit(tmp_path, "Acme")
+    job_store.update(job_id, pipeline=main.task_name(pipeline.run_pipeline))
+    pipeline.run_pipeline(job_id, upload, profile, tender_hash)
+
+    submitted = []
+    monkeypatch.setattr(main.scheduler, "submit", lambda job_id, *args, **kwargs: submitted.append(job_id) or 1)
+    response = main.rerun_job(job_id, main.RerunRequest(from_stage="market"))
+    assert response["resume_from"] == "market" and submitted == [job_id]
+    job = job_store.get(job_id)
+    assert job["status"] == "queued"
+    assert "extraction" in job and "eligibility" in job
+    assert "market" not in job and "strategy" not in job and "partial" not in job
+
+
+def test_lost_lease_stops_the_job_without_touching_it(tmp_path, agents, monkeypatch):
+    from core.jobs import lease_fence
+
+    calls, state = agents
+    state["strategy_fails"] = False
+    job_id, upload, profile, tender_hash = _submit(tmp_path, f"Acme {uuid.uuid4().hex}")  # not in the result cache
+
+    def eligibility(extracted, profile, on_field=None):
+        # The lease runs out mid-stage; the reaper re-queues the job for another worker
+        job_store.update(job_id, status="queued", lease=None)
+        return {"overall_eligible": True, "eligibility_score": 90, "criteria_analysis": []}
+
+    monkeypatch.setattr(pipeline, "run_eligibility_check", eligibility)
+    with lease_fence(job_id, "w1:1"):
+        pipeline.run_pipeline(job_id, upload, profile, tender_hash)
+    job = job_store.get(job_id)
+    assert job["status"] == "queued" and "eligibility" not in job
+    assert calls["market"] == 0
+    assert os.path.exists(upload)
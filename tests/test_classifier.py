@@ -0,0 +1,60 @@
+import uuid
+
+import pytest
+
+from agents import extractor
+from agents.classifier import classify, detect_doc_type
+from rag.store import doc_store
+
+TENDER = """NOTICE INVITING E-TENDER
+Tender No: NIC/IT/2026/0457  GeM/2026/B/1234567
+Bid submission end date: 20-01-2026 17:00. Pre-bid meeting on 10-01-2026.
+Earnest Money Deposit (EMD): Rs 2,00,000. Technical bid and financial bid to be uploaded on eprocure.gov.in.
+Eligibility criteria and scope of work are given in Section III."""
+
+RESUME = """Priya Sharma — Software Engineer
+Summary: Engineer with 3 years of experience. Education: Bachelor of Technology, CGPA 8.9.
+Skills: Python, SQL. Intern at Acme. Volunteer and achievement awards."""
+
+BORDERLINE = "Request for quotation. Scope of work: supply of 20 laptops. Performance guarantee applies."
+
+
+@pytest.mark.parametrize("text, decision", [
+    (TENDER, "tender"),
+    (RESUME, "not_tender"),
+    (BORDERLINE, "uncertain"),
+])
+def test_classify(text, decision):
+    assert classify(text)["decision"] == decision
+
+
+def test_signals_count_once():
+    assert classify(TENDER + TENDER)["score"] == classify(TENDER)["score"]
+
+
+def test_detect_doc_type():
+    assert detect_doc_type(RESUME) == "resume"
+    assert detect_doc_type("nothing recognisable here") == "non-tender document"
+
+
+def test_clear_non_tender_is_rejected_without_an_llm_call(monkeypatch):
+    def no_llm(*args, **kwargs):
+        raise AssertionError("the LLM validator should not be called")
+
+    monkeypatch.setattr(extractor, "complete", no_llm)
+    collection = f"test_{uuid.uuid4().hex}"
+    doc_store.put(collection, RESUME, pages=[(1, 0, len(RESUME))])
+    with pytest.raises(extractor.NotATenderError) as e:
+        extractor.run_extractor(collection)
+    assert e.value.cacheable is False  # a heuristic rejection is not stored under the extraction key
+
+
+def test_words_tenders_share_with_other_documents_are_not_penalised():
+    tender = ("Request for quotation for supply of 20 laptops to the Directorate of Education.\n"
+              "The bidder (hereinafter referred to as the Supplier) shall have 5 years of experience and\n"
+              "submit audited balance sheet and profit and loss statements. Bill to the Registrar with GST.\n"
+              "Scope of work: delivery, installation. Performance guarantee applies. Jurisdiction: Delhi courts.")
+    result = classify(tender)
+    assert result["penalty"] == 0
+    assert result["decision"] == "uncertain"
+
@@ -0,0 +1,53 @@
+import json
+
+from agents.context import CHARS_PER_TOKEN, context_fingerprint, project_context
+
+TENDER = {
+    "tender_title": "Supply of laptops",
+    "tender_number": "GEM/2026/B/1",
+    "issuing_authority": "NIC",
+    "estimated_value_inr": "Rs 2 Crore",
+    "submission_deadline": "20-01-2026",
+    "scope_of_work": [f"Deliver batch {i} of laptops to the district office with installation" for i in range(20)],
+    "special_conditions": ["MSE exemption " * 40],
+    "technical_requirements": ["16GB RAM"],
+    "contact_email": "not needed downstream",
+}
+ELIGIBILITY = {
+    "overall_eligible": True, "eligibility_score": 80, "recommendation": "PROCEED", "disqualifiers": [],
+    "criteria_analysis": [
+        {"criterion": "Turnover", "company_capability": "₹20 Cr, audited", "meets_requirement": True, "gap": ""},
+        {"criterion": "ISO 27001", "company_capability": "None", "meets_requirement": False, "gap": "Missing"},
+    ],
+}
+
+
+def _sections(projected: dict) -> dict:
+    return {section: json.loads(text) for section, text in projected.items()}
+
+
+def test_only_the_projected_fields_reach_the_prompt():
+    sections = _sections(project_context("market", budget_tokens=10_000, tender=TENDER, eligibility=ELIGIBILITY))
+    assert "contact_email" not in sections["tender"] and "tender_number" not in sections["tender"]
+    assert "disqualifiers" not in sections["eligibility"]  # empty values are left out
+    # Only unmet criteria, without the capability text
+    assert sections["eligibility"]["criteria_analysis"] == [{"criterion": "ISO 27001", "meets": False, "gap": "Missing"}]
+    assert sections["history"] == {}
+
+
+def test_over_budget_drops_low_priority_fields_first():
+    budget_tokens = 120
+    projected = project_context("market", budget_tokens=budget_tokens, tender=TENDER, eligibility=ELIGIBILITY)
+    assert sum(len(text) for text in projected.values()) <= budget_tokens * CHARS_PER_TOKEN
+    sections = _sections(projected)
+    assert sections["tender"]["tender_title"] == "Supply of laptops"  # priority 1 always stays
+    assert sections["eligibility"]["eligibility_score"] == 80
+    assert "special_conditions" not in sections["tender"]
+
+
+def test_fingerprint_ignores_fields_the_agent_never_sees():
+    a = context_fingerprint("strategy", tender=TENDER, eligibility=ELIGIBILITY, market={"win_probability": 40})
+    b = context_fingerprint("strategy", tender=dict(TENDER, contact_email="changed"), eligibility=ELIGIBILITY,
+                            market={"win_probability": 40, "unused": 1})
+    c = context_fingerprint("strategy", tender=TENDER, eligibility=ELIGIBILITY, market={"win_probability": 41})
+    assert a == b != c
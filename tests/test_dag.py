@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+import pipeline
+from core.dag import Node, run_graph, critical_path
+
+
+def _sleeper(seconds, value=None):
+    def fn(**inputs):
+        time.sleep(seconds)
+        return value if value is not None else sorted(inputs)
+    return fn
+
+
+def test_independent_nodes_run_concurrently():
+    nodes = [Node("a", _sleeper(0.2, "a")), Node("b", _sleeper(0.2, "b")), Node("c", _sleeper(0.05), ("a", "b"))]
+    outputs, report = run_graph(nodes)
+    assert outputs == {"a": "a", "b": "b", "c": ["a", "b"]}
+    assert report["wall_seconds"] < 0.4
+    assert report["saved_seconds"] == pytest.approx(report["serial_seconds"] - report["wall_seconds"], abs=0.002)
+    assert report["critical_path"][-1] == "c"
+    assert report["wasted_seconds"] == 0
+
+
+def test_discarded_speculation_is_wasted_not_saved():
+    discarded = set()
+
+    def reconcile(real, guess):
+        discarded.add("guess")
+        time.sleep(0.2)  # redo the work the guess was meant to cover
+        return "redone"
+
+    nodes = [
+        Node("real", _sleeper(0.1, "real")),
+        Node("guess", _sleeper(0.2, "guess")),
+        Node("reconciled", reconcile, ("real", "guess")),
+    ]
+    outputs, report = run_graph(nodes, discarded=discarded)
+    assert outputs["reconciled"] == "redone"
+    assert report["wasted_seconds"] == pytest.approx(0.2, abs=0.05)
+    assert report["nodes"]["guess"]["discarded"] is True
+    # Useful work was real + reconciled, run back to back: nothing was saved
+    assert report["serial_seconds"] == pytest.approx(0.3, abs=0.05)
+    assert report["saved_seconds"] == 0
+
+
+def test_failure_is_reraised_and_stops_dependents():
+    ran = []
+
+    def boom():
+        raise RuntimeError("stage failed")
+
+    nodes = [Node("a", boom), Node("b", lambda a: ran.append(a), ("a",))]
+    with pytest.raises(RuntimeError, match="stage failed"):
+        run_graph(nodes)
+    assert ran == []
+
+
+@pytest.mark.parametrize("nodes, message", [
+    ([Node("a", None, ("b",)), Node("b", None, ("a",))], "cycle"),
+    ([Node("a", None, ("missing",))], "undeclared"),
+    ([Node("a", None), Node("a", None)], "duplicate"),
+])
+def test_invalid_graphs(nodes, message):
+    with pytest.raises(ValueError, match=message):
+        run_graph(nodes)
+
+
+def test_critical_path_follows_the_slowest_chain():
+    nodes = [Node("a", None), Node("b", None), Node("c", None, ("a", "b"))]
+    assert critical_path(nodes, {"a": 1.0, "b": 3.0, "c": 0.5}) == (["b", "c"], 3.5)
+
+
+@pytest.mark.parametrize("provisional, final, holds", [
+    ({"overall_eligible": True, "eligibility_score": 100}, {"overall_eligible": True, "eligibility_score": 80}, True),
+    ({"overall_eligible": True, "eligibility_score": 100}, {"overall_eligible": True, "eligibility_score": 60}, False),
+    ({"overall_eligible": True, "eligibility_score": 100}, {"overall_eligible": False, "eligibility_score": 95}, False),
+    ({"overall_eligible": False, "eligibility_score": 30}, {"overall_eligible": False, "eligibility_score": 20}, True),
+    ({"overall_eligible": True, "eligibility_score": 90}, {"overall_eligible": True, "eligibility_score": "high"}, False),
+])
+def test_speculation_holds(monkeypatch, provisional, final, holds):
+    monkeypatch.setattr(pipeline, "SPECULATION_SCORE_TOLERANCE", 25)
+    assert pipeline.speculation_holds(provisional, final) is holds
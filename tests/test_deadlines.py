@@ -0,0 +1,27 @@
+from datetime import datetime
+
+import pytest
+
+from agents.deadlines import parse_deadline, sniff_deadline
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("15-12-2026 15:00 IST", datetime(2026, 12, 15, 15, 0)),
+    ("5th March 2026 at 3:00 pm", datetime(2026, 3, 5, 15, 0)),
+    ("2026-03-05", datetime(2026, 3, 5, 23, 59)),      # no time: end of day
+    ("March 5, 2026", datetime(2026, 3, 5, 23, 59)),
+    ("31/02/2026", None),
+    ("TBD", None),
+    (None, None),
+])
+def test_parse_deadline(value, expected):
+    assert parse_deadline(value) == expected
+
+
+def test_sniff_takes_the_labelled_submission_date():
+    text = "Tender published on 01-01-2026. Pre-bid meeting 10-01-2026. Bid submission end date: 20-01-2026 17:00"
+    assert sniff_deadline(text) == datetime(2026, 1, 20, 17, 0)
+
+
+def test_sniff_ignores_unlabelled_dates():
+    assert sniff_deadline("Dated 01-01-2026. Opening on 25-01-2026.") is None
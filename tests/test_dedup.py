@@ -0,0 +1,87 @@
+import random
+
+from rag.dedup import TenderIndex, minhash, similarity, diff
+
+random.seed(7)
+WORDS = [f"w{i}" for i in range(400)]
+BASE = " ".join(random.choice(WORDS) for _ in range(2000))
+
+
+def _fp(sections):
+    """Fingerprint from {heading: text} with one page per section."""
+    texts = list(sections.values())
+    return {
+        "signature": minhash("\n".join(texts)),
+        "pages": [str(hash(t)) for t in texts],
+        "page_texts": texts,
+        "sections": [{"heading": h, "digest": str(hash(t)), "text": t, "start_page": i + 1, "end_page": i + 1}
+                     for i, (h, t) in enumerate(sections.items())],
+    }
+
+
+def test_similarity_tracks_overlap():
+    words = BASE.split()
+    amended = " ".join(words[:1900] + ["amended"] * 100)
+    unrelated = " ".join(random.choice(WORDS) for _ in range(2000))
+    assert similarity(minhash(BASE), minhash(BASE)) == 1.0
+    assert similarity(minhash(BASE), minhash(amended)) > 0.8
+    assert similarity(minhash(BASE), minhash(unrelated)) < 0.3
+
+
+def test_diff_reports_only_changed_sections_and_pages():
+    old = _fp({"Scope": "supply laptops", "Eligibility": "turnover 5 crore", "Dates": "due 1 May"})
+    new = _fp({"Scope": "supply laptops", "Eligibility": "turnover 8 crore", "Dates": "due 1 May", "Annexure": "form"})
+    result = diff(old, new)
+    assert [s["heading"] for s in result["changed_sections"]] == ["Eligibility", "Annexure"]
+    assert result["changed_pages"] == [2, 4]
+    assert "turnover 8 crore" in result["changed_text"] and "supply laptops" not in result["changed_text"]
+    assert result["removed_sections"] == [] and result["removed_pages"] == 1
+    assert result["changed_ratio"] == 0.5
+
+
+def test_index_finds_reissued_tender(tmp_path):
+    index = TenderIndex(str(tmp_path / "dedup.sqlite3"))
+    original = _fp({"Body": BASE})
+    index.add("old", original)
+    index.add("other", _fp({"Body": " ".join(random.choice(WORDS) for _ in range(2000))}))
+
+    words = BASE.split()
+    reissue = _fp({"Body": " ".join(words[:1950] + ["corrigendum"] * 50)})
+    found = index.candidates(reissue, threshold=0.8)
+    assert [c["tender_hash"] for c in found] == ["old"]
+    assert "text" not in found[0]["sections"][0]  # only digests are stored
+
+    assert index.candidates(original, exclude="old") == []
+    index.remove("old")
+    assert index.candidates(reissue) == []
+
+
+def _candidate(tender_hash, fp, similarity=0.9):
+    return {"tender_hash": tender_hash, "similarity": similarity, "pages": fp["pages"],
+            "sections": [{k: s[k] for k in ("heading", "digest", "start_page", "end_page")} for s in fp["sections"]]}
+
+
+def test_near_duplicate_falls_through_to_the_next_candidate(monkeypatch):
+    import uuid
+    import pipeline
+    from core.cache import result_cache
+
+    new = _fp({"Scope": "supply laptops", "Eligibility": "turnover 5 crore", "Dates": "due 1 May"})
+    rewritten = _fp({"Scope": "build roads", "Eligibility": "turnover 50 crore", "Dates": "due 9 June"})
+    amended = _fp({"Scope": "supply laptops", "Eligibility": "turnover 5 crore", "Dates": "due 3 May"})
+    unparsable = _fp({"Scope": "supply laptops", "Eligibility": "turnover 5 crore", "Dates": "due 2 May"})
+    hashes = [uuid.uuid4().hex for _ in range(3)]
+    candidates = [_candidate(hashes[0], rewritten, 0.95), _candidate(hashes[1], unparsable, 0.93),
+                  _candidate(hashes[2], amended, 0.9)]
+    for tender_hash in hashes:
+        result_cache.set(f"extraction:{tender_hash}", {"extraction": {"tender_title": tender_hash}})
+
+    # The partial re-extraction only parses for the last candidate
+    replies = iter([{}, {"submission_deadline": "1 May"}])
+    monkeypatch.setattr(pipeline.tender_index, "candidates", lambda fp, exclude=None: candidates)
+    monkeypatch.setattr(pipeline, "fields_touched", lambda text: ["submission_deadline"])
+    monkeypatch.setattr(pipeline, "run_partial_extractor", lambda *args, **kwargs: next(replies))
+
+    reused = pipeline._extract_from_near_duplicate("job", "tender_job", "new-hash", new)
+    assert reused["near_duplicate"]["of"] == hashes[2]
+    assert reused["extraction"] == {"tender_title": hashes[2], "submission_deadline": "1 May"}
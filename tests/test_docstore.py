@@ -0,0 +1,90 @@
+from rag.store import DocumentStore
+
+
+def _store(tmp_path, **kwargs):
+    options = {"max_bytes": 100, "spill_bytes": 1000, "spill_dir": str(tmp_path / "docs"), "spill_enabled": True}
+    options.update(kwargs)
+    return DocumentStore(**options)
+
+
+def test_put_get_and_release(tmp_path):
+    store = _store(tmp_path)
+    store.put("a", "hello", pages=[{"page": 1, "text": "hello"}])
+    assert store.get("a") == "hello"
+    assert store.pages("a") == [{"page": 1, "text": "hello"}]
+    assert store.release("a") and not store.release("a")
+    assert store.get("a") == ""
+    assert store.stats()["resident_bytes"] == 0
+
+
+def test_generation_changes_when_restored(tmp_path):
+    store = _store(tmp_path)
+    store.put("a", "one")
+    first = store.generation("a")
+    store.put("a", "two")
+    assert store.generation("a") != first
+    assert store.generation("missing") is None
+
+
+def test_large_documents_spill_to_disk(tmp_path):
+    store = _store(tmp_path, spill_bytes=10)
+    store.put("big", "x" * 50)
+    stats = store.stats()
+    assert stats["spilled_documents"] == 1 and stats["resident_bytes"] == 0
+    assert store.get("big") == "x" * 50
+    store.release("big")
+    assert list((tmp_path / "docs").iterdir()) == []
+
+
+def test_over_budget_spills_the_least_recently_used(tmp_path):
+    store = _store(tmp_path)
+    store.put("a", "a" * 60)
+    store.put("b", "b" * 30)
+    store.get("a")  # "b" is now the least recently used
+    store.put("c", "c" * 30)
+    stats = store.stats()
+    assert stats["evictions"] == 1 and stats["spilled_documents"] == 1
+    assert stats["resident_bytes"] <= 100
+    assert store.get("b") == "b" * 30  # still readable from the spill file
+
+
+def test_over_budget_drops_when_spill_is_disabled(tmp_path):
+    store = _store(tmp_path, spill_enabled=False)
+    store.put("a", "a" * 60)
+    store.put("b", "b" * 60)
+    assert store.get("a") == ""
+    assert store.get("b") == "b" * 60
+    assert store.stats()["documents"] == 1
+
+
+def test_spill_files_are_written_outside_the_lock(tmp_path, monkeypatch):
+    store = _store(tmp_path)
+    store.put("a", "a" * 60)
+    write = store._write_spill
+
+    def checked(data):
+        assert not store._lock.locked()
+        return write(data)
+
+    monkeypatch.setattr(store, "_write_spill", checked)
+    store.put("b", "b" * 60)  # evicts "a"
+    store.put("big", "x" * 2000)  # spilled on arrival
+    assert store.stats()["spills"] == 2
+    assert store.get("a") == "a" * 60 and store.get("big") == "x" * 2000
+
+
+def test_startup_sweeps_spill_files_of_dead_processes(tmp_path):
+    import socket
+
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    live = _store(tmp_path, spill_bytes=10)
+    live.put("doc", "x" * 50)
+    owned = next(docs.iterdir())
+    (docs / f"{socket.gethostname()}-999999999-dead.txt").write_text("crashed")
+    (docs / "legacy.txt").write_text("unowned")
+    (docs / "otherhost-1-abc.txt").write_text("another machine's")
+
+    restarted = _store(tmp_path)
+    assert sorted(p.name for p in docs.iterdir()) == sorted([owned.name, "otherhost-1-abc.txt"])
+    assert restarted.stats()["documents"] == 0 and live.get("doc") == "x" * 50
@@ -0,0 +1,71 @@
+import asyncio
+import json
+import uuid
+
+from core import events
+from core.events import job_events
+from core.jobs import job_store
+
+
+async def _connected():
+    return False
+
+
+def _parse(frame: str):
+    event, data = frame.strip().split("\n")
+    return event[len("event: "):], json.loads(data[len("data: "):])
+
+
+def test_stream_follows_a_job_to_completion(monkeypatch):
+    monkeypatch.setattr(events, "SSE_POLL_SECONDS", 0.001)
+    job_id = uuid.uuid4().hex
+    job_store.create(job_id, status="queued")
+    steps = [
+        dict(status="extracting", partial={"stage": "extraction", "fields": {"tender_title": "Laptops"}}),
+        dict(status="checking_eligibility", extraction={"tender_title": "Laptops"}),
+        dict(status="complete", eligibility={"eligibility_score": 80}, result={"job_id": job_id, "ok": True}),
+    ]
+
+    async def collect():
+        frames = []
+        async for frame in job_events(job_id, _connected, position=lambda _: 2):
+            frames.append(_parse(frame))
+            # Move the job on once the stream has caught up with its current state
+            if frames[-1][0] == "status" and steps:
+                job_store.update(job_id, **steps.pop(0))
+        return frames
+
+    frames = asyncio.run(collect())
+    assert frames == [
+        ("status", {"job_id": job_id, "status": "queued", "queue_position": 2}),
+        ("partial", {"job_id": job_id, "stage": "extraction", "fields": {"tender_title": "Laptops"}}),
+        ("status", {"job_id": job_id, "status": "extracting"}),
+        ("extraction", {"job_id": job_id, "extraction": {"tender_title": "Laptops"}}),
+        ("status", {"job_id": job_id, "status": "checking_eligibility"}),
+        ("eligibility", {"job_id": job_id, "eligibility": {"eligibility_score": 80}}),
+        ("status", {"job_id": job_id, "status": "complete"}),
+        ("complete", {"job_id": job_id, "ok": True}),
+    ]
+
+
+def test_unknown_job_fails_at_once():
+    async def collect():
+        return [_parse(frame) async for frame in job_events("missing", _connected)]
+
+    assert asyncio.run(collect()) == [("failed", {"job_id": "missing", "status": "failed", "error": "Job not found"})]
+
+
+def test_stream_ends_when_the_client_goes_away(monkeypatch):
+    monkeypatch.setattr(events, "SSE_POLL_SECONDS", 0.001)
+    job_id = uuid.uuid4().hex
+    job_store.create(job_id, status="extracting")
+    polls = []
+
+    async def disconnected():
+        polls.append(1)
+        return len(polls) > 2
+
+    async def collect():
+        return [frame async for frame in job_events(job_id, disconnected)]
+
+    assert [_parse(frame)[0] for frame in asyncio.run(collect())] == ["status"]
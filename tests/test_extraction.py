@@ -0,0 +1,108 @@
+import contextvars
+
+import pytest
+
+import pipeline
+from agents import extractor
+
+_job = contextvars.ContextVar("test_job", default=None)
+
+
+def _plan(groups):
+    return [(group, f"{group} text") for group in groups]
+
+
+def test_section_calls_run_in_the_callers_context(monkeypatch):
+    seen = []
+
+    def fake_part(group, text):
+        seen.append(_job.get())
+        return {key: f"{group} value" for key in extractor.SECTION_GROUPS[group]["keys"]}
+
+    monkeypatch.setattr(extractor, "section_plan", lambda name: _plan(["dates", "eligibility", "scope"]))
+    monkeypatch.setattr(extractor, "_extract_part", fake_part)
+    token = _job.set("job-1")
+    try:
+        extracted = extractor.run_section_extractor("tender_x")
+    finally:
+        _job.reset(token)
+    assert seen == ["job-1"] * 3
+    assert "failed_sections" not in extracted
+    assert pipeline._cacheable_extraction({"extraction": extracted})
+
+
+def test_failed_section_marks_the_merge_incomplete(monkeypatch):
+    def fake_part(group, text):
+        if group == "eligibility":
+            raise ValueError("reply was not a JSON object")
+        return {key: "x" for key in extractor.SECTION_GROUPS[group]["keys"]}
+
+    monkeypatch.setattr(extractor, "section_plan", lambda name: _plan(["dates", "eligibility", "scope"]))
+    monkeypatch.setattr(extractor, "_extract_part", fake_part)
+    extracted = extractor.run_section_extractor("tender_x")
+    assert extracted["failed_sections"] == ["eligibility"]
+    assert "eligibility_criteria" not in extracted
+    assert not pipeline._cacheable_extraction({"extraction": extracted})
+
+
+def test_every_section_failing_raises(monkeypatch):
+    def fake_part(group, text):
+        raise RuntimeError("model down")
+
+    monkeypatch.setattr(extractor, "section_plan", lambda name: _plan(["dates", "scope"]))
+    monkeypatch.setattr(extractor, "_extract_part", fake_part)
+    with pytest.raises(RuntimeError):
+        extractor.run_section_extractor("tender_x")
+
+
+@pytest.mark.parametrize("outcome, cacheable", [
+    ({"extraction": {"tender_title": "Supply of laptops"}}, True),
+    ({"extraction": {"error": "Could not parse"}}, False),
+    ({"extraction": {"tender_title": "x", "failed_sections": ["financial"]}}, False),
+    ({"extraction": {"tender_title": "x", "failed_sections": []}}, True),
+])
+def test_cacheable_extraction(outcome, cacheable):
+    assert pipeline._cacheable_extraction(outcome) is cacheable
+
+
+def test_merge_is_independent_of_completion_order():
+    results = [
+        ("eligibility", {"eligibility_criteria": {"min_turnover": "₹5 Cr"}}),
+        ("dates", {"tender_title": "Supply of laptops", "submission_deadline": "12/03/2026"}),
+    ]
+    assert extractor.merge_sections(results) == extractor.merge_sections(results[::-1])
+
+
+@pytest.fixture
+def sectioned(monkeypatch):
+    """run_extractor on the map-reduce path, with the section merge supplied by the test."""
+    monkeypatch.setattr(extractor, "load_vectorstore", lambda name: "tender text " * 50)
+    monkeypatch.setattr(extractor, "classify", lambda text: {"decision": "tender", "score": 9, "signals": [], "penalty": 0})
+    monkeypatch.setattr(extractor, "use_sections", lambda text: True)
+
+    def run(merged):
+        monkeypatch.setattr(extractor, "run_section_extractor", lambda name, on_field=None: dict(merged))
+        return extractor.run_extractor("tender_x")
+
+    return run
+
+
+def test_failed_dates_call_is_not_a_rejection(sectioned):
+    extracted = sectioned({"scope_of_work": "Supply of laptops", "failed_sections": ["dates"]})
+    assert extracted["failed_sections"] == ["dates"]
+    assert not pipeline._cacheable_extraction({"extraction": extracted})
+
+
+def test_rejection_from_a_degraded_merge_is_not_cached(sectioned):
+    with pytest.raises(extractor.NotATenderError) as raised:
+        sectioned({"tender_title": "N/A", "tender_number": "N/A", "issuing_authority": "N/A",
+                   "submission_deadline": "N/A", "failed_sections": ["eligibility"]})
+    assert raised.value.cacheable is False
+    assert not pipeline._cacheable_extraction({"not_a_tender": str(raised.value), "cacheable": raised.value.cacheable})
+
+
+def test_rejection_from_a_complete_merge_is_cached(sectioned):
+    with pytest.raises(extractor.NotATenderError) as raised:
+        sectioned({"tender_title": "N/A", "tender_number": "N/A", "issuing_authority": "N/A", "submission_deadline": "N/A"})
+    assert raised.value.cacheable is True
+    assert pipeline._cacheable_extraction({"not_a_tender": str(raised.value), "cacheable": True})
@@ -0,0 +1,63 @@
+import uuid
+
+import pytest
+from pypdf import PdfWriter
+
+import pipeline
+from core.jobs import job_store
+from agents.extractor import NotATenderError
+from rag.ingest import ingest_pdf, ingest_bundle, ImageBasedPDFError
+
+
+@pytest.fixture
+def blank_pdf(tmp_path):
+    path = tmp_path / "scan.pdf"
+    writer = PdfWriter()
+    writer.add_blank_page(width=595, height=842)
+    with open(path, "wb") as f:
+        writer.write(f)
+    return path
+
+
+def _job(**fields) -> str:
+    job_id = uuid.uuid4().hex
+    job_store.create(job_id, status="queued", **fields)
+    return job_id
+
+
+def _checkpoints(job_id, extraction_status=None):
+    checkpoints = pipeline.StageCheckpoints(job_id)
+    if extraction_status:
+        checkpoints.entries["extraction"] = {"fingerprint": "x", "status": extraction_status}
+    return checkpoints
+
+
+def test_blank_pdf_is_image_based(blank_pdf):
+    with pytest.raises(ImageBasedPDFError):
+        ingest_pdf(str(blank_pdf), collection_name=f"test_{uuid.uuid4().hex}")
+    with pytest.raises(ImageBasedPDFError):
+        ingest_bundle([("scan.pdf", str(blank_pdf))], collection_name=f"test_{uuid.uuid4().hex}")
+
+
+@pytest.mark.parametrize("error, extraction_status, terminal, keep_upload", [
+    (ImageBasedPDFError("no text"), None, True, False),
+    (NotATenderError("Nice try. This looks like a resume"), None, True, False),
+    (RuntimeError("model timed out"), None, False, True),
+    (RuntimeError("model timed out"), "failed", False, True),
+    (RuntimeError("strategy failed"), "done", False, False),
+])
+def test_mark_failed(error, extraction_status, terminal, keep_upload):
+    job_id = _job()
+    assert pipeline._mark_failed(job_id, error, _checkpoints(job_id, extraction_status)) is keep_upload
+    job = job_store.get(job_id)
+    assert job["status"] == "failed"
+    assert job["not_a_tender"] is terminal
+
+
+def test_blank_pdf_job_is_terminal_and_drops_the_upload(blank_pdf):
+    job_id = _job(upload_path=str(blank_pdf))
+    pipeline.run_pipeline(job_id, str(blank_pdf), {"name": "Acme"})
+    job = job_store.get(job_id)
+    assert job["status"] == "failed"
+    assert job["not_a_tender"] is True
+    assert not blank_pdf.exists()
@@ -0,0 +1,98 @@
+import pytest
+
+import pipeline
+from rag.history import TenderHistory, value_inr
+
+TENDER = {"tender_title": "Supply of laptops", "estimated_value_inr": "₹2 Cr"}
+ELIGIBILITY = {"overall_eligible": True, "eligibility_score": 90}
+
+
+def _history(comparables, median, win_rate=0.4):
+    return {
+        "history_size": comparables + 3, "category": "it_hardware", "comparables": comparables,
+        "comparable_scope": "category", "win_rate": win_rate,
+        "value_percentiles_inr": {"p25": median * 0.6, "p50": median, "p75": median * 1.5},
+        "top_authorities": [{"authority": "nic", "tenders": comparables, "share": 0.5}],
+        "similar_tenders": [{"tender_number": f"T-{comparables}"}],
+    }
+
+
+def test_market_key_ignores_small_moves_in_history():
+    key = pipeline._market_key(TENDER, ELIGIBILITY, _history(20, 21_000_000))
+    # One more recorded tender: counts, neighbours and the median shift a little
+    assert pipeline._market_key(TENDER, ELIGIBILITY, _history(21, 21_200_000)) == key
+
+
+def test_market_key_follows_material_changes():
+    key = pipeline._market_key(TENDER, ELIGIBILITY, _history(20, 21_000_000))
+    assert pipeline._market_key(TENDER, ELIGIBILITY, _history(40, 21_000_000)) != key
+    assert pipeline._market_key(TENDER, ELIGIBILITY, _history(20, 35_000_000)) != key
+    assert pipeline._market_key(TENDER, ELIGIBILITY, _history(20, 21_000_000, win_rate=0.7)) != key
+    assert pipeline._market_key(TENDER, {**ELIGIBILITY, "eligibility_score": 40}, _history(20, 21_000_000)) != key
+    assert pipeline._market_key(TENDER, ELIGIBILITY, {}) != key
+
+
+@pytest.mark.parametrize("text, rupees", [
+    ("₹2.5 Cr", 2.5e7),
+    ("Rs. 45,00,000", 4.5e6),
+    ("45,00,000", 4.5e6),
+    ("50 lakh", 5e6),
+    (25_000_000, 2.5e7),
+    ("Rs 500", None),        # rupees or crore? dropped rather than read as ₹500 Cr
+    ("500", None),
+    (12, None),
+    ("Not specified", None),
+    ("2% of the estimated cost", None),
+])
+def test_value_inr_only_reads_unambiguous_amounts(text, rupees):
+    assert value_inr(text) == (pytest.approx(rupees) if rupees else None)
+
+
+def _laptops(i: int, value: str, authority: str = "NIC") -> dict:
+    return {"tender_title": f"Supply of laptops lot {i}", "tender_number": f"T-{i}",
+            "issuing_authority": authority, "estimated_value_inr": value}
+
+
+def test_percentiles_over_comparable_tenders(tmp_path):
+    history = TenderHistory(str(tmp_path / "history.sqlite3"))
+    for i, crore in enumerate([1, 2, 3, 4, 5]):
+        history.record(f"h{i}", _laptops(i, f"₹{crore} Cr"))
+    history.record("ambiguous", _laptops(9, "Rs 500"))  # unpriced, so it can't drag the percentiles
+    history.record("road", {"tender_title": "Construction of road", "estimated_value_inr": "₹90 Cr"})
+    history.update("h0", outcome="won", award_value_inr=0.9e7)
+    history.update("h1", outcome="lost")
+
+    stats = history.market_stats(_laptops(10, "₹3.5 Cr"), exclude="h-new")
+    assert stats["category"] == "it_hardware" and stats["comparable_scope"] == "category"
+    assert stats["comparables"] == 5
+    assert stats["value_percentiles_inr"]["p50"] == pytest.approx(3e7)
+    assert stats["value_percentiles_inr"]["p10"] == pytest.approx(1.4e7)
+    assert stats["estimate_percentile"] == 60
+    assert stats["award_to_estimate_ratio"]["p50"] == pytest.approx(0.9)
+    assert stats["win_rate"] == 0.5
+    assert stats["authority"]["past_tenders"] == 6
+
+
+def test_too_few_comparables_widens_to_all_tenders(tmp_path):
+    history = TenderHistory(str(tmp_path / "history.sqlite3"))
+    history.record("h1", _laptops(1, "₹2 Cr"))
+    history.record("road", {"tender_title": "Construction of road", "estimated_value_inr": "₹90 Cr"})
+    stats = history.market_stats(_laptops(2, "₹2 Cr"), exclude="h1")
+    assert stats["comparable_scope"] == "all" and stats["comparables"] == 1
+
+
+def test_history_write_failure_does_not_fail_a_finished_job(tmp_path, monkeypatch):
+    from core.jobs import job_store
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("database is locked")
+
+    upload = tmp_path / "t.pdf"
+    upload.write_bytes(b"%PDF-1.4 history")
+    monkeypatch.setattr(pipeline, "_extraction_stage", lambda *args, **kwargs: {"extraction": TENDER})
+    monkeypatch.setattr(pipeline, "_history_stage", lambda *args, **kwargs: {})
+    monkeypatch.setattr(pipeline, "_profile_stages", lambda *args, **kwargs: (ELIGIBILITY, {}, {"bid_decision": "BID"}))
+    monkeypatch.setattr(pipeline.tender_history, "update", broken)
+    job_store.create("history-job", status="queued")
+    pipeline.run_pipeline("history-job", str(upload), {"name": "Acme"}, "history-hash")
+    assert job_store.get_status("history-job")["status"] == "complete"
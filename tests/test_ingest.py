@@ -0,0 +1,42 @@
+import uuid
+
+import pytest
+
+from bench.pdfgen import make_tender_pdf, write_pdf
+from rag import ingest
+from rag.ingest import ImageBasedPDFError, ingest_pdf, iter_pages, load_pages, release_collection
+
+
+@pytest.fixture
+def tender_pdf(tmp_path):
+    return make_tender_pdf(str(tmp_path / "tender.pdf"), 20, seed=7)
+
+
+def _ingest(path, parallel):
+    collection = f"test_{uuid.uuid4().hex}"
+    result = ingest_pdf(path, collection, parallel=parallel)
+    pages = load_pages(collection)
+    release_collection(collection)
+    return result, pages
+
+
+def test_parallel_ingest_matches_sequential(tender_pdf, monkeypatch):
+    monkeypatch.setattr(ingest, "INGEST_PAGES_PER_TASK", 3)  # several ranges, finishing out of order
+    sequential, seq_pages = _ingest(tender_pdf, parallel=False)
+    parallel, par_pages = _ingest(tender_pdf, parallel=True)
+    assert parallel["text"] == sequential["text"]
+    assert par_pages == seq_pages
+    assert [p["page"] for p in parallel["page_timings"]] == list(range(1, 21))
+    for page in par_pages:
+        assert parallel["text"][page["offset"]:page["offset"] + len(page["text"])] == page["text"]
+
+
+def test_iter_pages_stops_after_enough_text(tender_pdf):
+    pages = list(iter_pages(tender_pdf, parallel=False, stop_after_chars=1))
+    assert [p["page"] for p in pages] == [1]
+
+
+def test_pdf_without_a_text_layer_is_rejected(tmp_path):
+    blank = write_pdf(str(tmp_path / "scan.pdf"), [[], []])
+    with pytest.raises(ImageBasedPDFError):
+        ingest_pdf(blank, f"test_{uuid.uuid4().hex}", parallel=False)
@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+from core.jobs import MemoryJobStore, SQLiteJobStore, LeaseLostError, lease_fence
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryJobStore(ttl_seconds=60, max_finished=2)
+    return SQLiteJobStore(str(tmp_path / "jobs.sqlite3"), ttl_seconds=60, max_finished=2)
+
+
+def test_create_update_get(store):
+    store.create("j1", status="queued", filename="nit.pdf")
+    store.update("j1", status="extracting", extraction={"tender_title": "Laptops"})
+    job = store.get("j1")
+    assert job["status"] == "extracting"
+    assert job["filename"] == "nit.pdf"
+    assert job["extraction"] == {"tender_title": "Laptops"}
+    assert store.get("missing") is None
+
+
+def test_status_reads_skip_payloads(store):
+    store.create("j1", status="queued")
+    store.update("j1", extraction={"tender_title": "Laptops"}, error=None)
+    status = store.get_status("j1")
+    assert status["status"] == "queued"
+    assert "extraction" not in status
+    assert store.get("j1", fields=["extraction"])["extraction"] == {"tender_title": "Laptops"}
+
+
+def test_incr(store):
+    store.create("j1", status="queued")
+    store.incr("j1", "profiles_done")
+    store.incr("j1", "profiles_done", 2)
+    assert store.get("j1")["profiles_done"] == 3
+
+
+def test_finished_jobs_are_evicted_oldest_first(store):
+    for job_id in ("a", "b", "c"):
+        store.create(job_id, status="queued")
+        store.update(job_id, status="complete")
+        time.sleep(0.01)
+    store.create("running", status="queued")
+    store.evict()
+    assert store.get("a") is None
+    assert store.get("b") is not None and store.get("c") is not None
+    assert store.get("running") is not None
+
+
+def test_requeued_job_is_no_longer_finished(store):
+    store.create("j1", status="queued")
+    store.update("j1", status="failed")
+    store.update("j1", status="queued")
+    assert store.get("j1").get("finished_at") is None
+
+
+def test_clear_drops_payloads(store):
+    store.create("j1", status="complete", eligibility={"score": 90}, market={"win": 40})
+    version = store.get_status("j1")["version"]
+    store.clear("j1", "market", "partial")
+    job = store.get("j1")
+    assert job["eligibility"] == {"score": 90} and "market" not in job
+    assert job["version"] > version
+
+
+def test_fenced_writes_stop_once_the_lease_moves(store):
+    store.create("j1", status="queued")
+    with lease_fence("j1", "w1:1", store=store):
+        store.update("j1", status="extracting")
+        store.incr("j1", "profiles_done")
+        store.update("j1", lease="w2:2")  # reaped and claimed by another worker
+        with pytest.raises(LeaseLostError):
+            store.update("j1", status="failed")
+        with pytest.raises(LeaseLostError):
+            store.incr("j1", "profiles_done")
+    job = store.get("j1")
+    assert job["status"] == "extracting" and job["profiles_done"] == 1
+    store.update("j1", status="queued")  # unfenced writers (the API, the reaper) are unaffected
+    assert store.get_status("j1")["status"] == "queued"
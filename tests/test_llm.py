@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+
+from agents.llm import TokenBucket, RateLimiter, SQLiteRateLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bucket_refills_at_its_rate():
+    clock = Clock()
+    bucket = TokenBucket(60, clock=clock)  # one token a second
+    bucket.take(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+    clock.now += 0.5
+    assert bucket.wait_time(1) == pytest.approx(0.5)
+    clock.now += 100
+    assert bucket.wait_time(60) == 0.0
+    assert bucket.wait_time(600) == 0.0  # requests over capacity only wait for a full bucket
+
+
+def test_adjust_gives_back_unused_tokens():
+    clock = Clock()
+    bucket = TokenBucket(600, clock=clock)
+    bucket.take(500)
+    bucket.adjust(400)
+    assert bucket.tokens == pytest.approx(500)
+    bucket.adjust(10_000)
+    assert bucket.tokens == bucket.capacity
+
+
+def test_limiter_waits_for_the_tighter_bucket(monkeypatch):
+    clock = Clock()
+    limiter = RateLimiter(rpm=60, tpm=600)
+    limiter.requests, limiter.tokens = TokenBucket(60, clock=clock), TokenBucket(600, clock=clock)
+    slept = []
+
+    def sleep(seconds):
+        slept.append(seconds)
+        clock.now += seconds
+
+    monkeypatch.setattr("agents.llm.time.sleep", sleep)
+    assert limiter.acquire(500) == 0.0
+    # Plenty of requests left, but the token bucket needs 40s to cover another 500
+    assert limiter.acquire(500) == pytest.approx(40.0)
+    assert max(slept) <= 5.0
+
+
+def test_sqlite_limiter_is_shared_across_instances(tmp_path):
+    path = str(tmp_path / "ratelimit.sqlite3")
+    first, second = SQLiteRateLimiter(path, rpm=3, tpm=1_000_000), SQLiteRateLimiter(path, rpm=3, tpm=1_000_000)
+    for limiter in (first, second, first):
+        assert limiter.acquire(10) == 0.0
+    # The quota is spent between the two "processes", so the next call has to wait
+    with second._locked():
+        assert second.requests.wait_time(1) > 0
+
+
+def test_sqlite_limiter_settles_real_usage(tmp_path):
+    limiter = SQLiteRateLimiter(str(tmp_path / "ratelimit.sqlite3"), rpm=60, tpm=6000)
+    limiter.acquire(5000)
+    limiter.settle(5000, 1000)
+    with limiter._locked():
+        assert limiter.tokens.tokens == pytest.approx(5000, abs=5)
+
+
+def test_sqlite_limiter_under_concurrent_threads(tmp_path):
+    path = str(tmp_path / "ratelimit.sqlite3")
+    limiters = [SQLiteRateLimiter(path, rpm=20, tpm=1_000_000) for _ in range(4)]
+    threads = [threading.Thread(target=lambda l=l: [l.acquire(1) for _ in range(5)]) for l in limiters]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    with limiters[0]._locked():
+        assert limiters[0].requests.tokens < 1.5  # all 20 requests came out of the one shared bucket
@@ -0,0 +1,57 @@
+import threading
+
+from fastapi.testclient import TestClient
+
+import main
+from core.metrics import Counter, Histogram, job_scope, record_cache, record_llm_call, stage
+
+
+def test_histogram_buckets_are_cumulative():
+    h = Histogram("test_seconds", "Test histogram", buckets=(1, 5))
+    for value in (0.5, 3, 7):
+        h.observe(value, stage="extraction")
+    assert h.render() == [
+        "# HELP test_seconds Test histogram",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{stage="extraction",le="1"} 1',
+        'test_seconds_bucket{stage="extraction",le="5"} 2',
+        'test_seconds_bucket{stage="extraction",le="+Inf"} 3',
+        'test_seconds_sum{stage="extraction"} 10.500000',
+        'test_seconds_count{stage="extraction"} 3',
+    ]
+
+
+def test_counter_labels_are_order_independent():
+    c = Counter("test_total", "Test counter")
+    c.inc(agent="market", outcome="ok")
+    c.inc(2, outcome="ok", agent="market")
+    assert c.render()[-1] == 'test_total{agent="market",outcome="ok"} 3'
+
+
+def test_job_scope_collects_stages_calls_and_cache_hits():
+    with job_scope() as timings:
+        with stage("extraction"):
+            pass
+        record_cache("extraction", hit=True)
+        record_llm_call("extractor", 1.5, 0.25, 4000, 1000, 200, retries=1)
+        # Outside the scope (a plain thread without a copied context) nothing lands on the job
+        worker = threading.Thread(target=record_llm_call, args=("market", 1.0, 0.0, 100, 10, 10, 0))
+        worker.start()
+        worker.join()
+    summary = timings.summary()
+    assert set(summary["stages"]) == {"extraction"}
+    assert summary["cache_hits"] == {"extraction": True}
+    assert [c["agent"] for c in summary["llm_calls"]] == ["extractor"]
+    assert (summary["prompt_tokens"], summary["completion_tokens"]) == (1000, 200)
+
+
+def test_metrics_endpoint_exposes_the_registry():
+    with job_scope():
+        record_llm_call("eligibility", 0.3, 0.0, 1200, 300, 50, retries=0, ok=False)
+    response = TestClient(main.app).get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert "# TYPE procurex_stage_seconds histogram" in body
+    assert 'procurex_llm_errors_total{agent="eligibility"}' in body
+    assert 'procurex_llm_prompt_chars_bucket{agent="eligibility",le="2500"}' in body
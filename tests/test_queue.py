@@ -0,0 +1,75 @@
+import time
+
+import pytest
+
+from core.scheduler import DurableQueue, QueueFullError, resolve_task, task_name
+
+
+def job(job_id, upload_path):
+    """Stand-in pipeline task; the queue stores it by name."""
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return DurableQueue(str(tmp_path / "queue.sqlite3"), max_queue=4, lease_seconds=60, max_attempts=2,
+                        source_queue_share=1.0)
+
+
+def test_jobs_survive_a_new_connection(queue):
+    queue.submit("j1", job, "j1", "/uploads/j1.pdf", deadline=100.0)
+    reopened = DurableQueue(queue.path)
+    leased = reopened.lease("w1")
+    assert leased == {"job_id": "j1", "task": task_name(job), "args": ["j1", "/uploads/j1.pdf"], "attempts": 1}
+    assert resolve_task(leased["task"]) is job
+
+
+def test_lease_order_and_positions(queue):
+    queue.submit("undated", job, "undated", "")
+    queue.submit("soon", job, "soon", "", deadline=1.0)
+    assert queue.position("soon") == 1 and queue.position("undated") == 2
+    assert queue.lease("w1")["job_id"] == "soon"
+    assert queue.position("soon") == 0
+    queue.complete("soon", "w1")
+    assert queue.position("soon") is None
+    assert queue.lease("w1")["job_id"] == "undated"
+    assert queue.lease("w1") is None
+
+
+def test_queue_full(queue):
+    for i in range(4):
+        queue.submit(f"j{i}", job, f"j{i}", "")
+    with pytest.raises(QueueFullError):
+        queue.submit("j4", job, "j4", "")
+
+
+def test_expired_lease_is_requeued_then_dropped(queue):
+    queue.lease_seconds = 0.01
+    queue.submit("j1", job, "j1", "/uploads/j1.pdf")
+    queue.lease("dead-worker")
+    time.sleep(0.02)
+    assert queue.reap() == [{"job_id": "j1", "args": ["j1", "/uploads/j1.pdf"], "attempts": 1, "requeued": True}]
+    assert queue.heartbeat("dead-worker", ["j1"]) == ["j1"]  # the old worker learns it lost the job
+    assert queue.lease("w2")["attempts"] == 2
+    time.sleep(0.02)
+    assert queue.reap()[0]["requeued"] is False
+    assert queue.position("j1") is None
+
+
+def test_heartbeat_keeps_the_lease(queue):
+    queue.lease_seconds = 0.05
+    queue.submit("j1", job, "j1", "")
+    queue.lease("w1")
+    time.sleep(0.03)
+    assert queue.heartbeat("w1", ["j1"]) == []
+    time.sleep(0.03)
+    assert queue.reap() == []
+
+
+def test_waiting_jobs_of_a_tender(queue):
+    queue.submit("a", job, "a", "/uploads/a.pdf", {}, "hash-1")
+    queue.submit("b", job, "b", "/uploads/b.pdf", {}, "hash-2")
+    queue.submit("c", job, "c", "/uploads/c.pdf", {}, "hash-1")
+    queue.lease("w1")  # "a" is running, no longer waiting
+    assert queue.waiting_for("hash-1") == ["c"]
+    assert queue.set_deadline("c", 1.0)
+    assert queue.position("c") == 1
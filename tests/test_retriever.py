@@ -0,0 +1,70 @@
+import uuid
+
+from rag.chunking import chunk_pages, is_heading, split_sections
+from rag.retriever import BM25Index, build_context, get_retriever
+from rag.store import doc_store
+
+PAGES = [
+    {"page": 1, "offset": 0, "text": "NOTICE INVITING TENDER\nTender No: NIC/IT/2026/0457\nSupply of servers."},
+    {"page": 2, "offset": 0, "text": "SECTION III ELIGIBILITY\nMinimum average annual turnover of Rs 5 crore.\n"
+                                     "3. Earnest Money Deposit\nEMD of Rs 2 lakh by bank guarantee."},
+]
+
+
+def _store(pages):
+    text, offsets, offset = [], [], 0
+    for page in pages:
+        text.append(page["text"])
+        offsets.append((page["page"], offset, offset + len(page["text"])))
+        offset += len(page["text"]) + 1
+    collection = f"test_{uuid.uuid4().hex}"
+    doc_store.put(collection, "\n".join(text), pages=offsets)
+    return collection
+
+
+def test_headings():
+    assert is_heading("SECTION III ELIGIBILITY") and is_heading("3. Earnest Money Deposit")
+    assert not is_heading("Minimum average annual turnover of Rs 5 crore.")
+
+
+def test_chunks_follow_headings_and_never_straddle_pages():
+    chunks = chunk_pages(PAGES)
+    assert [(c["page"], c["section"]) for c in chunks] == [
+        (1, "NOTICE INVITING TENDER"), (2, "SECTION III ELIGIBILITY"), (2, "3. Earnest Money Deposit"),
+    ]
+    assert [s["heading"] for s in split_sections(PAGES)] == [c["section"] for c in chunks]
+
+
+def test_long_pages_split_with_overlap():
+    lines = [f"Clause {i} of the general conditions of contract applies." for i in range(60)]
+    chunks = chunk_pages([{"page": 1, "text": "\n".join(lines)}], max_chars=600, overlap_lines=2)
+    assert len(chunks) > 1 and all(len(c["text"]) <= 700 for c in chunks)
+    assert chunks[1]["text"].splitlines()[:2] == chunks[0]["text"].splitlines()[-2:]
+
+
+def test_bm25_ranks_the_matching_chunk_first():
+    index = BM25Index(chunk_pages(PAGES))
+    assert index.query("earnest money emd")[0]["section"] == "3. Earnest Money Deposit"
+    assert index.query("turnover crore")[0]["page"] == 2
+    assert index.query("helicopter") == []
+
+
+def test_index_is_rebuilt_when_the_collection_changes():
+    collection = _store(PAGES)
+    first = get_retriever(collection)
+    assert get_retriever(collection) is first
+    doc_store.put(collection, "Replaced text.", pages=[(1, 0, 14)])
+    assert get_retriever(collection) is not first
+    doc_store.release(collection)
+    assert get_retriever(collection) is None
+
+
+def test_build_context_keeps_the_budget_and_document_order():
+    filler = [{"page": p, "offset": 0, "text": f"SCHEDULE {p}\n" + "Delivery schedule and site details. " * 30}
+              for p in range(3, 30)]
+    collection = _store(PAGES + filler)
+    context = build_context(collection, budget_chars=2500)
+    assert len(context) < 2500 + 400  # chunk labels are not counted against the budget
+    assert context.index("Tender No") < context.index("Earnest Money")
+    assert "EMD of Rs 2 lakh" in context and "annual turnover" in context
+    doc_store.release(collection)
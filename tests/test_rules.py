@@ -0,0 +1,100 @@
+import pytest
+
+from agents import eligibility
+from agents.rules import parse_amount_cr, parse_years, evaluate, rules_only_report
+
+PROFILE = {"annual_turnover_cr": 10, "years_in_operation": 5, "certifications": ["ISO 9001:2015"]}
+
+
+@pytest.mark.parametrize("text, strict, expected", [
+    ("₹5 Cr", True, 5.0),
+    ("50 lakh", True, 0.5),
+    ("Rs. 2,50,00,000", True, 2.5),
+    ("INR 3.5 crores", True, 3.5),
+    ("Rs 5 crore (average of last 3 years)", True, 5.0),
+    ("30% of the estimated cost", True, None),
+    ("2 times the estimated value", True, None),
+    ("₹ 500", True, None),
+    ("500", True, None),
+    (500, True, None),
+    ("not specified", True, None),
+    # Estimated values are read leniently
+    ("45,00,000", False, 0.45),
+    ("₹ 500", False, 500.0),
+    (2.5, False, 2.5),
+])
+def test_parse_amount_cr(text, strict, expected):
+    value = parse_amount_cr(text, strict=strict)
+    if expected is None:
+        assert value is None
+    else:
+        assert value == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("5 years", 5.0),
+    ("5+ years", 5.0),
+    ("Five (5) years", 5.0),
+    ("at least five (5) years experience", 5.0),
+    ("minimum 3-5 years", 3.0),
+    ("not less than 7 years in IT services", 7.0),
+    ("Minimum 3 years experience; similar works in last 7 years", 3.0),
+    ("similar works completed during last 7 years", None),
+    ("experience of similar works in the last 7 years", None),
+    ("registered for 3 years with GST", None),
+    ("N/A", None),
+])
+def test_parse_years(text, expected):
+    assert parse_years(text) == expected
+
+
+def test_relative_turnover_is_left_to_the_model():
+    verdict = evaluate({"eligibility_criteria": {"min_turnover": "30% of the estimated cost"}}, PROFILE)
+    assert verdict == {"decided": [], "ambiguous": ["min_turnover"], "disqualifiers": []}
+
+
+def test_look_back_window_is_not_a_minimum():
+    criteria = {"years_of_experience": "similar works completed during last 7 years"}
+    assert evaluate({"eligibility_criteria": criteria}, PROFILE)["ambiguous"] == ["years_of_experience"]
+
+
+def test_explicit_shortfall_is_a_disqualifier():
+    verdict = evaluate({"eligibility_criteria": {"min_turnover": "₹20 Cr", "years_of_experience": "3 years"}}, PROFILE)
+    assert len(verdict["disqualifiers"]) == 1
+    report = rules_only_report(verdict)
+    assert report["recommendation"] == "DO NOT BID" and report["eligibility_score"] <= 30
+
+
+def test_nothing_decided_is_not_a_proceed():
+    report = rules_only_report(evaluate({}, PROFILE))
+    assert report["overall_eligible"] is None
+    assert report["recommendation"] != "PROCEED"
+
+
+@pytest.mark.parametrize("criteria, calls_llm", [
+    ({}, False),                                                       # nothing extracted, nothing to ask about
+    ({"min_turnover": "30% of the estimated cost"}, True),             # only ambiguous criteria
+    ({"min_turnover": "₹5 Cr", "prior_experience": "3 similar works"}, True),
+    ({"min_turnover": "₹5 Cr", "years_of_experience": "3 years"}, False),  # all decided, all met
+    ({"min_turnover": "₹50 Cr", "prior_experience": "3 similar works"}, False),  # hard disqualifier
+])
+def test_short_circuit(monkeypatch, criteria, calls_llm):
+    calls = []
+
+    def fake_complete(*args, **kwargs):
+        calls.append(args)
+        return '{"overall_eligible": true, "eligibility_score": 70, "recommendation": "PROCEED", "criteria_analysis": []}'
+
+    monkeypatch.setattr(eligibility, "complete", fake_complete)
+    report = eligibility.run_eligibility_check({"eligibility_criteria": criteria}, PROFILE)
+    assert bool(calls) == calls_llm
+    assert not (report["recommendation"] == "PROCEED" and not report["eligibility_score"])
+    if calls:
+        remaining = calls[0][2].split("Evaluate ONLY these remaining criteria:")[1].splitlines()[0]
+        assert remaining.strip()
+
+
+def test_no_criteria_is_a_review_without_a_model_call():
+    report = eligibility.run_eligibility_check({"tender_title": "Supply of laptops"}, PROFILE)
+    assert report["recommendation"] == "REVIEW" and report["eligibility_score"] is None
+    assert "No eligibility criteria" in report["reasoning"]
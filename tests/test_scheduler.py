@@ -0,0 +1,120 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from core.scheduler import JobScheduler, QueueFullError
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_queue_full_is_rejected():
+    scheduler = JobScheduler(concurrency=1, max_queue=2, source_queue_share=1.0)
+    scheduler.submit("a", print)
+    scheduler.submit("b", print)
+    assert not scheduler.has_capacity()
+    with pytest.raises(QueueFullError):
+        scheduler.submit("c", print)
+
+
+def test_jobs_run_with_bounded_concurrency():
+    running, peak, done = [0], [0], []
+    lock = threading.Lock()
+
+    def job(name):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+            done.append(name)
+
+    async def scenario():
+        scheduler = JobScheduler(concurrency=2, max_queue=10, source_queue_share=1.0)
+        await scheduler.start()
+        for i in range(5):
+            scheduler.submit(f"j{i}", job, f"j{i}")
+        while len(done) < 5:
+            await asyncio.sleep(0.01)
+        await scheduler.stop()
+
+    _run(scenario())
+    assert sorted(done) == [f"j{i}" for i in range(5)]
+    assert peak[0] == 2
+
+
+def test_a_crashing_job_does_not_stop_the_worker():
+    done = []
+
+    def boom():
+        raise RuntimeError("pipeline bug")
+
+    async def scenario():
+        scheduler = JobScheduler(concurrency=1, max_queue=10, source_queue_share=1.0)
+        await scheduler.start()
+        scheduler.submit("bad", boom)
+        scheduler.submit("good", done.append, "good")
+        for _ in range(200):
+            if done:
+                break
+            await asyncio.sleep(0.01)
+        await scheduler.stop()
+
+    _run(scenario())
+    assert done == ["good"]
+
+
+def test_earliest_deadline_first_and_undated_last():
+    scheduler = JobScheduler(concurrency=1, max_queue=10, source_queue_share=1.0)
+    scheduler.submit("undated", print)
+    scheduler.submit("late", print, deadline=2000.0)
+    scheduler.submit("soon", print, deadline=1000.0)
+    assert [scheduler.position(j) for j in ("soon", "late", "undated")] == [1, 2, 3]
+    assert scheduler.set_deadline("undated", 500.0)
+    assert scheduler.position("undated") == 1
+    assert not scheduler.set_deadline("unknown", 1.0)
+
+
+def test_a_source_cannot_take_every_worker():
+    scheduler = JobScheduler(concurrency=2, max_queue=10, source_share=0.5, source_queue_share=1.0)
+    scheduler.submit("crawl-1", print, source="crawler", deadline=1.0)
+    scheduler.submit("crawl-2", print, source="crawler", deadline=2.0)
+    scheduler.submit("upload", print, source="api", deadline=9.0)
+    scheduler._running["crawl-0"] = "crawler"
+    # crawler already holds its share of the two workers, so the later api job goes first
+    assert scheduler._pick() == "upload"
+    scheduler._running["api-0"] = "api"
+    assert scheduler._pick() == "crawl-1"
+
+
+def test_a_source_cannot_take_every_queue_slot():
+    scheduler = JobScheduler(concurrency=1, max_queue=4, source_queue_share=0.5)
+    scheduler.submit("c1", print, source="crawler")
+    scheduler.submit("c2", print, source="crawler")
+    assert not scheduler.has_capacity("crawler")
+    assert scheduler.has_capacity("api")
+    with pytest.raises(QueueFullError):
+        scheduler.submit("c3", print, source="crawler")
+
+
+def test_extracted_deadline_moves_waiting_jobs_of_the_same_tender(monkeypatch):
+    import pipeline
+
+    scheduler = JobScheduler(concurrency=1, max_queue=10, source_queue_share=1.0)
+    monkeypatch.setattr(pipeline, "scheduler", scheduler)
+    scheduler.submit("other", print, "other", "", {}, "hash-2", deadline=time.time() + 30 * 86400)
+    scheduler.submit("resent", print, "resent", "", {}, "hash-1")
+    pipeline.job_store.create("resent", status="queued")
+    assert scheduler.position("resent") == 2
+
+    soon = time.strftime("%d/%m/%Y 15:00", time.localtime(time.time() + 3 * 86400))
+    pipeline._reprioritize_waiting("hash-1", {"submission_deadline": soon})
+    assert scheduler.position("resent") == 1
+    assert pipeline.job_store.get_status("resent")["deadline_source"] == "extraction"
+
+    pipeline._reprioritize_waiting("hash-2", {"submission_deadline": "Not specified"})
+    assert scheduler.position("other") == 2
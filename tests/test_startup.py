@@ -0,0 +1,42 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from agents import llm
+from core.metrics import record_startup, startup_profile
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_importing_the_app_leaves_the_llm_stack_cold():
+    code = "import sys, main; print(sorted(m for m in ('strands', 'litellm') if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_prewarm_builds_every_model_once(monkeypatch):
+    built = []
+    monkeypatch.setattr(llm, "_prewarm", {})
+    monkeypatch.setattr(llm, "get_model", built.append)
+    monkeypatch.setattr(llm, "_get_loop", lambda: None)
+    first = llm.prewarm()
+    assert first["state"] == "warm" and built == list(llm.AGENT_DEFAULTS)
+    assert llm.prewarm() == first and len(built) == len(llm.AGENT_DEFAULTS)
+
+
+def test_failed_prewarm_is_reported(monkeypatch):
+    def broken(agent_name):
+        raise RuntimeError("no API key")
+
+    monkeypatch.setattr(llm, "_prewarm", {})
+    monkeypatch.setattr(llm, "get_model", broken)
+    monkeypatch.delitem(sys.modules, "strands.models.litellm", raising=False)
+    llm.prewarm()
+    state = llm.warm_state()
+    assert state["state"] == "failed" and state["error"] == "no API key"
+
+
+def test_startup_phase_over_budget_is_flagged():
+    record_startup("test-phase", 2.0, budget=1.0)
+    assert startup_profile["test-phase"] == {"seconds": 2.0, "budget": 1.0, "over_budget": True}
+    startup_profile.pop("test-phase")
@@ -0,0 +1,50 @@
+import pytest
+
+from agents.streaming import IncrementalJSONParser, field_publisher
+
+
+def _feed_all(parser, text, size):
+    completed = []
+    for i in range(0, len(text), size):
+        completed.extend(parser.feed(text[i:i + size]))
+    return completed
+
+
+@pytest.mark.parametrize("size", [1, 3, 1000])
+def test_fields_are_published_as_they_close(size):
+    text = '```json\n{"title": "Laptops, 500 units", "items": [1, {"a": "}"}], "score": 72, "note": "say \\"hi\\""}\n```'
+    parser = IncrementalJSONParser()
+    completed = _feed_all(parser, text, size)
+    assert completed == [
+        ("title", "Laptops, 500 units"),
+        ("items", [1, {"a": "}"}]),
+        ("score", 72),
+        ("note", 'say "hi"'),
+    ]
+    assert parser.fields["score"] == 72
+
+
+def test_field_is_not_published_before_it_closes():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"title": "Lap') == []
+    assert parser.feed('tops", "score"') == [("title", "Laptops")]
+    assert parser.feed(": 7") == []
+    assert parser.feed("2}") == [("score", 72)]
+    assert parser.feed(', "late": 1}') == []
+
+
+def test_publisher_can_cancel_the_stream():
+    seen = []
+
+    def stop_when(fields):
+        return RuntimeError("not eligible") if fields.get("overall_eligible") is False else None
+
+    handler = field_publisher(lambda k, v: seen.append(k), stop_when)
+    handler(data='{"score": 10, ')
+    with pytest.raises(RuntimeError):
+        handler(data='"overall_eligible": false, "reasoning": "..."}')
+    assert seen == ["score", "overall_eligible"]
+
+
+def test_no_publisher_without_hooks():
+    assert field_publisher(None) is None
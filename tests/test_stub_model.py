@@ -0,0 +1,20 @@
+import asyncio
+
+from pydantic import BaseModel
+
+from bench.stub_model import StubModel
+
+
+class Verdict(BaseModel):
+    recommendation: str
+    eligibility_score: int
+
+
+def test_structured_output_returns_the_canned_reply_parsed():
+    model = StubModel("eligibility", latency_ms=0, jitter_ms=0)
+
+    async def collect():
+        return [event async for event in model.structured_output(Verdict, [])]
+
+    events = asyncio.run(collect())
+    assert events == [{"output": Verdict(recommendation="PROCEED", eligibility_score=78)}]
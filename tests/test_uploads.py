@@ -0,0 +1,96 @@
+import asyncio
+import io
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from fastapi.testclient import TestClient
+
+import main
+from core.uploads import save_upload, check_content_length, too_large, MAX_UPLOAD_BYTES
+
+MB = 1024 * 1024
+
+
+def _pdf(size: int) -> bytes:
+    return b"%PDF-1.4\n" + b"0" * (size - 9)
+
+
+def test_save_upload_rejects_oversize_with_413_and_its_own_limit(tmp_path):
+    dest = tmp_path / "big.pdf"
+    upload = UploadFile(io.BytesIO(_pdf(3 * MB)), filename="big.pdf")
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(save_upload(upload, str(dest), max_bytes=2 * MB, what="bundle"))
+    assert e.value.status_code == 413
+    assert "2MB" in e.value.detail and e.value.detail.startswith("Bundle")
+    assert not dest.exists()
+
+
+def test_content_length_check_matches_save_upload():
+    with pytest.raises(HTTPException) as e:
+        check_content_length(str(MAX_UPLOAD_BYTES + MB), MAX_UPLOAD_BYTES)
+    assert e.value.status_code == 413
+    assert e.value.detail == too_large(MAX_UPLOAD_BYTES).detail
+    check_content_length(str(MAX_UPLOAD_BYTES))  # within the multipart slack
+
+
+def test_bundle_route_quotes_the_bundle_limit(monkeypatch):
+    monkeypatch.setattr(main, "BUNDLE_MAX_BYTES", 1 * MB)
+    client = TestClient(main.app)
+    files = [("files", (f"doc{i}.pdf", _pdf(MB // 2 + 1), "application/pdf")) for i in range(3)]
+    response = client.post("/analyze/bundle", files=files)
+    assert response.status_code == 413
+    assert response.json()["detail"] == "Bundle too large. Please keep it under 1MB."
+
+
+def test_pdf_in_a_bundle_keeps_the_per_file_limit(monkeypatch):
+    monkeypatch.setattr(main, "MAX_UPLOAD_BYTES", 1 * MB)
+    client = TestClient(main.app)
+    response = client.post("/analyze/bundle", files=[("files", ("nit.pdf", _pdf(2 * MB), "application/pdf"))])
+    assert response.status_code == 413
+    assert response.json()["detail"] == "File too large. Please upload a PDF under 1MB."
+
+
+def _multipart(name: str, payload: bytes, boundary: str = "limit-test") -> tuple:
+    head = (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{name}"\r\n'
+            "Content-Type: application/pdf\r\n\r\n").encode()
+    return head + payload + f"\r\n--{boundary}--\r\n".encode(), f"multipart/form-data; boundary={boundary}"
+
+
+def test_chunked_upload_without_content_length_is_cut_off():
+    body, content_type = _multipart("big.pdf", _pdf(MAX_UPLOAD_BYTES + MB))
+
+    def chunks():
+        for i in range(0, len(body), MB):
+            yield body[i:i + MB]
+
+    client = TestClient(main.app)
+    response = client.post("/analyze", content=chunks(), headers={"Content-Type": content_type})
+    assert response.status_code == 413
+    assert response.json()["detail"] == too_large(MAX_UPLOAD_BYTES).detail
+
+
+def test_zip_declaring_oversize_members_is_refused_before_inflating(tmp_path, monkeypatch):
+    import zipfile
+    from core import uploads
+
+    archive = tmp_path / "bundle.zip"
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("nit.pdf", _pdf(2 * MB))
+        z.writestr("boq.pdf", _pdf(2 * MB))
+    opened = []
+    monkeypatch.setattr(zipfile.ZipFile, "open", lambda self, *a, **k: opened.append(a) or pytest.fail("inflated"))
+
+    monkeypatch.setattr(uploads, "MAX_UPLOAD_BYTES", 1 * MB)
+    with pytest.raises(HTTPException) as e:
+        uploads.extract_pdfs(str(archive), str(tmp_path), max_bytes=10 * MB)
+    assert e.value.detail == "File too large. Please upload a PDF under 1MB."
+
+    monkeypatch.setattr(uploads, "MAX_UPLOAD_BYTES", 10 * MB)
+    with pytest.raises(HTTPException) as e:
+        uploads.extract_pdfs(str(archive), str(tmp_path), max_bytes=3 * MB)
+    assert e.value.status_code == 413 and e.value.detail.startswith("Bundle")
+
+    with pytest.raises(HTTPException) as e:
+        uploads.extract_pdfs(str(archive), str(tmp_path), max_files=1)
+    assert e.value.status_code == 400
+    assert opened == []
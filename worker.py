@@ -0,0 +1,159 @@
+"""
+worker.py — Standalone ProcureX pipeline worker
+Leases jobs from the durable queue (core/scheduler.py) and runs them, writing
+results to the shared job store. Pair with an API started with
+EXECUTION_MODE=queue; run one per core, on this host or any host sharing the
+data and upload directories.
+
+    python worker.py --concurrency 2 [--metrics-port 9101]
+"""
+
+import os
+import sys
+import uuid
+import signal
+import socket
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from core.scheduler import DurableQueue, resolve_task, QUEUE_HEARTBEAT_SECONDS, QUEUE_POLL_SECONDS
+from core.jobs import job_store, lease_fence, JOB_STORE
+from core.uploads import remove_upload
+from core.metrics import render_prometheus, JOBS
+from agents.llm import prewarm
+
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", os.getenv("PIPELINE_CONCURRENCY", "2")))
+
+
+class Worker:
+    def __init__(self, queue: DurableQueue, concurrency: int = WORKER_CONCURRENCY, worker_id: str = None):
+        self.queue = queue
+        self.concurrency = max(1, concurrency)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:4]}"
+        self._stopping = threading.Event()
+        self._done = threading.Event()
+        self._held = set()
+        self._held_lock = threading.Lock()
+
+    def stop(self):
+        """Stop leasing; jobs already running finish (their leases keep being renewed)."""
+        self._stopping.set()
+
+    def run(self):
+        self.queue.register_worker(self.worker_id, self.concurrency)
+        print(f"[Worker] {self.worker_id} started with {self.concurrency} slots")
+        heartbeat = threading.Thread(target=self._heartbeat, name="worker-heartbeat", daemon=True)
+        heartbeat.start()
+        slots = [threading.Thread(target=self._slot, args=(i,), name=f"worker-slot-{i}") for i in range(self.concurrency)]
+        for t in slots:
+            t.start()
+        for t in slots:
+            t.join()
+        self._done.set()
+        heartbeat.join()
+        self.queue.unregister_worker(self.worker_id)
+        print(f"[Worker] {self.worker_id} stopped")
+
+    def _slot(self, slot: int):
+        while not self._stopping.is_set():
+            job = self.queue.lease(self.worker_id)
+            if job is None:
+                self._stopping.wait(QUEUE_POLL_SECONDS)
+                continue
+            job_id = job["job_id"]
+            with self._held_lock:
+                self._held.add(job_id)
+            print(f"[Worker] slot {slot} running {job_id} (attempt {job['attempts']})")
+            try:
+                # Fenced: once the lease is lost, this attempt's job-store writes fail instead of racing the next one
+                with lease_fence(job_id, f"{self.worker_id}:{job['attempts']}"):
+                    resolve_task(job["task"])(*job["args"])
+            except Exception as e:
+                # Pipelines record their own failures; this only guards the slot loop
+                print(f"[Worker] job {job_id} crashed: {e}")
+            finally:
+                with self._held_lock:
+                    self._held.discard(job_id)
+                self.queue.complete(job_id, self.worker_id)
+
+    def _heartbeat(self):
+        while not self._done.wait(QUEUE_HEARTBEAT_SECONDS):
+            try:
+                with self._held_lock:
+                    held = list(self._held)
+                for job_id in self.queue.heartbeat(self.worker_id, held):
+                    print(f"[Worker] lost the lease on {job_id}; it stops at its next job-store write")
+                for reaped in self.queue.reap():
+                    self._on_reaped(reaped)
+            except Exception as e:
+                print(f"[Worker] heartbeat failed: {e}")
+
+    @staticmethod
+    def _on_reaped(reaped: dict):
+        job_id, attempts = reaped["job_id"], reaped["attempts"]
+        if reaped["requeued"]:
+            print(f"[Worker] re-queued {job_id} after its worker stopped heartbeating (attempt {attempts})")
+            # Revoke the lost attempt's lease so its writes stop even before another worker claims the job
+            job_store.update(job_id, status="queued", requeued=attempts, lease=None)
+        else:
+            print(f"[Worker] giving up on {job_id} after {attempts} attempts")
+            JOBS.inc(outcome="failed")
+            job_store.update(job_id, status="failed", not_a_tender=False, lease=None,
+                             error=f"The job was lost by {attempts} workers in a row and was not retried again.")
+            # Pipelines take (job_id, upload_path, ...); their own cleanup never ran
+            if len(reaped["args"]) > 1:
+                remove_upload(reaped["args"][1])
+
+
+def serve_metrics(port: int) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    threading.Thread(target=server.serve_forever, name="worker-metrics", daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ProcureX pipeline worker (EXECUTION_MODE=queue)")
+    parser.add_argument("--concurrency", type=int, default=WORKER_CONCURRENCY, help="jobs run at once by this process")
+    parser.add_argument("--id", dest="worker_id", help="worker id (default: host-pid-random)")
+    parser.add_argument("--metrics-port", type=int, help="serve this worker's Prometheus metrics on this port")
+    args = parser.parse_args(argv)
+
+    if JOB_STORE != "sqlite":
+        sys.exit("[Worker] JOB_STORE must be sqlite so the API sees this worker's results")
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+
+    worker = Worker(DurableQueue(), concurrency=args.concurrency, worker_id=args.worker_id)
+
+    def on_signal(signum, frame):
+        if worker._stopping.is_set():
+            # Second signal: leave now; the leases expire and other workers pick the jobs up
+            os._exit(1)
+        print("[Worker] Finishing running jobs before exit (signal again to quit now)")
+        worker.stop()
+
+    signal.signal(signal.SIGTERM, on_signal)
+    signal.signal(signal.SIGINT, on_signal)
+    # Slots start leasing right away; a job that beats the prewarm waits on the same imports
+    threading.Thread(target=prewarm, name="llm-prewarm", daemon=True).start()
+    worker.run()
+
+
+if __name__ == "__main__":
+    main()